@@ -0,0 +1,75 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Dict, List, Optional
+
+from autogen_agentchat.agents import AssistantAgent
+from autogen_core import CancellationToken
+
+from app.logger.console_logger import error
+
+
+class AgentPool:
+    """
+    Пул агентов: каждый запуск получает свой экземпляр AssistantAgent
+    со своим model_context, а model_client (и его пул соединений) общий.
+
+    - max_size ограничивает число одновременно выданных экземпляров;
+    - освобождённые агенты сбрасываются и переиспользуются;
+    - try_acquire не ждёт слот — для тех, кто уже держит агента.
+    """
+
+    def __init__(self, factories: Dict[str, Callable[[], AssistantAgent]], max_size: int):
+        self._factories = factories
+        self._max_size = max(1, max_size)
+        self._idle: Dict[str, List[AssistantAgent]] = {role: [] for role in factories}
+        self._semaphore = asyncio.Semaphore(self._max_size)
+        self._free = self._max_size
+
+    def roles(self) -> List[str]:
+        return list(self._factories)
+
+    def _take(self, role: str) -> AssistantAgent:
+        if role not in self._factories:
+            error(f"ERROR: agent '{role}' NOT FOUND in agent pool!")
+            raise ValueError(f"AI agent '{role}' not found")
+
+        idle = self._idle[role]
+        return idle.pop() if idle else self._factories[role]()
+
+    async def _give_back(self, role: str, agent: AssistantAgent) -> None:
+        try:
+            await agent.on_reset(CancellationToken())
+        except Exception as e:
+            # сломанный экземпляр не возвращаем в пул
+            error(f"[AGENT_POOL] reset {role} failed: {e}")
+            return
+
+        idle = self._idle[role]
+        if len(idle) < self._max_size:
+            idle.append(agent)
+
+    @asynccontextmanager
+    async def acquire(self, role: str) -> AsyncIterator[AssistantAgent]:
+        async with self._semaphore:
+            self._free -= 1
+            try:
+                agent = self._take(role)
+                try:
+                    yield agent
+                finally:
+                    await self._give_back(role, agent)
+            finally:
+                self._free += 1
+
+    @asynccontextmanager
+    async def try_acquire(self, role: str, keep_free: int = 0) -> AsyncIterator[Optional[AssistantAgent]]:
+        """
+        Экземпляр без ожидания: None, если свободных слотов не больше keep_free.
+        Держа один слот, нельзя ждать второй — при занятом пуле это взаимная блокировка.
+        """
+        if self._free <= keep_free or self._semaphore.locked():
+            yield None
+            return
+        # семафор свободен: acquire не уступает управление между проверкой и захватом
+        async with self.acquire(role) as agent:
+            yield agent
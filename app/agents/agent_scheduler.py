@@ -0,0 +1,102 @@
+import asyncio
+import os
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Sequence
+
+from dotenv import load_dotenv
+
+from app.logger.console_logger import info
+
+load_dotenv()
+
+AGENT_CONCURRENCY = int(os.getenv("AGENT_CONCURRENCY", "2"))
+
+
+@dataclass(frozen=True)
+class AgentRoleIO:
+    """Что роль потребляет и что производит (spec, frontend, backend, ...)."""
+
+    consumes: frozenset = field(default_factory=frozenset)
+    produces: frozenset = field(default_factory=frozenset)
+
+
+class AgentScheduler:
+    """
+    Запускает агентов по графу зависимостей:
+    - роль ждёт только тех участников, которые производят то, что она потребляет;
+    - независимые роли работают параллельно (не больше limit одновременно);
+    - результаты отдаются в порядке участников, независимо от порядка завершения.
+    """
+
+    def __init__(self, roles: Dict[str, AgentRoleIO], limit: int = AGENT_CONCURRENCY):
+        self.roles = roles
+        self.limit = max(1, limit)
+
+    def dependencies(self, role_ids: Sequence[str]) -> Dict[str, List[str]]:
+        deps: Dict[str, List[str]] = {}
+
+        for role_id in role_ids:
+            consumes = self.roles.get(role_id, AgentRoleIO()).consumes
+            deps[role_id] = [
+                other
+                for other in role_ids
+                if other != role_id
+                and consumes & self.roles.get(other, AgentRoleIO()).produces
+            ]
+
+        self._check_cycles(deps)
+        return deps
+
+    @staticmethod
+    def _check_cycles(deps: Dict[str, List[str]]) -> None:
+        state: Dict[str, int] = {}
+
+        def visit(node: str, stack: List[str]) -> None:
+            if state.get(node) == 1:
+                raise ValueError(f"Циклическая зависимость агентов: {' -> '.join(stack + [node])}")
+            if state.get(node) == 2:
+                return
+            state[node] = 1
+            for dep in deps.get(node, []):
+                visit(dep, stack + [node])
+            state[node] = 2
+
+        for node in deps:
+            visit(node, [])
+
+    async def run(
+        self,
+        role_ids: Sequence[str],
+        run_fn: Callable[[str], Awaitable[Any]],
+    ) -> List[Any]:
+        deps = self.dependencies(role_ids)
+        semaphore = asyncio.Semaphore(self.limit)
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run_role(role_id: str) -> Any:
+            # ждём производителей входных артефактов
+            if deps[role_id]:
+                await asyncio.gather(*(tasks[dep] for dep in deps[role_id]))
+
+            async with semaphore:
+                info(f"[SCHEDULER] start {role_id}")
+                return await run_fn(role_id)
+
+        for role_id in role_ids:
+            tasks[role_id] = asyncio.create_task(run_role(role_id))
+
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+
+            # детерминированно: ошибка первого по порядку упавшего участника
+            for role_id in role_ids:
+                task = tasks[role_id]
+                if not task.cancelled() and task.exception() is not None:
+                    raise task.exception()  # type: ignore
+            raise
+
+        return [tasks[role_id].result() for role_id in role_ids]
@@ -3,6 +3,10 @@ from autogen_agentchat.agents import AssistantAgent
 from autogen_ext.models.openai import OpenAIChatCompletionClient
 from dotenv import load_dotenv
 
+from app.agents.agent_pool import AgentPool
+from app.agents.agent_scheduler import AgentRoleIO
+from app.agents.llm.dispatcher import DispatchingChatCompletionClient
+from app.agents.llm.response_cache import with_response_cache
 from app.agents.prompts import (
     BACKEND_SYSTEM_PROMPT,
     CONTRACT_AGENT_SYSTEM_PROMPT,
@@ -20,57 +24,59 @@ AI_API_KEY = os.getenv("AI_API_KEY")
 if not AI_MODEL or not AI_API_KEY:
     raise EnvironmentError("Установите AI_MODEL и AI_API_KEY в .env")
 
-model_client = OpenAIChatCompletionClient(
+# все агенты делят один клиент; вызовы идут через кэш и глобальный диспетчер
+model_client = with_response_cache(
+    DispatchingChatCompletionClient(
+        OpenAIChatCompletionClient(
+            model=AI_MODEL,
+            api_key=AI_API_KEY,
+        )
+    ),
     model=AI_MODEL,
-    api_key=AI_API_KEY,
 )
 
-product_manager = AssistantAgent(
-    name="ProductManager",
-    model_client=model_client,
-    model_client_stream=True,
-    system_message=PRODUCT_MANAGER_SYSTEM_PROMPT,
-)
+AGENT_POOL_SIZE = int(os.getenv("AGENT_POOL_SIZE", "16"))
 
-contract_agent = AssistantAgent(
-    name="ContractAgent", model_client=model_client, system_message=CONTRACT_AGENT_SYSTEM_PROMPT
-)
 
-frontend = AssistantAgent(
-    name="Frontend", model_client=model_client, system_message=FRONTEND_SYSTEM_PROMPT
-)
+def _create_agent(name: str, system_message: str, stream: bool = False) -> AssistantAgent:
+    return AssistantAgent(
+        name=name,
+        model_client=model_client,
+        model_client_stream=stream,
+        system_message=system_message,
+    )
 
-backend = AssistantAgent(
-    name="Backend", model_client=model_client, system_message=BACKEND_SYSTEM_PROMPT
-)
 
-interface = AssistantAgent(
-    name="Interface", model_client=model_client, system_message=INTERFACE_SYSTEM_PROMPT
-)
+AGENT_FACTORIES = {
+    "product_manager": lambda: _create_agent("ProductManager", PRODUCT_MANAGER_SYSTEM_PROMPT, stream=True),
+    "contract": lambda: _create_agent("ContractAgent", CONTRACT_AGENT_SYSTEM_PROMPT),
+    "interface": lambda: _create_agent("Interface", INTERFACE_SYSTEM_PROMPT, stream=True),
+    "frontend": lambda: _create_agent("Frontend", FRONTEND_SYSTEM_PROMPT, stream=True),
+    "backend": lambda: _create_agent("Backend", BACKEND_SYSTEM_PROMPT, stream=True),
+}
+
+AI_AGENT_IDS = ("interface", "frontend", "backend")
 
-AI_AGENT_OBJECTS = {
-    "interface": interface,
-    "frontend": frontend,
-    "backend": backend,
+# interface пишет спецификацию, frontend и backend реализуют её
+AI_AGENT_ROLES = {
+    "interface": AgentRoleIO(produces=frozenset({"spec"})),
+    "frontend": AgentRoleIO(consumes=frozenset({"spec"}), produces=frozenset({"frontend"})),
+    "backend": AgentRoleIO(consumes=frozenset({"spec"}), produces=frozenset({"backend"})),
 }
 
+agent_pool = AgentPool(AGENT_FACTORIES, max_size=AGENT_POOL_SIZE)
+
 
-def get_ai_agents_by_ids(agent_ids: list[str]) -> list[AssistantAgent]:
-    agents: list[AssistantAgent] = []
+def get_ai_agent_ids(agent_ids: list[str]) -> list[str]:
+    keys: list[str] = []
 
     for agent_id in agent_ids:
         key = agent_id.strip()
 
-        if key not in AI_AGENT_OBJECTS:
-            error(f"ERROR: agent '{key}' NOT FOUND in AI_AGENT_OBJECTS!")
+        if key not in AI_AGENT_IDS:
+            error(f"ERROR: agent '{key}' NOT FOUND in AI_AGENT_IDS!")
             raise ValueError(f"AI agent '{key}' not found")
 
-        agent = AI_AGENT_OBJECTS[key]
-
-        if not hasattr(agent, "run_stream"):
-            error(f"ERROR: agent '{key}' is not a valid AssistantAgent")
-            raise TypeError(f"Object '{key}' is not a valid agent instance")
-
-        agents.append(agent)
+        keys.append(key)
 
-    return agents
+    return keys
@@ -2,15 +2,33 @@ import uuid
 from autogen_core.model_context import UnboundedChatCompletionContext
 from autogen_core.models import SystemMessage, UserMessage
 
+from app.agents.context.symbol_index import SymbolIndexService
 from app.db import projects
 from app.logger.console_logger import info
 
 
-async def build_agent_context(agent_name: str, project_id: uuid.UUID, task: str):
+async def build_agent_context(
+    agent_name: str,
+    project_id: uuid.UUID,
+    task: str,
+    focus_paths: list[str] | None = None,
+    fix_paths: list[str] | None = None,
+):
+    if fix_paths:
+        return await _build_fix_context(agent_name, project_id, task, fix_paths)
+
     project = projects.get_project_by_id(project_id)
     tree = projects.get_structure_cache(project_id)
     summaries = projects.get_file_summaries(project_id)
     memory = projects.get_agent_memory(project_id, agent_name)
+    symbols = SymbolIndexService(project_id)
+    index = symbols.get_index()
+
+    # если известны нужные файлы — отдаём только их и прямых соседей по импортам
+    if focus_paths:
+        related = set(symbols.related(focus_paths, index=index))
+        summaries = {p: s for p, s in summaries.items() if p in related}
+        index = {p: row for p, row in index.items() if p in related}
 
     # convert memory into text
     memory_text = "\n".join(f"- {k}: {v}" for k, v in memory.items()) or "Нет"
@@ -20,20 +38,21 @@ async def build_agent_context(agent_name: str, project_id: uuid.UUID, task: str)
         or "Нет файлов"
     )
 
-    meta = f"""
-    ID: {project.project_id}
-    Название: {project.name}
-    Описание: {project.description}
-    Статус: {project.status}
-    Участники: {project.agent_ids}
-    """
+    deps_text = (
+        "\n".join(
+            f"{path} -> {', '.join(row['deps'])}"
+            for path, row in sorted(index.items())
+            if row["deps"]
+        )
+        or "Нет"
+    )
 
     system_prompt = f"""
     ТЕКУЩЕЕ СОСТОЯНИЕ ПРОЕКТА
     =========================
 
     МЕТА:
-    {meta}
+    {_meta_text(project)}
 
     СТРУКТУРА ПРОЕКТА:
     {tree}
@@ -41,12 +60,91 @@ async def build_agent_context(agent_name: str, project_id: uuid.UUID, task: str)
     КОРОТКИЕ САММАРИ ФАЙЛОВ:
     {summaries_text}
 
+    ЗАВИСИМОСТИ ФАЙЛОВ (импорты):
+    {deps_text}
+
     ПАМЯТЬ ТВОЕЙ РОЛИ:
     {memory_text}
 
     ---
 
-    ПРАВИЛА:
+    {_rules_text(agent_name)}
+    """
+
+    # info(system_prompt)
+
+    return await _make_context(system_prompt, task, agent_name)
+
+
+async def _build_fix_context(
+    agent_name: str,
+    project_id: uuid.UUID,
+    task: str,
+    fix_paths: list[str],
+):
+    """
+    Контекст раунда исправления: полные тексты падающих файлов и экспорты
+    их прямых соседей по импортам. Саммари остальных файлов и память роли
+    не передаются — ошибка локализована диагностиками.
+    """
+    project = projects.get_project_by_id(project_id)
+    tree = projects.get_structure_cache(project_id)
+    symbols = SymbolIndexService(project_id)
+    index = symbols.get_index()
+
+    files_text = ""
+    for path in fix_paths:
+        row = projects.get_file(project_id, path)
+        if row is not None:
+            files_text += f"--- {path}\n{row.content}\n"
+
+    neighbours = [p for p in symbols.related(fix_paths, index=index) if p not in fix_paths]
+    neighbours_text = (
+        "\n".join(
+            f"{path}: exports {', '.join(index[path]['exports']) or '-'}"
+            for path in neighbours
+            if path in index
+        )
+        or "Нет"
+    )
+
+    system_prompt = f"""
+    ИСПРАВЛЕНИЕ СБОРКИ
+    =========================
+
+    МЕТА:
+    {_meta_text(project)}
+
+    СТРУКТУРА ПРОЕКТА:
+    {tree}
+
+    ФАЙЛЫ С ОШИБКАМИ (полностью):
+{files_text or "Нет"}
+    СОСЕДНИЕ ФАЙЛЫ (импорты):
+    {neighbours_text}
+
+    ---
+
+    {_rules_text(agent_name)}
+    """
+
+    info(f"[AGENT_CONTEXT] fix context {agent_name}: {len(fix_paths)} файлов, {len(neighbours)} соседей")
+
+    return await _make_context(system_prompt, task, agent_name)
+
+
+def _meta_text(project) -> str:
+    return f"""
+    ID: {project.project_id}
+    Название: {project.name}
+    Описание: {project.description}
+    Статус: {project.status}
+    Участники: {project.agent_ids}
+    """
+
+
+def _rules_text(agent_name: str) -> str:
+    return f"""ПРАВИЛА:
     Ты должен выводить JSON строго вида:
     {{
     "create": [...],
@@ -54,11 +152,10 @@ async def build_agent_context(agent_name: str, project_id: uuid.UUID, task: str)
     "delete": [...]
     }}
 
-    Твоя роль: {agent_name}
-    """
+    Твоя роль: {agent_name}"""
 
-    # info(system_prompt)
 
+async def _make_context(system_prompt: str, task: str, agent_name: str):
     ctx = UnboundedChatCompletionContext()
 
     await ctx.add_message(SystemMessage(content=system_prompt))
@@ -1,6 +1,7 @@
 import uuid
 from typing import List, Dict
 
+from app.agents.context.symbol_index import SymbolIndexService
 from app.db import projects as db
 
 
@@ -11,14 +12,27 @@ class ProjectContextService:
 
     def __init__(self, project_id: uuid.UUID):
         self.project_id = project_id
+        self.symbols = SymbolIndexService(project_id)
 
     # ==========================================================
     # MAIN ENTRYPOINT
     # ==========================================================
     def apply_operations(self, operations: List[Dict[str, str]]):
+        self.apply_files(operations)
+        self.refresh(operations)
+
+    def apply_files(self, operations: List[Dict[str, str]]):
+        """Только запись файлов — можно вызывать по мере стриминга операций."""
         self._apply_files(operations)
-        self._update_structure()
+
+    def refresh(self, operations: List[Dict[str, str]]):
+        """Пересчёт структуры, саммари и индекса после пачки операций."""
+        file_paths = self._update_structure()
         self._update_summaries()
+        self._update_symbols(operations, file_paths)
+
+    def all_files(self) -> Dict[str, str]:
+        return db.get_all_files(self.project_id)
 
     # ==========================================================
     # APPLY FILE OPERATIONS (Cassandra)
@@ -80,9 +94,16 @@ class ProjectContextService:
     # ==========================================================
     # STRUCTURE
     # ==========================================================
-    def _update_structure(self):
+    def _update_structure(self) -> List[str]:
         file_paths = list(db.get_all_files(self.project_id).keys())
         db.update_structure_cache(self.project_id, file_paths)
+        return file_paths
+
+    # ==========================================================
+    # SYMBOLS
+    # ==========================================================
+    def _update_symbols(self, operations: List[Dict[str, str]], file_paths: List[str]):
+        self.symbols.update(operations, set(file_paths))
 
     # ==========================================================
     # SUMMARIES
@@ -0,0 +1,302 @@
+import ast
+import posixpath
+import re
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+from app.db import projects as db
+
+
+JS_EXTENSIONS = (".ts", ".tsx", ".js", ".jsx", ".mjs", ".cjs")
+PY_EXTENSIONS = (".py",)
+
+# ==========================================================
+# JS / TS
+# ==========================================================
+JS_IMPORT_RE = re.compile(
+    r"""(?:^|[;\s])(?:import|export)\s+(?:type\s+)?(?:[\w*{}\s,$]+?\s+from\s+)?["']([^"'\n]+)["']""",
+    re.MULTILINE,
+)
+JS_DYNAMIC_IMPORT_RE = re.compile(r"""(?:\brequire|\bimport)\s*\(\s*["']([^"'\n]+)["']\s*\)""")
+
+JS_EXPORT_DECL_RE = re.compile(
+    r"^\s*export\s+(?:declare\s+)?(?:default\s+)?(?:async\s+)?"
+    r"(?:function\s*\*?|class|const|let|var|interface|type|enum|abstract\s+class)\s+([A-Za-z_$][\w$]*)",
+    re.MULTILINE,
+)
+JS_EXPORT_DEFAULT_RE = re.compile(r"^\s*export\s+default\b", re.MULTILINE)
+JS_EXPORT_LIST_RE = re.compile(r"^\s*export\s+(?:type\s+)?\{([^}]*)\}", re.MULTILINE)
+JS_EXPORT_STAR_RE = re.compile(r"^\s*export\s+\*\s+(?:as\s+([A-Za-z_$][\w$]*)\s+)?from\b", re.MULTILINE)
+
+JS_COMMENT_RE = re.compile(r"/\*[\s\S]*?\*/|(?<![:\"'])//[^\n]*")
+
+
+@dataclass
+class FileSymbols:
+    path: str
+    exports: List[str] = field(default_factory=list)
+    imports: List[str] = field(default_factory=list)
+
+
+def _unique(items: Iterable[str]) -> List[str]:
+    seen: Dict[str, None] = {}
+    for item in items:
+        if item and item not in seen:
+            seen[item] = None
+    return list(seen)
+
+
+def _parse_js(path: str, content: str) -> FileSymbols:
+    text = JS_COMMENT_RE.sub("", content)
+
+    imports = [m.group(1) for m in JS_IMPORT_RE.finditer(text)]
+    imports += [m.group(1) for m in JS_DYNAMIC_IMPORT_RE.finditer(text)]
+
+    exports = [m.group(1) for m in JS_EXPORT_DECL_RE.finditer(text)]
+    if JS_EXPORT_DEFAULT_RE.search(text):
+        exports.append("default")
+
+    for m in JS_EXPORT_LIST_RE.finditer(text):
+        for part in m.group(1).split(","):
+            name = part.strip().split(" as ")[-1].strip()
+            if name:
+                exports.append(name)
+
+    for m in JS_EXPORT_STAR_RE.finditer(text):
+        exports.append(m.group(1) or "*")
+
+    return FileSymbols(path=path, exports=_unique(exports), imports=_unique(imports))
+
+
+# ==========================================================
+# PYTHON
+# ==========================================================
+def _parse_py(path: str, content: str) -> FileSymbols:
+    try:
+        tree = ast.parse(content)
+    except (SyntaxError, ValueError):
+        return FileSymbols(path=path)
+
+    imports: List[str] = []
+    exports: List[str] = []
+    explicit_all: Optional[List[str]] = None
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            imports.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            prefix = "." * node.level
+            if node.module:
+                imports.append(prefix + node.module)
+            else:
+                # from . import a, b — a и b могут быть модулями
+                imports.extend(prefix + alias.name for alias in node.names)
+
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            exports.append(node.name)
+        elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            for target in targets:
+                if not isinstance(target, ast.Name):
+                    continue
+                if target.id == "__all__" and isinstance(node.value, (ast.List, ast.Tuple)):
+                    explicit_all = [
+                        elt.value
+                        for elt in node.value.elts
+                        if isinstance(elt, ast.Constant) and isinstance(elt.value, str)
+                    ]
+                else:
+                    exports.append(target.id)
+
+    if explicit_all is not None:
+        exports = explicit_all
+    else:
+        exports = [name for name in exports if not name.startswith("_")]
+
+    return FileSymbols(path=path, exports=_unique(exports), imports=_unique(imports))
+
+
+def parse_file(path: str, content: str) -> Optional[FileSymbols]:
+    """Возвращает экспорты/импорты файла или None, если язык не поддерживается."""
+    if path.endswith(JS_EXTENSIONS):
+        return _parse_js(path, content or "")
+    if path.endswith(PY_EXTENSIONS):
+        return _parse_py(path, content or "")
+    return None
+
+
+# ==========================================================
+# RESOLVE
+# ==========================================================
+def _top_dir(path: str) -> str:
+    return path.split("/", 1)[0] if "/" in path else ""
+
+
+def _resolve_js(from_path: str, spec: str, file_set: set) -> Optional[str]:
+    if spec.startswith("."):
+        base = posixpath.normpath(posixpath.join(posixpath.dirname(from_path), spec))
+    elif spec.startswith("@/"):
+        # vite alias "@" -> <top>/src
+        top = _top_dir(from_path)
+        base = posixpath.join(top, "src", spec[2:]) if top else posixpath.join("src", spec[2:])
+    elif spec.startswith("/"):
+        top = _top_dir(from_path)
+        base = posixpath.join(top, spec.lstrip("/")) if top else spec.lstrip("/")
+    else:
+        # внешний пакет (react, vite, ...)
+        return None
+
+    candidates = [base]
+    candidates += [base + ext for ext in JS_EXTENSIONS]
+    candidates += [posixpath.join(base, "index" + ext) for ext in JS_EXTENSIONS]
+
+    # import "./x.js" из TS-файла указывает на x.ts
+    stem, ext = posixpath.splitext(base)
+    if ext in JS_EXTENSIONS:
+        candidates += [stem + e for e in JS_EXTENSIONS]
+
+    for candidate in candidates:
+        if candidate in file_set:
+            return candidate
+    return None
+
+
+def _resolve_py(from_path: str, spec: str, file_set: set) -> Optional[str]:
+    level = len(spec) - len(spec.lstrip("."))
+    module = spec[level:]
+
+    if level:
+        base = posixpath.dirname(from_path)
+        for _ in range(level - 1):
+            base = posixpath.dirname(base)
+        roots = [base]
+    else:
+        # абсолютный импорт: от корня зоны (backend/) или от корня репозитория
+        top = _top_dir(from_path)
+        roots = [top, ""] if top else [""]
+
+    rel = module.replace(".", "/")
+    for root in roots:
+        base = posixpath.join(root, rel) if rel else root
+        for candidate in (base + ".py", posixpath.join(base, "__init__.py")):
+            candidate = candidate.lstrip("/")
+            if candidate in file_set:
+                return candidate
+    return None
+
+
+def resolve_import(from_path: str, spec: str, file_set: set) -> Optional[str]:
+    if from_path.endswith(JS_EXTENSIONS):
+        return _resolve_js(from_path, spec, file_set)
+    if from_path.endswith(PY_EXTENSIONS):
+        return _resolve_py(from_path, spec, file_set)
+    return None
+
+
+def resolve_dependencies(from_path: str, imports: Iterable[str], file_set: set) -> List[str]:
+    deps = (resolve_import(from_path, spec, file_set) for spec in imports)
+    return sorted({dep for dep in deps if dep and dep != from_path})
+
+
+# ==========================================================
+# SERVICE
+# ==========================================================
+class SymbolIndexService:
+    """
+    Инкрементальный индекс экспортов, импортов и связей между файлами проекта.
+    Парсятся только изменённые файлы; связи остальных пересчитываются
+    по сохранённым импортам, если изменился набор файлов.
+    """
+
+    def __init__(self, project_id: uuid.UUID):
+        self.project_id = project_id
+
+    def update(self, operations: List[Dict[str, str]], file_set: set) -> None:
+        index = db.get_file_symbols(self.project_id)
+        touched: set = set()
+
+        for op in operations:
+            path = op["path"]
+
+            if op["op"] == "delete":
+                if path in index:
+                    db.delete_file_symbols(self.project_id, path)
+                    index.pop(path, None)
+                continue
+
+            if op["op"] not in ("create", "update"):
+                continue
+
+            symbols = parse_file(path, op.get("content", ""))
+            if symbols is None:
+                continue
+
+            deps = resolve_dependencies(path, symbols.imports, file_set)
+            db.set_file_symbols(
+                self.project_id, path, symbols.exports, symbols.imports, deps
+            )
+            index[path] = {"exports": symbols.exports, "imports": symbols.imports, "deps": deps}
+            touched.add(path)
+
+        # новые/удалённые файлы могут поменять связи у остальных
+        for path, row in index.items():
+            if path in touched:
+                continue
+            deps = resolve_dependencies(path, row["imports"], file_set)
+            if deps != row["deps"]:
+                db.set_file_symbols(self.project_id, path, row["exports"], row["imports"], deps)
+                row["deps"] = deps
+
+    def get_index(self) -> Dict[str, Dict[str, List[str]]]:
+        return db.get_file_symbols(self.project_id)
+
+    def related(
+        self,
+        paths: Iterable[str],
+        depth: int = 1,
+        index: Optional[Dict[str, Dict[str, List[str]]]] = None,
+    ) -> List[str]:
+        """Файлы + их прямые зависимости и зависимые файлы (до depth шагов)."""
+        if index is None:
+            index = self.get_index()
+
+        dependents: Dict[str, set] = {}
+        for path, row in index.items():
+            for dep in row["deps"]:
+                dependents.setdefault(dep, set()).add(path)
+
+        result = {p for p in paths}
+        frontier = set(result)
+        for _ in range(depth):
+            nxt: set = set()
+            for path in frontier:
+                nxt.update(index.get(path, {}).get("deps", []))
+                nxt.update(dependents.get(path, set()))
+            frontier = nxt - result
+            result |= nxt
+
+        return sorted(result)
+
+    def focus_paths(self, text: str, extra: Iterable[str] = ()) -> List[str]:
+        """Файлы, которые стоит показать агенту при исправлении ошибки."""
+        mentioned = self.paths_mentioned(text, db.get_file_paths(self.project_id))
+        return sorted(set(mentioned) | set(extra))
+
+    @staticmethod
+    def paths_mentioned(text: str, file_paths: Iterable[str]) -> List[str]:
+        """
+        Файлы проекта, упомянутые в тексте (например, в логе сборки).
+        В CI команды выполняются внутри frontend/, поэтому путь ищем
+        и целиком, и без директории верхнего уровня.
+        """
+        if not text:
+            return []
+
+        found = []
+        for path in file_paths:
+            short = path.split("/", 1)[1] if "/" in path else path
+            if path in text or (("/" in short) and short in text):
+                found.append(path)
+        return sorted(found)
@@ -0,0 +1,232 @@
+import asyncio
+import itertools
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Any, AsyncGenerator, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from autogen_core.models import ChatCompletionClient, LLMMessage
+from dotenv import load_dotenv
+
+from app.logger.console_logger import info
+
+load_dotenv()
+
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+# ожидание дольше этого порога пишем в лог
+LLM_WAIT_LOG_SEC = float(os.getenv("LLM_WAIT_LOG_SEC", "1.0"))
+
+
+class LLMPriority(IntEnum):
+    """Чем меньше значение — тем раньше вызов получает слот."""
+
+    CHAT = 0
+    CONTRACT = 1
+    CODING = 2
+    FIX = 3
+
+
+_GLOBAL_PROJECT = "global"
+
+_llm_call: ContextVar[Optional[Tuple[str, LLMPriority]]] = ContextVar("llm_call", default=None)
+
+
+@contextmanager
+def llm_call_context(project_id: Any, priority: LLMPriority) -> Iterator[None]:
+    """Помечает все LLM-вызовы внутри блока проектом и классом приоритета."""
+    token = _llm_call.set((str(project_id), priority))
+    try:
+        yield
+    finally:
+        _llm_call.reset(token)
+
+
+def current_llm_call() -> Tuple[str, LLMPriority]:
+    return _llm_call.get() or (_GLOBAL_PROJECT, LLMPriority.CODING)
+
+
+@dataclass
+class _Waiter:
+    project_id: str
+    priority: LLMPriority
+    seq: int
+    future: asyncio.Future
+
+
+@dataclass
+class _WaitStats:
+    count: int = 0
+    total_sec: float = 0.0
+    max_sec: float = 0.0
+
+
+class LLMDispatcher:
+    """
+    Глобальный лимит одновременных LLM-вызовов.
+
+    Когда слотов нет, следующий вызов выбирается так:
+    1) по классу приоритета (чат -> контракт -> код -> фиксы);
+    2) внутри класса — проект с наименьшим числом активных вызовов,
+       при равенстве — тот, кого дольше не обслуживали (справедливость);
+    3) дальше — по порядку поступления.
+    """
+
+    def __init__(self, max_concurrency: int = LLM_MAX_CONCURRENCY):
+        self.max_concurrency = max(1, max_concurrency)
+        self._active = 0
+        self._in_flight: Dict[str, int] = {}
+        self._last_served: Dict[str, int] = {}
+        self._served = itertools.count()
+        self._waiters: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._stats: Dict[LLMPriority, _WaitStats] = {p: _WaitStats() for p in LLMPriority}
+
+    # =========================
+    # Slots
+    # =========================
+
+    def _grant(self, project_id: str) -> None:
+        self._active += 1
+        self._in_flight[project_id] = self._in_flight.get(project_id, 0) + 1
+        self._last_served[project_id] = next(self._served)
+
+    def _dispatch(self) -> None:
+        while self._active < self.max_concurrency and self._waiters:
+            waiter = min(
+                self._waiters,
+                key=lambda w: (
+                    w.priority,
+                    self._in_flight.get(w.project_id, 0),
+                    self._last_served.get(w.project_id, -1),
+                    w.seq,
+                ),
+            )
+            self._waiters.remove(waiter)
+            if waiter.future.done():
+                continue
+            self._grant(waiter.project_id)
+            waiter.future.set_result(None)
+
+    async def acquire(self, project_id: str, priority: LLMPriority) -> float:
+        """Ждёт слот и возвращает время ожидания в очереди (сек)."""
+        started = time.monotonic()
+
+        if self._active < self.max_concurrency and not self._waiters:
+            self._grant(project_id)
+        else:
+            loop = asyncio.get_running_loop()
+            waiter = _Waiter(project_id, priority, next(self._seq), loop.create_future())
+            self._waiters.append(waiter)
+            try:
+                await waiter.future
+            except asyncio.CancelledError:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                elif waiter.future.done() and not waiter.future.cancelled():
+                    # слот уже выдан, но вызов отменили — возвращаем слот
+                    self.release(project_id)
+                raise
+
+        waited = time.monotonic() - started
+        self._record_wait(priority, waited)
+        return waited
+
+    def release(self, project_id: str) -> None:
+        self._active = max(0, self._active - 1)
+        left = self._in_flight.get(project_id, 0) - 1
+        if left > 0:
+            self._in_flight[project_id] = left
+        else:
+            self._in_flight.pop(project_id, None)
+            if not any(w.project_id == project_id for w in self._waiters):
+                self._last_served.pop(project_id, None)
+        self._dispatch()
+
+    # =========================
+    # Metrics
+    # =========================
+
+    def _record_wait(self, priority: LLMPriority, waited: float) -> None:
+        st = self._stats[priority]
+        st.count += 1
+        st.total_sec += waited
+        st.max_sec = max(st.max_sec, waited)
+
+        if waited >= LLM_WAIT_LOG_SEC:
+            info(f"[LLM_DISPATCH] {priority.name} ждал слот {waited:.2f}s")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "active": self._active,
+            "queued": len(self._waiters),
+            "queued_by_priority": {
+                p.name.lower(): sum(1 for w in self._waiters if w.priority == p)
+                for p in LLMPriority
+            },
+            "wait": {
+                p.name.lower(): {
+                    "count": st.count,
+                    "avg_sec": round(st.total_sec / st.count, 3) if st.count else 0.0,
+                    "max_sec": round(st.max_sec, 3),
+                }
+                for p, st in self._stats.items()
+            },
+        }
+
+
+llm_dispatcher = LLMDispatcher()
+
+
+class DispatchingChatCompletionClient(ChatCompletionClient):
+    """
+    Обёртка над model client: каждый create/create_stream сначала
+    получает слот у LLMDispatcher. Проект и приоритет берутся из llm_call_context.
+    """
+
+    def __init__(self, client: ChatCompletionClient, dispatcher: LLMDispatcher = llm_dispatcher):
+        self._client = client
+        self._dispatcher = dispatcher
+
+    async def create(self, messages: Sequence[LLMMessage], **kwargs: Any):
+        project_id, priority = current_llm_call()
+        await self._dispatcher.acquire(project_id, priority)
+        try:
+            return await self._client.create(messages, **kwargs)
+        finally:
+            self._dispatcher.release(project_id)
+
+    async def create_stream(self, messages: Sequence[LLMMessage], **kwargs: Any) -> AsyncGenerator[Any, None]:
+        project_id, priority = current_llm_call()
+        await self._dispatcher.acquire(project_id, priority)
+        try:
+            async for chunk in self._client.create_stream(messages, **kwargs):
+                yield chunk
+        finally:
+            self._dispatcher.release(project_id)
+
+    async def close(self) -> None:
+        await self._client.close()
+
+    def actual_usage(self):
+        return self._client.actual_usage()
+
+    def total_usage(self):
+        return self._client.total_usage()
+
+    def count_tokens(self, messages: Sequence[LLMMessage], **kwargs: Any) -> int:
+        return self._client.count_tokens(messages, **kwargs)
+
+    def remaining_tokens(self, messages: Sequence[LLMMessage], **kwargs: Any) -> int:
+        return self._client.remaining_tokens(messages, **kwargs)
+
+    @property
+    def capabilities(self):  # type: ignore
+        return self._client.capabilities
+
+    @property
+    def model_info(self):
+        return self._client.model_info
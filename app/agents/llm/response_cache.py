@@ -0,0 +1,289 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncGenerator, Dict, Optional, Sequence
+
+from autogen_core.models import ChatCompletionClient, CreateResult, LLMMessage
+from dotenv import load_dotenv
+
+from app.agents.llm.dispatcher import LLMPriority, current_llm_call
+from app.logger.console_logger import error, info
+
+load_dotenv()
+
+# off — без кэша, readwrite — читаем и пишем, replay — только из кэша, без сети
+LLM_CACHE_MODE = os.getenv("LLM_CACHE_MODE", "off").lower()
+LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR", ".llm_cache")
+LLM_CACHE_MAX_MB = int(os.getenv("LLM_CACHE_MAX_MB", "512"))
+# какие классы вызовов можно кэшировать (чат по умолчанию — нет)
+LLM_CACHE_PRIORITIES = os.getenv("LLM_CACHE_PRIORITIES", "contract,coding,fix")
+# кэшируем только вызовы с temperature <= порога; пусто — без проверки
+LLM_CACHE_MAX_TEMPERATURE = os.getenv("LLM_CACHE_MAX_TEMPERATURE", "")
+
+CACHE_MODES = ("off", "readwrite", "replay")
+
+
+class LLMReplayMiss(RuntimeError):
+    """В режиме replay для запроса нет записанного ответа."""
+
+
+@dataclass
+class CacheRules:
+    """Правила детерминированности: какие вызовы можно отдавать из кэша."""
+
+    priorities: frozenset = field(default_factory=frozenset)
+    max_temperature: Optional[float] = None
+
+    @classmethod
+    def from_env(cls) -> "CacheRules":
+        names = {p.strip().upper() for p in LLM_CACHE_PRIORITIES.split(",") if p.strip()}
+        return cls(
+            priorities=frozenset(p for p in LLMPriority if p.name in names),
+            max_temperature=float(LLM_CACHE_MAX_TEMPERATURE) if LLM_CACHE_MAX_TEMPERATURE else None,
+        )
+
+    def allows(self, priority: LLMPriority, extra_create_args: Dict[str, Any]) -> bool:
+        if priority not in self.priorities:
+            return False
+        if self.max_temperature is not None:
+            temperature = extra_create_args.get("temperature")
+            if temperature is None or float(temperature) > self.max_temperature:
+                return False
+        return True
+
+
+class DiskResponseStore:
+    """
+    Content-addressed хранилище ответов на диске: <dir>/<ab>/<key>.json.
+    При превышении max_bytes удаляет файлы, к которым дольше всего не обращались.
+    Методы блокирующие: из async-кода вызываются через asyncio.to_thread.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._size: Optional[int] = None
+        # запись и вытеснение из разных потоков не должны портить счётчик размера
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _files(self):
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if name.endswith(".json"):
+                    yield os.path.join(root, name)
+
+    def _total_size(self) -> int:
+        if self._size is None:
+            self._size = sum(os.path.getsize(p) for p in self._files())
+        return self._size
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            error(f"[LLM_CACHE] битая запись {key}: {e}")
+            return None
+
+        # время доступа для LRU-вытеснения
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return data
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        payload = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            # размер считается до записи, иначе первая запись учтётся дважды
+            total = self._total_size()
+            old_size = os.path.getsize(path) if os.path.exists(path) else 0
+
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(payload)
+            os.replace(tmp, path)
+
+            self._size = total - old_size + os.path.getsize(path)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        files = sorted(self._files(), key=lambda p: os.path.getmtime(p))
+        target = int(self.max_bytes * 0.9)
+        size = self._total_size()
+
+        for path in files:
+            if size <= target:
+                break
+            try:
+                file_size = os.path.getsize(path)
+                os.remove(path)
+                size -= file_size
+            except OSError:
+                continue
+
+        self._size = size
+        info(f"[LLM_CACHE] eviction: {size} bytes left")
+
+
+class CachingChatCompletionClient(ChatCompletionClient):
+    """
+    Кэш ответов модели. Ключ — sha256 от модели, полного списка сообщений
+    и параметров вызова, поэтому байт-в-байт одинаковые промпты
+    (ретрай пользователя, рестарт воркера) отдаются без запроса к API.
+    """
+
+    def __init__(
+        self,
+        client: ChatCompletionClient,
+        model: str,
+        store: DiskResponseStore,
+        mode: str = "readwrite",
+        rules: Optional[CacheRules] = None,
+    ):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown LLM cache mode '{mode}'")
+
+        self._client = client
+        self._model = model
+        self._store = store
+        self._mode = mode
+        self._rules = rules or CacheRules.from_env()
+
+    # =========================
+    # Keys
+    # =========================
+
+    @staticmethod
+    def _dump(obj: Any) -> Any:
+        if isinstance(obj, type) and hasattr(obj, "model_json_schema"):
+            return obj.model_json_schema()
+        if hasattr(obj, "model_dump"):
+            return obj.model_dump(mode="json")
+        if hasattr(obj, "schema") and not isinstance(obj, dict):
+            return obj.schema
+        return obj
+
+    def _cache_key(self, messages: Sequence[LLMMessage], kwargs: Dict[str, Any]) -> str:
+        data = {
+            "model": self._model,
+            "messages": [self._dump(m) for m in messages],
+            "tools": [self._dump(t) for t in kwargs.get("tools") or []],
+            "tool_choice": self._dump(kwargs.get("tool_choice", "auto")),
+            "json_output": self._dump(kwargs.get("json_output")),
+            "extra_create_args": dict(kwargs.get("extra_create_args") or {}),
+        }
+        serialized = json.dumps(data, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+    async def _lookup(self, messages: Sequence[LLMMessage], kwargs: Dict[str, Any]):
+        """(key, cached_result); key=None — вызов не кэшируется."""
+        if self._mode == "off":
+            return None, None
+
+        _, priority = current_llm_call()
+        if self._mode != "replay" and not self._rules.allows(
+            priority, dict(kwargs.get("extra_create_args") or {})
+        ):
+            return None, None
+
+        key = self._cache_key(messages, kwargs)
+        # диск — не в event loop: каждый вызов LLM проходит через кэш
+        data = await asyncio.to_thread(self._store.get, key)
+        if data is None:
+            if self._mode == "replay":
+                raise LLMReplayMiss(f"LLM replay: нет записи для ключа {key}")
+            return key, None
+
+        result = CreateResult.model_validate(data["result"])
+        result.cached = True
+        info(f"[LLM_CACHE] hit {key[:12]} ({priority.name})")
+        return key, result
+
+    async def _save(self, key: str, result: CreateResult) -> None:
+        try:
+            await asyncio.to_thread(
+                self._store.set,
+                key,
+                {
+                    "model": self._model,
+                    "created_at": time.time(),
+                    "result": result.model_dump(mode="json"),
+                },
+            )
+        except Exception as e:
+            error(f"[LLM_CACHE] не удалось сохранить {key}: {e}")
+
+    # =========================
+    # ChatCompletionClient
+    # =========================
+
+    async def create(self, messages: Sequence[LLMMessage], **kwargs: Any):
+        key, cached = await self._lookup(messages, kwargs)
+        if cached is not None:
+            return cached
+
+        result = await self._client.create(messages, **kwargs)
+        if key is not None:
+            await self._save(key, result)
+        return result
+
+    async def create_stream(self, messages: Sequence[LLMMessage], **kwargs: Any) -> AsyncGenerator[Any, None]:
+        key, cached = await self._lookup(messages, kwargs)
+        if cached is not None:
+            if isinstance(cached.content, str):
+                yield cached.content
+            yield cached
+            return
+
+        async for chunk in self._client.create_stream(messages, **kwargs):
+            if key is not None and isinstance(chunk, CreateResult):
+                await self._save(key, chunk)
+            yield chunk
+
+    async def close(self) -> None:
+        await self._client.close()
+
+    def actual_usage(self):
+        return self._client.actual_usage()
+
+    def total_usage(self):
+        return self._client.total_usage()
+
+    def count_tokens(self, messages: Sequence[LLMMessage], **kwargs: Any) -> int:
+        return self._client.count_tokens(messages, **kwargs)
+
+    def remaining_tokens(self, messages: Sequence[LLMMessage], **kwargs: Any) -> int:
+        return self._client.remaining_tokens(messages, **kwargs)
+
+    @property
+    def capabilities(self):  # type: ignore
+        return self._client.capabilities
+
+    @property
+    def model_info(self):
+        return self._client.model_info
+
+
+def with_response_cache(client: ChatCompletionClient, model: str) -> ChatCompletionClient:
+    """Оборачивает клиент кэшем согласно LLM_CACHE_MODE."""
+    if LLM_CACHE_MODE == "off":
+        return client
+
+    store = DiskResponseStore(LLM_CACHE_DIR, max_bytes=LLM_CACHE_MAX_MB * 1024 * 1024)
+    info(f"[LLM_CACHE] mode={LLM_CACHE_MODE}, dir={LLM_CACHE_DIR}")
+    return CachingChatCompletionClient(client, model=model, store=store, mode=LLM_CACHE_MODE)
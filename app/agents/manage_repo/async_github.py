@@ -0,0 +1,468 @@
+import asyncio
+import base64
+import os
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, BinaryIO, Dict, List, Mapping, Optional, Tuple
+
+import aiohttp
+from multidict import CIMultiDict
+from dotenv import load_dotenv
+
+from app.logger.console_logger import info, warning
+
+from .github_rate_limit import RateLimitGovernor, current_github_priority
+
+load_dotenv()
+
+# для локального стенда: GITHUB_API_URL=http://127.0.0.1:8765 (github_stub_server)
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com")
+GITHUB_MAX_CONNECTIONS = int(os.getenv("GITHUB_MAX_CONNECTIONS", "32"))
+GITHUB_KEEPALIVE_SEC = float(os.getenv("GITHUB_KEEPALIVE_SEC", "60"))
+GITHUB_TIMEOUT_SEC = float(os.getenv("GITHUB_TIMEOUT_SEC", "60"))
+GITHUB_MAX_RETRIES = int(os.getenv("GITHUB_MAX_RETRIES", "5"))
+# GET-ответы с ETag: повторный запрос идёт с If-None-Match,
+# 304 Not Modified не тратит rate limit
+GITHUB_ETAG_CACHE_SIZE = int(os.getenv("GITHUB_ETAG_CACHE_SIZE", "2048"))
+
+_LAST_PAGE = re.compile(r'[?&]page=(\d+)[^>]*>;\s*rel="last"')
+
+
+class GitHubAPIError(Exception):
+    def __init__(self, status: int, message: str, headers: Optional[Mapping[str, str]] = None):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+        self.message = message
+        self.headers = headers or {}
+
+
+@dataclass
+class GitHubResponse:
+    status: int
+    headers: Mapping[str, str]  # регистр имён не важен
+    data: Any
+
+
+def retry_after(status: int, headers: Mapping[str, str], message: str, attempt: int) -> float | None:
+    """Сколько ждать перед повтором или None, если ошибка не про лимиты."""
+    if status not in (403, 429):
+        return None
+
+    headers = {k.lower(): v for k, v in headers.items()}
+    message = message.lower()
+
+    if "retry-after" in headers:
+        try:
+            return float(headers["retry-after"])
+        except ValueError:
+            pass
+
+    if headers.get("x-ratelimit-remaining") == "0" and "x-ratelimit-reset" in headers:
+        try:
+            return max(1.0, float(headers["x-ratelimit-reset"]) - time.time())
+        except ValueError:
+            pass
+
+    if status == 429 or "secondary rate limit" in message or "abuse" in message:
+        # документация GitHub: при secondary limit ждать минимум минуту,
+        # но на первых попытках хватает короткого экспоненциального backoff
+        return min(60.0, 2.0 ** attempt)
+
+    return None
+
+
+class AsyncGitHub:
+    """
+    Асинхронный клиент GitHub REST API — только те эндпоинты, что нужны проекту
+    (repos, git data, pages, contents, actions).
+
+    Одна aiohttp-сессия на event loop: пул соединений с keep-alive,
+    поэтому TLS-хендшейк не повторяется на каждый запрос.
+    """
+
+    def __init__(
+        self,
+        token: str,
+        base_url: str = GITHUB_API_URL,
+        max_connections: int = GITHUB_MAX_CONNECTIONS,
+    ):
+        if not token:
+            raise ValueError("token is required")
+
+        self.token = token
+        self.base_url = base_url.rstrip("/")
+        self.max_connections = max_connections
+        self._sessions: Dict[asyncio.AbstractEventLoop, aiohttp.ClientSession] = {}
+        self._login: Optional[str] = None
+        self.governor = RateLimitGovernor()
+        self._etags: Dict[str, Tuple[str, GitHubResponse]] = {}
+        self.etag_hits = 0
+        self.etag_misses = 0
+
+    # =========================
+    # Session
+    # =========================
+
+    def _session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        session = self._sessions.get(loop)
+        if session is not None and not session.closed:
+            return session
+
+        # сессии закрытых loop'ов больше не нужны
+        for old_loop in [l for l in self._sessions if l.is_closed()]:
+            del self._sessions[old_loop]
+
+        connector = aiohttp.TCPConnector(
+            limit=self.max_connections,
+            keepalive_timeout=GITHUB_KEEPALIVE_SEC,
+            ttl_dns_cache=300,
+        )
+        session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=GITHUB_TIMEOUT_SEC),
+            headers={
+                "Authorization": f"Bearer {self.token}",
+                "Accept": "application/vnd.github+json",
+                "X-GitHub-Api-Version": "2022-11-28",
+                "User-Agent": "ai-team-async-github",
+            },
+        )
+        self._sessions[loop] = session
+        return session
+
+    async def close(self) -> None:
+        loop = asyncio.get_running_loop()
+        session = self._sessions.pop(loop, None)
+        if session is not None:
+            await session.close()
+
+    # =========================
+    # Requests
+    # =========================
+
+    def _url(self, path: str) -> str:
+        return path if path.startswith("http") else f"{self.base_url}{path}"
+
+    @staticmethod
+    def _etag_key(url: str, params: Optional[Dict[str, Any]]) -> str:
+        query = "&".join(f"{k}={v}" for k, v in sorted((params or {}).items()))
+        return f"{url}?{query}"
+
+    def _remember_etag(self, key: str, resp: GitHubResponse) -> None:
+        etag = resp.headers.get("ETag")
+        if not etag or isinstance(resp.data, bytes):
+            return
+        self._etags.pop(key, None)
+        self._etags[key] = (etag, resp)
+        while len(self._etags) > GITHUB_ETAG_CACHE_SIZE:
+            self._etags.pop(next(iter(self._etags)))
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        *,
+        json: Any = None,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> GitHubResponse:
+        priority = current_github_priority()
+        url = self._url(path)
+
+        etag_key = self._etag_key(url, params) if method == "GET" else None
+        cached = self._etags.get(etag_key) if etag_key else None
+        if cached:
+            headers = {**(headers or {}), "If-None-Match": cached[0]}
+
+        attempt = 0
+        while True:
+            await self.governor.acquire(priority)
+            try:
+                async with self._session().request(
+                    method, url, json=json, params=params, headers=headers
+                ) as resp:
+                    resp_headers = CIMultiDict(resp.headers)
+                    self.governor.observe(resp.status, resp_headers)
+
+                    if resp.status == 304 and cached:
+                        self.etag_hits += 1
+                        self._etags[etag_key] = self._etags.pop(etag_key, cached)  # type: ignore
+                        return cached[1]
+
+                    if resp.status < 400:
+                        result = GitHubResponse(resp.status, resp_headers, await self._read(resp))
+                        if etag_key:
+                            self.etag_misses += 1
+                            self._remember_etag(etag_key, result)
+                        return result
+
+                    message = await resp.text()
+            finally:
+                self.governor.release()
+
+            delay = retry_after(resp.status, resp_headers, message, attempt)
+            if delay is None or attempt >= GITHUB_MAX_RETRIES:
+                raise GitHubAPIError(resp.status, message, resp_headers)
+
+            attempt += 1
+            warning(f"[GITHUB] rate limit ({resp.status}), повтор {attempt} через {delay:.1f}s")
+            # паузу выдерживает governor — для всех запросов этого токена
+            self.governor.throttle(delay, priority)
+
+    @staticmethod
+    async def _read(resp: aiohttp.ClientResponse) -> Any:
+        if resp.status in (204, 304):
+            return None
+        if "json" in resp.headers.get("Content-Type", ""):
+            return await resp.json()
+        return await resp.read()
+
+    async def _json(self, method: str, path: str, **kwargs: Any) -> Any:
+        return (await self.request(method, path, **kwargs)).data
+
+    async def download(self, path: str, out: BinaryIO, chunk_size: int = 64 * 1024) -> int:
+        """
+        GET с записью тела в out по частям — ответ целиком в памяти не держим
+        (логи Actions). Redirect на хранилище aiohttp проходит сам.
+        Возвращает размер в байтах; out перематывается в начало.
+        """
+        priority = current_github_priority()
+        await self.governor.acquire(priority)
+        try:
+            # общий timeout сессии для больших логов мал — ограничиваем только чтение
+            timeout = aiohttp.ClientTimeout(total=None, sock_connect=GITHUB_TIMEOUT_SEC, sock_read=GITHUB_TIMEOUT_SEC)
+            async with self._session().get(self._url(path), timeout=timeout) as resp:
+                resp_headers = CIMultiDict(resp.headers)
+                self.governor.observe(resp.status, resp_headers)
+                if resp.status >= 400:
+                    raise GitHubAPIError(resp.status, await resp.text(), resp_headers)
+
+                size = 0
+                async for chunk in resp.content.iter_chunked(chunk_size):
+                    out.write(chunk)
+                    size += len(chunk)
+        finally:
+            self.governor.release()
+
+        out.seek(0)
+        return size
+
+    # =========================
+    # Users / repos
+    # =========================
+
+    async def login(self) -> str:
+        if self._login is None:
+            user = await self._json("GET", "/user")
+            self._login = user["login"]
+            info(f"GitHub auth OK. Login:{self._login}")
+        return self._login
+
+    async def get_repo(self, owner: str, repo: str) -> Dict[str, Any]:
+        return await self._json("GET", f"/repos/{owner}/{repo}")
+
+    async def create_repo(self, name: str, private: bool = False, auto_init: bool = True) -> Dict[str, Any]:
+        return await self._json(
+            "POST", "/user/repos", json={"name": name, "private": private, "auto_init": auto_init}
+        )
+
+    async def delete_repo(self, owner: str, repo: str) -> None:
+        await self.request("DELETE", f"/repos/{owner}/{repo}")
+
+    async def rename_repo(self, owner: str, repo: str, new_name: str) -> Dict[str, Any]:
+        return await self._json("PATCH", f"/repos/{owner}/{repo}", json={"name": new_name})
+
+    async def list_user_repos(self) -> List[Dict[str, Any]]:
+        """Все репозитории владельца токена (постранично по 100)."""
+        repos: List[Dict[str, Any]] = []
+        page = 1
+        while True:
+            batch = await self._json(
+                "GET", "/user/repos", params={"affiliation": "owner", "per_page": 100, "page": page}
+            )
+            repos.extend(batch or [])
+            if not batch or len(batch) < 100:
+                return repos
+            page += 1
+
+    async def count_commits(self, owner: str, repo: str) -> int:
+        """Число коммитов по Link-заголовку одной страницы с per_page=1."""
+        try:
+            resp = await self.request("GET", f"/repos/{owner}/{repo}/commits", params={"per_page": 1})
+        except GitHubAPIError as e:
+            if e.status == 409:  # пустой репозиторий
+                return 0
+            raise
+
+        match = _LAST_PAGE.search(resp.headers.get("Link", ""))
+        if match:
+            return int(match.group(1))
+        return len(resp.data or [])
+
+    # =========================
+    # Git data
+    # =========================
+
+    async def get_ref(self, owner: str, repo: str, ref: str) -> Dict[str, Any]:
+        return await self._json("GET", f"/repos/{owner}/{repo}/git/ref/{ref}")
+
+    async def update_ref(self, owner: str, repo: str, ref: str, sha: str, force: bool = False) -> Dict[str, Any]:
+        return await self._json(
+            "PATCH", f"/repos/{owner}/{repo}/git/refs/{ref}", json={"sha": sha, "force": force}
+        )
+
+    async def create_ref(self, owner: str, repo: str, ref: str, sha: str) -> Dict[str, Any]:
+        """ref — полный: refs/heads/<branch>."""
+        return await self._json("POST", f"/repos/{owner}/{repo}/git/refs", json={"ref": ref, "sha": sha})
+
+    async def delete_ref(self, owner: str, repo: str, ref: str) -> None:
+        await self._json("DELETE", f"/repos/{owner}/{repo}/git/refs/{ref}")
+
+    async def get_commit(self, owner: str, repo: str, sha: str) -> Dict[str, Any]:
+        return await self._json("GET", f"/repos/{owner}/{repo}/git/commits/{sha}")
+
+    async def create_commit(
+        self, owner: str, repo: str, message: str, tree: str, parents: List[str]
+    ) -> Dict[str, Any]:
+        return await self._json(
+            "POST",
+            f"/repos/{owner}/{repo}/git/commits",
+            json={"message": message, "tree": tree, "parents": parents},
+        )
+
+    async def get_tree(self, owner: str, repo: str, sha: str, recursive: bool = False) -> Dict[str, Any]:
+        params = {"recursive": "1"} if recursive else None
+        return await self._json("GET", f"/repos/{owner}/{repo}/git/trees/{sha}", params=params)
+
+    async def create_tree(
+        self, owner: str, repo: str, tree: List[Dict[str, Any]], base_tree: Optional[str] = None
+    ) -> Dict[str, Any]:
+        payload: Dict[str, Any] = {"tree": tree}
+        if base_tree:
+            payload["base_tree"] = base_tree
+        return await self._json("POST", f"/repos/{owner}/{repo}/git/trees", json=payload)
+
+    async def create_blob(self, owner: str, repo: str, content: str) -> Dict[str, Any]:
+        return await self._json(
+            "POST", f"/repos/{owner}/{repo}/git/blobs", json={"content": content, "encoding": "utf-8"}
+        )
+
+    # =========================
+    # Pages
+    # =========================
+
+    async def create_pages(self, owner: str, repo: str, build_type: str = "workflow") -> None:
+        await self.request("POST", f"/repos/{owner}/{repo}/pages", json={"build_type": build_type})
+
+    async def update_pages(self, owner: str, repo: str, build_type: str = "workflow") -> None:
+        await self.request("PUT", f"/repos/{owner}/{repo}/pages", json={"build_type": build_type})
+
+    # =========================
+    # Webhooks
+    # =========================
+
+    async def list_hooks(self, owner: str, repo: str) -> List[Dict[str, Any]]:
+        return await self._json("GET", f"/repos/{owner}/{repo}/hooks", params={"per_page": 100}) or []
+
+    @staticmethod
+    def _hook_payload(url: str, secret: str, events: List[str]) -> Dict[str, Any]:
+        return {
+            "name": "web",
+            "active": True,
+            "events": events,
+            "config": {"url": url, "content_type": "json", "secret": secret, "insecure_ssl": "0"},
+        }
+
+    async def create_hook(self, owner: str, repo: str, url: str, secret: str, events: List[str]) -> Dict[str, Any]:
+        return await self._json("POST", f"/repos/{owner}/{repo}/hooks", json=self._hook_payload(url, secret, events))
+
+    async def update_hook(
+        self, owner: str, repo: str, hook_id: int, url: str, secret: str, events: List[str]
+    ) -> Dict[str, Any]:
+        payload = self._hook_payload(url, secret, events)
+        del payload["name"]
+        return await self._json("PATCH", f"/repos/{owner}/{repo}/hooks/{hook_id}", json=payload)
+
+    # =========================
+    # Contents
+    # =========================
+
+    async def get_contents(self, owner: str, repo: str, path: str) -> Dict[str, Any]:
+        return await self._json("GET", f"/repos/{owner}/{repo}/contents/{path}")
+
+    async def put_contents(
+        self,
+        owner: str,
+        repo: str,
+        path: str,
+        message: str,
+        content: str,
+        sha: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        payload: Dict[str, Any] = {
+            "message": message,
+            "content": base64.b64encode(content.encode("utf-8")).decode("ascii"),
+        }
+        if sha:
+            payload["sha"] = sha
+        return await self._json("PUT", f"/repos/{owner}/{repo}/contents/{path}", json=payload)
+
+    # =========================
+    # Actions
+    # =========================
+
+    async def list_workflow_runs(self, owner: str, repo: str, **params: Any) -> Dict[str, Any]:
+        return await self._json("GET", f"/repos/{owner}/{repo}/actions/runs", params=params)
+
+    async def get_workflow_run(self, owner: str, repo: str, run_id: int) -> Dict[str, Any]:
+        return await self._json("GET", f"/repos/{owner}/{repo}/actions/runs/{run_id}")
+
+    async def list_run_jobs(self, owner: str, repo: str, run_id: int) -> List[Dict[str, Any]]:
+        """Jobs последней попытки run'а со статусами шагов."""
+        data = await self._json(
+            "GET",
+            f"/repos/{owner}/{repo}/actions/runs/{run_id}/jobs",
+            params={"filter": "latest", "per_page": 100},
+        )
+        return data.get("jobs") or []
+
+    async def download_job_logs(self, owner: str, repo: str, job_id: int, out: BinaryIO) -> int:
+        """Текстовый лог одного job'а."""
+        return await self.download(f"/repos/{owner}/{repo}/actions/jobs/{job_id}/logs", out)
+
+    async def download_run_logs(self, owner: str, repo: str, run_id: int, out: BinaryIO) -> int:
+        """zip-архив логов всего run'а."""
+        return await self.download(f"/repos/{owner}/{repo}/actions/runs/{run_id}/logs", out)
+
+
+_clients: Dict[str, AsyncGitHub] = {}
+
+
+def get_github(token: str) -> AsyncGitHub:
+    """Один клиент (и один пул соединений) на токен на весь процесс."""
+    client = _clients.get(token)
+    if client is None:
+        client = _clients[token] = AsyncGitHub(token)
+    return client
+
+
+def github_stats() -> Dict[str, Any]:
+    """Бюджет и очереди по каждому токену (токен в ключе замаскирован)."""
+    return {
+        client._login or f"token-...{client.token[-4:]}": {
+            **client.governor.stats(),
+            "etag": {
+                "entries": len(client._etags),
+                "hits_304": client.etag_hits,
+                "misses": client.etag_misses,
+            },
+        }
+        for client in _clients.values()
+    }
+
+
+async def close_github_clients() -> None:
+    for client in _clients.values():
+        await client.close()
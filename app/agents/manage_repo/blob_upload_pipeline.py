@@ -0,0 +1,76 @@
+import asyncio
+from typing import Any, Dict
+
+from app.logger.console_logger import error, info
+
+from .async_github import GitHubAPIError
+from .git_mirror import GIT_TRANSPORT
+from .github_rate_limit import GitHubPriority, github_priority
+from .git_objects import blob_sha
+from .repo_manager import BLOB_UPLOAD_CONCURRENCY, INLINE_BLOB_MAX_BYTES, RepoManager
+
+
+class BlobUploadPipeline:
+    """
+    Загружает git-блобы в фоне, пока агент ещё генерирует ответ.
+
+    - submit(op) вызывается на каждую операцию из стрима;
+    - маленькие файлы не грузятся: они уйдут inline в create_git_tree;
+    - одинаковое содержимое загружается один раз (ключ — локальный SHA блоба);
+    - result() ждёт загрузки и отдаёт {path: sha} для push_commit,
+      которому остаётся создать только tree, commit и обновить ref.
+    """
+
+    def __init__(self, manager: RepoManager, concurrency: int = BLOB_UPLOAD_CONCURRENCY):
+        self.manager = manager
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+        self._uploads: Dict[str, asyncio.Task] = {}
+        self._paths: Dict[str, str] = {}
+
+    def submit(self, op: Dict[str, Any]) -> None:
+        if op.get("op") not in ("create", "update") or not self.manager.repo_obj:
+            return
+        if GIT_TRANSPORT == "mirror":
+            # блобы уйдут в pack через git push
+            return
+
+        content = op.get("content", "")
+        if len(content.encode("utf-8")) <= INLINE_BLOB_MAX_BYTES:
+            # маленькие файлы push_commit отправит inline в дереве
+            return
+
+        sha = blob_sha(content)
+        self._paths[op["path"]] = sha
+
+        if sha not in self._uploads:
+            self._uploads[sha] = asyncio.create_task(self._upload(sha, content))
+
+    async def _upload(self, sha: str, content: str) -> bool:
+        async with self._semaphore:
+            try:
+                with github_priority(GitHubPriority.PUSH):
+                    uploaded = await self.manager.create_blob(content)
+            except GitHubAPIError as e:
+                error(f"[BLOB_PIPELINE] blob {sha[:12]} не загружен: {e}")
+                return False
+
+        if uploaded != sha:
+            error(f"[BLOB_PIPELINE] sha не совпал: {uploaded} != {sha}")
+            return False
+        return True
+
+    async def result(self) -> Dict[str, str]:
+        """{path: sha} только для успешно загруженных блобов."""
+        if not self._uploads:
+            return {}
+
+        shas = list(self._uploads)
+        done = await asyncio.gather(*(self._uploads[sha] for sha in shas), return_exceptions=True)
+        uploaded = {sha for sha, ok in zip(shas, done) if ok is True}
+
+        info(f"[BLOB_PIPELINE] загружено {len(uploaded)}/{len(shas)} блобов заранее")
+        return {path: sha for path, sha in self._paths.items() if sha in uploaded}
+
+    def cancel(self) -> None:
+        for task in self._uploads.values():
+            task.cancel()
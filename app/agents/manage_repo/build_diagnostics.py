@@ -0,0 +1,185 @@
+"""
+Разбор логов сборки в диагностики (file, line, code, message).
+
+Один проход по строкам и один объединённый regex на строку:
+TypeScript (tsc), Vite/Rollup/esbuild, ESLint (stylish), npm,
+Python traceback и pytest. Форматы, где место ошибки на соседней строке
+(esbuild, ESLint, traceback), собираются с небольшим состоянием.
+"""
+import re
+from dataclasses import dataclass, replace
+from typing import Collection, Iterable, List, Optional, Tuple
+
+# префикс времени в логах GitHub Actions и ANSI-цвета
+_TIMESTAMP = re.compile(r"^\d{4}-\d\d-\d\dT[\d:.]+Z ?")
+_ANSI = re.compile(r"\x1b\[[0-9;]*m")
+# рабочая директория раннера: /home/runner/work/<repo>/<repo>/
+_WORKSPACE = re.compile(r"^(?:/home/runner/work/[^/]+/[^/]+/|/github/workspace/|\./)")
+
+_PATTERNS = [
+    # src/App.tsx(3,5): error TS2304: Cannot find name 'foo'.
+    ("ts", r"(?P<ts_file>[\w./@-]+\.[cm]?[jt]sx?)\((?P<ts_line>\d+),\d+\): error (?P<ts_code>TS\d+): (?P<ts_msg>.+)"),
+    # src/App.tsx:3:5 - error TS2304: Cannot find name 'foo'.
+    ("tsp", r"(?P<tsp_file>[\w./@-]+\.[cm]?[jt]sx?):(?P<tsp_line>\d+):\d+ - error (?P<tsp_code>TS\d+): (?P<tsp_msg>.+)"),
+    # [vite]: Rollup failed to resolve import "x" from "src/main.tsx".
+    ("vite", r"\[(?P<vite_code>vite(?::[\w-]+)?)\]:? (?P<vite_msg>.+?)(?: from \"(?P<vite_file>[^\"]+)\")?\.?"),
+    # ✘ [ERROR] Could not resolve "x"  (место — на следующих строках)
+    ("esb", r"(?:✘ )?\[ERROR\] (?P<esb_msg>.+)"),
+    # file: /home/runner/work/r/r/src/App.tsx:12:3  (vite, после "error during build")
+    ("loc", r"(?:file: )?(?P<loc_file>[\w./@-]+\.\w+):(?P<loc_line>\d+):\d+:?"),
+    # /home/runner/work/r/r/src/App.tsx  (заголовок файла ESLint)
+    ("eslf", r"(?P<eslf_file>/\S+\.(?:[cm]?[jt]sx?|vue))"),
+    #   12:5  error  'x' is defined but never used  no-unused-vars
+    ("esl", r"(?P<esl_line>\d+):\d+\s+error\s+(?P<esl_msg>.+?)\s{2,}(?P<esl_code>[\w@/-]+)"),
+    # npm ERR! code ERESOLVE / npm error Missing script: "build"
+    ("npm", r"npm (?:ERR!|error) (?:code (?P<npm_code>E[A-Z]+)|(?P<npm_msg>.+))"),
+    #   File "app/main.py", line 12, in <module>
+    ("pyf", r"File \"(?P<pyf_file>[^\"]+)\", line (?P<pyf_line>\d+)(?:, in .+)?"),
+    # ModuleNotFoundError: No module named 'x'
+    ("pyexc", r"(?P<pyexc_code>[A-Z]\w*(?:Error|Exception))(?:: (?P<pyexc_msg>.*))?"),
+    # FAILED tests/test_x.py::test_y - AssertionError: boom
+    ("pt", r"(?:FAILED|ERROR) (?P<pt_file>[\w./-]+\.py)(?:::(?P<pt_test>\S+))?(?: - (?P<pt_msg>.+))?"),
+    # tests/test_x.py:12: AssertionError
+    ("ptl", r"(?P<ptl_file>[\w./-]+\.py):(?P<ptl_line>\d+): (?P<ptl_code>\w+(?:Error|Exception)\w*)"),
+]
+
+_SCANNER = re.compile(
+    "|".join(f"(?P<{name}>{pattern})" for name, pattern in _PATTERNS)
+)
+
+# npm-строки, которые только повторяют, что упала команда
+_NPM_NOISE = re.compile(
+    r"(A complete log|This is probably not|Lifecycle script|command failed|errno|path |"
+    r"syscall|workspace |location |Failed at the|code ELIFECYCLE|^\s*$|^\s*at |in workspace)",
+    re.IGNORECASE,
+)
+
+# pages.yml собирает проект после `cd frontend`: tsc/esbuild/npm печатают пути от неё
+BUILD_DIRS = ("frontend/",)
+
+# сколько строк после сообщения vite/esbuild ждём строку с местом ошибки
+_ESBUILD_CONTEXT_LINES = 4
+
+
+@dataclass(frozen=True)
+class Diagnostic:
+    file: str
+    line: Optional[int]
+    code: str
+    message: str
+
+    def format(self) -> str:
+        where = f"{self.file}:{self.line}" if self.line else (self.file or "-")
+        return f"{where} {self.code}: {self.message}" if self.message else f"{where} {self.code}"
+
+
+def _clean(line: str) -> str:
+    return _ANSI.sub("", _TIMESTAMP.sub("", line)).strip()
+
+
+def _path(path: str) -> str:
+    return _WORKSPACE.sub("", path.strip())
+
+
+def extract_diagnostics(
+    files: Iterable[Tuple[str, str]],
+    max_items: int = 50,
+) -> List[Diagnostic]:
+    """Уникальные диагностики в порядке появления; files — [(имя, текст лога)]."""
+    seen: set = set()
+    out: List[Diagnostic] = []
+
+    def add(file: str, line: Optional[str], code: str, message: str) -> None:
+        diag = Diagnostic(_path(file or ""), int(line) if line else None, code, message.strip())
+        if diag not in seen:
+            seen.add(diag)
+            out.append(diag)
+
+    for _, text in files:
+        eslint_file: Optional[str] = None
+        pending: Optional[Tuple[str, str]] = None  # (code, message) ждёт строку с местом
+        pending_ttl = 0
+        py_frame: Optional[Tuple[str, str]] = None
+        npm_code: Optional[str] = None
+
+        for raw in text.splitlines():
+            if len(out) >= max_items:
+                return out
+
+            line = _clean(raw)
+            m = _SCANNER.fullmatch(line)
+            if m is None:
+                pending_ttl -= 1
+                if pending_ttl <= 0:
+                    pending = None
+                continue
+
+            kind = m.lastgroup
+            g = m.group
+
+            if kind == "ts":
+                add(g("ts_file"), g("ts_line"), g("ts_code"), g("ts_msg"))
+            elif kind == "tsp":
+                add(g("tsp_file"), g("tsp_line"), g("tsp_code"), g("tsp_msg"))
+            elif kind == "vite":
+                if g("vite_file"):
+                    add(g("vite_file"), None, g("vite_code"), g("vite_msg"))
+                else:
+                    pending, pending_ttl = (g("vite_code"), g("vite_msg")), _ESBUILD_CONTEXT_LINES
+            elif kind == "esb":
+                pending, pending_ttl = ("esbuild", g("esb_msg")), _ESBUILD_CONTEXT_LINES
+            elif kind == "loc":
+                if pending:
+                    add(g("loc_file"), g("loc_line"), *pending)
+                    pending = None
+            elif kind == "eslf":
+                eslint_file = g("eslf_file")
+            elif kind == "esl":
+                if eslint_file:
+                    add(eslint_file, g("esl_line"), g("esl_code"), g("esl_msg"))
+            elif kind == "npm":
+                if g("npm_code"):
+                    npm_code = g("npm_code")
+                elif npm_code and not _NPM_NOISE.search(g("npm_msg")):
+                    add("package.json", None, npm_code, g("npm_msg"))
+                    npm_code = None
+                elif g("npm_msg").startswith("Missing script"):
+                    add("package.json", None, "npm", g("npm_msg"))
+            elif kind == "pyf":
+                py_frame = (g("pyf_file"), g("pyf_line"))
+            elif kind == "pyexc":
+                if py_frame:
+                    add(py_frame[0], py_frame[1], g("pyexc_code"), g("pyexc_msg") or "")
+                    py_frame = None
+            elif kind == "pt":
+                msg = g("pt_msg") or f"{g('pt_test') or 'collection'} failed"
+                code, _, rest = msg.partition(": ")
+                if rest and re.fullmatch(r"\w+(?:Error|Exception)\w*", code):
+                    add(g("pt_file"), None, code, rest)
+                else:
+                    add(g("pt_file"), None, "pytest", msg)
+            elif kind == "ptl":
+                add(g("ptl_file"), g("ptl_line"), g("ptl_code"), "")
+
+    return out
+
+
+def resolve_paths(
+    diagnostics: Iterable[Diagnostic],
+    file_paths: Collection[str],
+    build_dirs: Iterable[str] = BUILD_DIRS,
+) -> List[Diagnostic]:
+    """Пути из лога -> пути файлов проекта: как есть, затем от директорий сборки."""
+    build_dirs = tuple(build_dirs)
+    out = []
+    for d in diagnostics:
+        if d.file and d.file not in file_paths:
+            found = next((prefix + d.file for prefix in build_dirs if prefix + d.file in file_paths), None)
+            if found:
+                d = replace(d, file=found)
+        out.append(d)
+    return out
+
+
+def format_diagnostics(diagnostics: Iterable[Diagnostic]) -> str:
+    return "\n".join(d.format() for d in diagnostics)
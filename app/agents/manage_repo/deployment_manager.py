@@ -1,58 +1,74 @@
 from logging import error, info
-from github import GithubException
+import base64
 import os
 
+from .async_github import AsyncGitHub, GitHubAPIError
+from .github_webhooks import GH_WEBHOOK_SECRET, GH_WEBHOOK_URL, WEBHOOK_EVENTS
+
+
+WORKFLOW_PATH = ".github/workflows/pages.yml"
+
 
 class DeploymentManager:
-    def __init__(self, repo_obj, gh, user):
-        self.repo_obj = repo_obj
-        self.gh = gh
-        self.user = user
+    def __init__(self, github: AsyncGitHub, owner: str, repo: str):
+        self.github = github
+        self.owner = owner
+        self.repo = repo
 
-    def enable_pages(self):
+    async def enable_pages(self):
         """
         Включает GitHub Pages для репозитория в режиме workflow.
         """
-        requester = self.gh._Github__requester
-        owner = self.user.login
-        repo = self.repo_obj.name
-
         try:
-            requester.requestJsonAndCheck(
-                "POST",
-                f"/repos/{owner}/{repo}/pages",
-                input={"build_type": "workflow"},
-            )
+            await self.github.create_pages(self.owner, self.repo, build_type="workflow")
             info("GitHub Pages enabled")
-        except GithubException as e:
+        except GitHubAPIError as e:
             error(f"Ошибка включения Pages: {e}")
 
-    def update_pages(self):
-        requester = self.gh._Github__requester
-        owner = self.user.login
-        repo = self.repo_obj.name
-
+    async def update_pages(self):
         try:
-            requester.requestJsonAndCheck(
-                "PUT",
-                f"/repos/{owner}/{repo}/pages",
-                input={"build_type": "workflow"},
-            )
+            await self.github.update_pages(self.owner, self.repo, build_type="workflow")
             info("GitHub Pages updated")
-        except GithubException as e:
+        except GitHubAPIError as e:
             error(f"Ошибка обновления Pages: {e}")
 
-    def push_actions_workflow(self):
-        workflow_path_repo = ".github/workflows/pages.yml"
+    async def register_webhook(self) -> bool:
+        """
+        Вебхук workflow_run/check_suite на GH_WEBHOOK_URL с секретом GH_WEBHOOK_SECRET.
+        Уже существующий вебхук на этот адрес перезаписывается: секрет GitHub не отдаёт.
+        True — вебхук в репозитории есть.
+        """
+        if not GH_WEBHOOK_SECRET or not GH_WEBHOOK_URL:
+            return False
+
+        events = list(WEBHOOK_EVENTS)
+        try:
+            hooks = await self.github.list_hooks(self.owner, self.repo)
+            existing = next((h for h in hooks if (h.get("config") or {}).get("url") == GH_WEBHOOK_URL), None)
+            if existing:
+                await self.github.update_hook(
+                    self.owner, self.repo, int(existing["id"]), GH_WEBHOOK_URL, GH_WEBHOOK_SECRET, events
+                )
+            else:
+                await self.github.create_hook(self.owner, self.repo, GH_WEBHOOK_URL, GH_WEBHOOK_SECRET, events)
+            info("Webhook registered")
+            return True
+        except GitHubAPIError as e:
+            error(f"Ошибка регистрации вебхука: {e}")
+            return False
+
+    async def push_actions_workflow(self):
+        workflow_path_repo = WORKFLOW_PATH
         workflow_path_local = os.path.join(
             os.path.dirname(__file__), "workflows", "pages.yml"
         )
 
         # Проверяем наличие workflow
         try:
-            self.repo_obj.get_contents(workflow_path_repo)
+            await self.github.get_contents(self.owner, self.repo, workflow_path_repo)
             info("Workflow already exists — skipped.")
-        except GithubException as e:
+            return
+        except GitHubAPIError as e:
             if e.status != 404:
                 error(f"Ошибка проверки workflow: {e}")
 
@@ -65,17 +81,31 @@ class DeploymentManager:
 
         # Создаём файл в GitHub
         try:
-            self.repo_obj.create_file(
+            await self.github.put_contents(
+                self.owner,
+                self.repo,
                 workflow_path_repo,
                 "Add GitHub Pages workflow",
                 workflow_content,
             )
             info("Workflow created successfully.")
-        except GithubException as e:
+        except GitHubAPIError as e:
             error(f"Ошибка создания workflow: {e}")
 
-    def update_actions_workflow(self):
-        workflow_path_repo = ".github/workflows/pages.yml"
+    async def builds_fix_branches(self) -> bool:
+        """Workflow в main запускается на push в fix/** (ветки кандидатов исправлений)."""
+        try:
+            data = await self.github.get_contents(self.owner, self.repo, WORKFLOW_PATH)
+        except GitHubAPIError as e:
+            if e.status != 404:
+                error(f"Ошибка чтения workflow: {e}")
+            return False
+
+        content = base64.b64decode(data.get("content") or "").decode("utf-8", errors="replace")
+        return "fix/**" in content
+
+    async def update_actions_workflow(self):
+        workflow_path_repo = WORKFLOW_PATH
         workflow_path_local = os.path.join(
             os.path.dirname(__file__), "workflows", "pages.yml"
         )
@@ -89,18 +119,20 @@ class DeploymentManager:
 
         # Обновляем файл
         try:
-            existing = self.repo_obj.get_contents(workflow_path_repo)
-            self.repo_obj.update_file(
+            existing = await self.github.get_contents(self.owner, self.repo, workflow_path_repo)
+            await self.github.put_contents(
+                self.owner,
+                self.repo,
                 workflow_path_repo,
                 "Update GitHub Pages workflow",
                 workflow_content,
-                sha=existing.sha,
+                sha=existing["sha"],
             )
             info("Workflow updated successfully.")
-        except GithubException as e:
+        except GitHubAPIError as e:
             error(f"Ошибка обновления workflow: {e}")
 
-    def add_render_yaml(self):
+    async def add_render_yaml(self):
         """
         Добавляет или обновляет backend/render.yaml для деплоя на Render.
         """
@@ -116,17 +148,21 @@ class DeploymentManager:
         """
 
         try:
-            file_content = self.repo_obj.get_contents(path)
-            self.repo_obj.update_file(
+            file_content = await self.github.get_contents(self.owner, self.repo, path)
+            await self.github.put_contents(
+                self.owner,
+                self.repo,
                 path,
                 "Update Render deploy config",
                 yaml_content,
-                sha=file_content.sha,
+                sha=file_content["sha"],
             )
             return f"{path} обновлён."
-        except GithubException as e:
+        except GitHubAPIError as e:
             if e.status == 404:
-                self.repo_obj.create_file(
+                await self.github.put_contents(
+                    self.owner,
+                    self.repo,
                     path,
                     "Add Render deploy config",
                     yaml_content,
@@ -0,0 +1,112 @@
+"""
+База известных исправлений ошибок сборки.
+
+Диагностики нормализуются в отпечаток (fingerprint): без номеров строк,
+чисел, хэшей и директорий конкретного проекта. Когда сборка становится
+зелёной, diff, который её починил, сохраняется под отпечатком ошибки —
+при той же ошибке в любом проекте он попадает в первый fix-промпт.
+
+Тот же отпечаток даёт fix-циклу критерий остановки: ошибка повторилась
+и диагностик не стало меньше — следующие раунды ничего не изменят.
+"""
+import asyncio
+import difflib
+import hashlib
+import os
+import posixpath
+import re
+import uuid
+from typing import Dict, Iterable, List, Optional
+
+from dotenv import load_dotenv
+
+from app.db import builds as builds_db
+from app.logger.console_logger import info, warning
+
+from .build_diagnostics import Diagnostic
+
+load_dotenv()
+
+FIX_KB_ENABLED = os.getenv("FIX_KB_ENABLED", "true").lower() == "true"
+# сколько известных исправлений показывать агенту
+FIX_KB_HINTS = int(os.getenv("FIX_KB_HINTS", "2"))
+FIX_KB_MAX_DIFF_CHARS = int(os.getenv("FIX_KB_MAX_DIFF_CHARS", "6000"))
+
+# ./components/Header, /home/runner/work/x/x/src/a.ts -> Header, a.ts
+_PATH = re.compile(r"(?:[\w.@~-]*/)+([\w.@-]+)")
+_HEX = re.compile(r"\b[0-9a-f]{7,64}\b")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)*\b")
+
+
+def normalize(diagnostic: Diagnostic) -> str:
+    message = _PATH.sub(r"\1", diagnostic.message)
+    message = _NUMBER.sub("<n>", _HEX.sub("<hash>", message))
+    return f"{posixpath.basename(diagnostic.file) or '-'} {diagnostic.code}: {message}".strip()
+
+
+def fingerprint(diagnostics: Iterable[Diagnostic]) -> Optional[str]:
+    """Отпечаток набора ошибок; None — диагностик нет (формат лога не распознан)."""
+    lines = sorted({normalize(d) for d in diagnostics})
+    if not lines:
+        return None
+    return hashlib.sha256("\n".join(lines).encode("utf-8")).hexdigest()[:24]
+
+
+def fix_diff(before: Dict[str, str], after: Dict[str, str], max_chars: int = FIX_KB_MAX_DIFF_CHARS) -> str:
+    """unified diff изменённых файлов; обрезается до max_chars."""
+    chunks: List[str] = []
+    for path in sorted(set(before) | set(after)):
+        old, new = before.get(path), after.get(path)
+        if old == new:
+            continue
+        chunks.extend(
+            difflib.unified_diff(
+                (old or "").splitlines(keepends=True),
+                (new or "").splitlines(keepends=True),
+                fromfile=f"a/{path}" if old is not None else "/dev/null",
+                tofile=f"b/{path}" if new is not None else "/dev/null",
+                n=2,
+            )
+        )
+        if sum(map(len, chunks)) > max_chars:
+            break
+
+    text = "".join(chunks)
+    return text if len(text) <= max_chars else text[:max_chars] + "\n... (diff truncated)\n"
+
+
+async def known_fixes(fp: Optional[str], limit: int = FIX_KB_HINTS) -> List[str]:
+    """Diff'ы, которые уже исправляли ошибку с этим отпечатком."""
+    if not FIX_KB_ENABLED or not fp or limit <= 0:
+        return []
+    try:
+        rows = await asyncio.to_thread(builds_db.get_build_fixes, fp, limit)
+    except Exception as e:
+        warning(f"[FIX_KB] не удалось прочитать исправления {fp}: {e}")
+        return []
+
+    if rows:
+        info(f"[FIX_KB] {fp}: известных исправлений {len(rows)}")
+    return [row["fix_diff"] for row in rows if row["fix_diff"]]
+
+
+async def remember_fix(
+    fp: str,
+    project_id: uuid.UUID,
+    diagnostics: Iterable[Diagnostic],
+    before: Dict[str, str],
+    after: Dict[str, str],
+) -> None:
+    if not FIX_KB_ENABLED:
+        return
+
+    diff = fix_diff(before, after)
+    if not diff:
+        return
+
+    summary = "\n".join(sorted({normalize(d) for d in diagnostics}))
+    try:
+        await asyncio.to_thread(builds_db.add_build_fix, fp, project_id, summary, diff)
+        info(f"[FIX_KB] {fp}: сохранено исправление ({len(diff)} символов)")
+    except Exception as e:
+        warning(f"[FIX_KB] не удалось сохранить исправление {fp}: {e}")
@@ -0,0 +1,174 @@
+import base64
+import os
+import subprocess
+import time
+from typing import Any, Dict, List
+
+from dotenv import load_dotenv
+
+from app.logger.console_logger import error, info, success
+
+load_dotenv()
+
+# rest — REST API через AsyncGitHub (по умолчанию), mirror — локальное зеркало + git push
+GIT_TRANSPORT = os.getenv("GIT_TRANSPORT", "rest").lower()
+GIT_MIRROR_DIR = os.getenv("GIT_MIRROR_DIR", ".git_mirrors")
+# для тестов можно указать локальный bare-репозиторий: file:///tmp/remotes/{repo}.git
+# токена в URL нет: он передаётся заголовком через окружение git и не попадает на диск
+GIT_REMOTE_URL_TEMPLATE = os.getenv(
+    "GIT_REMOTE_URL_TEMPLATE",
+    "https://github.com/{owner}/{repo}.git",
+)
+GIT_AUTHOR_NAME = os.getenv("GIT_AUTHOR_NAME", "ai-team")
+GIT_AUTHOR_EMAIL = os.getenv("GIT_AUTHOR_EMAIL", "ai-team@users.noreply.github.com")
+GIT_TIMEOUT_SEC = int(os.getenv("GIT_TIMEOUT_SEC", "120"))
+
+
+class GitMirrorError(RuntimeError):
+    pass
+
+
+class GitMirror:
+    """
+    Локальное bare-зеркало репозитория проекта.
+
+    Коммит собирается одним процессом git fast-import (без рабочей копии),
+    а на GitHub уходит одним pack через git push — вместо запроса на каждый blob.
+    """
+
+    def __init__(self, remote_url: str, path: str, branch: str = "main", token: str | None = None):
+        self.remote_url = remote_url
+        self.token = token
+        self.path = path
+        self.branch = branch
+        self.ref = f"refs/heads/{branch}"
+
+    @classmethod
+    def for_repo(cls, token: str, owner: str, repo: str) -> "GitMirror":
+        remote_url = GIT_REMOTE_URL_TEMPLATE.format(token=token, owner=owner, repo=repo)
+        return cls(remote_url, os.path.join(GIT_MIRROR_DIR, f"{repo}.git"), token=token)
+
+    # =========================
+    # git
+    # =========================
+
+    def _git(self, *args: str, data: bytes | None = None, check: bool = True) -> str:
+        env = {
+            **os.environ,
+            "GIT_TERMINAL_PROMPT": "0",
+            "GIT_DIR": self.path,
+        }
+        if self.token:
+            # http.extraHeader только для этого процесса (GIT_CONFIG_*), не в config зеркала
+            n = int(env.get("GIT_CONFIG_COUNT", "0") or 0)
+            basic = base64.b64encode(f"x-access-token:{self.token}".encode("utf-8")).decode("ascii")
+            env.update({
+                "GIT_CONFIG_COUNT": str(n + 1),
+                f"GIT_CONFIG_KEY_{n}": "http.extraHeader",
+                f"GIT_CONFIG_VALUE_{n}": f"Authorization: Basic {basic}",
+            })
+        proc = subprocess.run(
+            ["git", *args],
+            input=data,
+            env=env,
+            capture_output=True,
+            timeout=GIT_TIMEOUT_SEC,
+        )
+        if check and proc.returncode != 0:
+            # stderr может содержать URL с токеном
+            stderr = proc.stderr.decode("utf-8", errors="replace").replace(self.remote_url, "<remote>")
+            raise GitMirrorError(f"git {args[0]} failed: {stderr.strip()}")
+        return proc.stdout.decode("utf-8", errors="replace").strip()
+
+    def _ensure(self) -> None:
+        if not os.path.isdir(self.path):
+            os.makedirs(self.path, exist_ok=True)
+            self._git("init", "--bare", "--quiet")
+        else:
+            # зеркала старых версий хранили remote origin с токеном в URL
+            self._git("remote", "remove", "origin", check=False)
+
+    def fetch(self) -> str | None:
+        self._ensure()
+        if not self._git("ls-remote", self.remote_url, self.ref):
+            # пустой репозиторий: первый коммит будет без родителя
+            return None
+        self._git("fetch", "--quiet", "--no-tags", self.remote_url, f"+{self.ref}:{self.ref}")
+        return self.head()
+
+    def head(self) -> str | None:
+        sha = self._git("rev-parse", "--verify", "--quiet", self.ref, check=False)
+        return sha or None
+
+    # =========================
+    # commit + push
+    # =========================
+
+    def _fast_import_stream(self, operations: List[Dict[str, Any]], message: str, parent: str | None) -> bytes:
+        now = int(time.time())
+        ident = f"{GIT_AUTHOR_NAME} <{GIT_AUTHOR_EMAIL}> {now} +0000"
+        msg = message.encode("utf-8")
+
+        out: List[bytes] = [
+            f"commit {self.ref}\n".encode(),
+            f"author {ident}\n".encode("utf-8"),
+            f"committer {ident}\n".encode("utf-8"),
+            f"data {len(msg)}\n".encode(),
+            msg,
+            b"\n",
+        ]
+        if parent:
+            out.append(f"from {parent}\n".encode())
+
+        for op in operations:
+            path = op["path"].strip("/")
+            if op["op"] in ("create", "update"):
+                content = op.get("content", "").encode("utf-8")
+                out.append(f'M 100644 inline "{self._quote(path)}"\n'.encode("utf-8"))
+                out.append(f"data {len(content)}\n".encode())
+                out.append(content)
+                out.append(b"\n")
+            elif op["op"] == "delete":
+                out.append(f'D "{self._quote(path)}"\n'.encode("utf-8"))
+
+        out.append(b"done\n")
+        return b"".join(out)
+
+    @staticmethod
+    def _quote(path: str) -> str:
+        return path.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    def commit(self, operations: List[Dict[str, Any]], message: str) -> str | None:
+        """Создаёт коммит в зеркале. None — если дерево не изменилось."""
+        parent = self.head()
+        self._git(
+            "fast-import", "--quiet", "--done", "--force",
+            data=self._fast_import_stream(operations, message, parent),
+        )
+        new_sha = self.head()
+
+        if parent and self._git("rev-parse", f"{new_sha}^{{tree}}") == self._git("rev-parse", f"{parent}^{{tree}}"):
+            self._git("update-ref", self.ref, parent)
+            return None
+        return new_sha
+
+    def push(self) -> None:
+        self._git("push", "--quiet", self.remote_url, f"{self.ref}:{self.ref}")
+
+    def push_commit(self, operations: List[Dict[str, Any]], message: str) -> str | None:
+        """fetch -> commit -> push; при гонке (non-fast-forward) повторяет один раз."""
+        for attempt in range(2):
+            parent = self.fetch()
+            new_sha = self.commit(operations, message)
+            if new_sha is None:
+                info("[GIT_MIRROR] Изменений нет — коммит пропущен")
+                return parent
+
+            try:
+                self.push()
+                success(f"[GIT_MIRROR] Коммит отправлен: {new_sha}")
+                return new_sha
+            except GitMirrorError as e:
+                error(f"[GIT_MIRROR] push отклонён (попытка {attempt + 1}): {e}")
+
+        raise GitMirrorError("push rejected twice")
@@ -0,0 +1,40 @@
+import hashlib
+from typing import Any, Dict
+
+
+def blob_sha(content: str) -> str:
+    """SHA git-блоба, такой же, как вернёт GitHub для create_git_blob(content, "utf-8")."""
+    data = content.encode("utf-8")
+    header = f"blob {len(data)}\0".encode("utf-8")
+    return hashlib.sha1(header + data).hexdigest()
+
+
+def tree_sha(listing: Dict[str, str]) -> str:
+    """
+    SHA корневого git-дерева по плоскому листингу {path: blob_sha}
+    (все файлы — обычные, mode 100644), такой же, как у GitHub.
+    """
+    root: Dict[str, Any] = {}
+    for path, sha in listing.items():
+        node = root
+        *dirs, name = path.split("/")
+        for part in dirs:
+            node = node.setdefault(part, {})
+        node[name] = sha
+    return _hash_tree(root)
+
+
+def _hash_tree(node: Dict[str, Any]) -> str:
+    # git сортирует записи по имени, у каталогов к имени добавляется "/"
+    entries = sorted(node.items(), key=lambda kv: kv[0] + "/" if isinstance(kv[1], dict) else kv[0])
+
+    body = b""
+    for name, value in entries:
+        if isinstance(value, dict):
+            mode, sha = "40000", _hash_tree(value)
+        else:
+            mode, sha = "100644", value
+        body += f"{mode} {name}\0".encode("utf-8") + bytes.fromhex(sha)
+
+    header = f"tree {len(body)}\0".encode("utf-8")
+    return hashlib.sha1(header + body).hexdigest()
@@ -3,13 +3,56 @@ from __future__ import annotations
 
 import asyncio
 import io
+import os
 import re
+import shutil
+import tempfile
 import time
 import zipfile
-from dataclasses import dataclass
-from typing import Optional, Any
+from collections import OrderedDict, deque
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any, BinaryIO, Deque, Optional
 
-import requests
+from dotenv import load_dotenv
+
+from app.db import builds as builds_db
+from app.logger.console_logger import info, warning
+
+from .async_github import GitHubAPIError, get_github
+from .build_diagnostics import Diagnostic, extract_diagnostics, format_diagnostics
+from .github_rate_limit import GitHubPriority, github_priority
+
+load_dotenv()
+
+# сколько сборок отслеживаем одновременно и сколько из них — в одном репозитории
+BUILD_MONITOR_CONCURRENCY = int(os.getenv("BUILD_MONITOR_CONCURRENCY", "8"))
+BUILD_MONITOR_PER_REPO = int(os.getenv("BUILD_MONITOR_PER_REPO", "2"))
+# с вебхуками поллинг — только страховка на случай потерянной доставки;
+# редким он становится для репозитория, где вебхук подтверждён (mark_webhook)
+WEBHOOKS_ENABLED = bool(os.getenv("GH_WEBHOOK_SECRET"))
+WEBHOOK_FALLBACK_POLL_SEC = int(os.getenv("GITHUB_WEBHOOK_FALLBACK_POLL_SEC", "300"))
+# самый частый интервал поллинга (run в очереди, ожидаемый конец сборки)
+BUILD_POLL_MIN_SEC = float(os.getenv("BUILD_POLL_MIN_SEC", "5"))
+BUILD_DURATION_EMA_ALPHA = float(os.getenv("BUILD_DURATION_EMA_ALPHA", "0.3"))
+
+# результаты сборок по (tree_sha, workflow), которые держим в памяти поверх Cassandra
+BUILD_RESULT_CACHE_SIZE = int(os.getenv("BUILD_RESULT_CACHE_SIZE", "1024"))
+# сколько живут закэшированные исходы (в памяти и TTL строки в Cassandra)
+BUILD_SUCCESS_TTL_SEC = int(os.getenv("BUILD_SUCCESS_TTL_SEC", str(30 * 24 * 3600)))
+BUILD_FAILURE_TTL_SEC = int(os.getenv("BUILD_FAILURE_TTL_SEC", str(6 * 3600)))
+
+# логи упавших jobs до этого размера держим в памяти, больше — во временном файле
+BUILD_LOG_SPOOL_BYTES = int(os.getenv("BUILD_LOG_SPOOL_BYTES", str(1024 * 1024)))
+
+_QUEUED_STATUSES = ("queued", "requested", "waiting", "pending")
+_FAILED_CONCLUSIONS = ("failure", "timed_out", "cancelled", "startup_failure")
+
+_ERROR_RX = re.compile(
+    r"(##\[error\]|traceback\b|exception\b|fatal\b|^\s*error\b|npm ERR!|yarn .*error|"
+    r"gradle.*failed|failed\b|build\s+failed|compilation\s+failed|segmentation fault)",
+    re.IGNORECASE,
+)
 
 
 # =========================
@@ -25,16 +68,32 @@ class WorkflowResult:
     workflow_name: Optional[str] = None
     error_text: Optional[str] = None
     logs_text: Optional[str] = None
+    # разобранные ошибки сборки (file, line, code, message); пусто — формат не распознан
+    diagnostics: list[Diagnostic] = field(default_factory=list)
+    tree_sha: Optional[str] = None
+    # результат взят из кэша сборок по tree_sha, CI не ждали
+    cached: bool = False
 
 
 # =========================
 # Internal job model
 # =========================
 
+def _repo_id(owner: str, repo: str) -> str:
+    return f"{owner}/{repo}".strip().lower()
+
+
+def _watch_key(owner: str, repo: str, head_sha: str) -> tuple[str, str]:
+    """Ключ ожидания вебхука: одинаковый для сборки и для доставки (регистр GitHub не важен)."""
+    return (_repo_id(owner, repo), head_sha.strip().lower())
+
+
 @dataclass(frozen=True)
 class _BuildJob:
     project_id: str
     agent_name: str
+    owner: str
+    repo: str
     head_sha: str
     include_raw_logs: bool
     timeout_sec: int
@@ -43,6 +102,28 @@ class _BuildJob:
     max_log_chars: int
     event: Optional[str]
     workflow_name: Optional[str]
+    tree_sha: Optional[str] = None
+
+    @property
+    def repo_key(self) -> str:
+        return f"{self.owner}/{self.repo}"
+
+    @property
+    def watch_key(self) -> tuple[str, str]:
+        return _watch_key(self.owner, self.repo, self.head_sha)
+
+
+@dataclass
+class _RepoQueue:
+    jobs: Deque[_BuildJob] = field(default_factory=deque)
+    active: int = 0
+
+
+@dataclass
+class _RunWatch:
+    """Что пришло вебхуками по (repo, sha), пока сборка ждёт."""
+    wakeup: asyncio.Event = field(default_factory=asyncio.Event)
+    runs: dict[int, dict[str, Any]] = field(default_factory=dict)
 
 
 # =========================
@@ -51,13 +132,25 @@ class _BuildJob:
 
 class GitHubDeployService:
     """
-    Простой и рабочий сервис:
+    Монитор сборок GitHub Actions, один на процесс (get_deploy_service()):
 
     - Внешний код НЕ блокируется.
     - Ты вызываешь `await submit_build(...)` -> получаешь Future.
     - Дальше можешь `res = await future` в нужном месте.
-    - Внутри сервиса работает один воркер, который ждёт GitHub Actions
-      (ожидание идёт в отдельном thread через asyncio.to_thread).
+    - Повторная отправка того же (project_id, sha) отдаёт тот же Future.
+    - Сборки ждут до `concurrency` воркеров; репозитории обслуживаются
+      по кругу и не больше `per_repo` сборок одного репозитория сразу,
+      поэтому долгая сборка одного проекта не держит очередь остальных.
+    - Запросы идут через общий AsyncGitHub-клиент с приоритетом POLL:
+      поллинг не съедает бюджет API, нужный пушам.
+    - notify_run(...) (вебхук) будит ожидание сразу; поллинг остаётся
+      медленной страховкой.
+    - Исход сборки запоминается по (tree_sha, workflow): коммит с уже
+      собранным деревом резолвится сразу, без ожидания CI.
+    - Без вебхуков поллинг адаптивный: часто, пока run в очереди, дальше —
+      по средней длительности сборок репозитория, с сужением интервала
+      к ожидаемому концу. GET'ы идут с If-None-Match (AsyncGitHub),
+      неизменившийся run отвечает 304 и не тратит лимит.
 
     Важно:
       owner = user.login
@@ -67,45 +160,49 @@ class GitHubDeployService:
     def __init__(
         self,
         token: str,
-        owner: str,
-        repo: str,
-        api_base: str = "https://api.github.com",
+        concurrency: int = BUILD_MONITOR_CONCURRENCY,
+        per_repo: int = BUILD_MONITOR_PER_REPO,
     ):
         if not token:
             raise ValueError("token is required")
-        if not owner:
-            raise ValueError("owner is required (use user.login)")
-        if not repo:
-            raise ValueError("repo is required (use repo name)")
-
-        self.owner = owner
-        self.repo = repo
-        self.api_base = api_base.rstrip("/")
-
-        self._session = requests.Session()
-        self._session.headers.update(
-            {
-                "Authorization": f"Bearer {token}",
-                "Accept": "application/vnd.github+json",
-                "X-GitHub-Api-Version": "2022-11-28",
-                "User-Agent": "GitHubDeployService",
-            }
-        )
 
-        # очередь работ и "ожидающие" futures по (project_id, sha)
-        self._q: asyncio.Queue[_BuildJob] = asyncio.Queue()
+        self._github = get_github(token)
+        self.concurrency = max(1, concurrency)
+        self.per_repo = max(1, per_repo)
+
+        # очереди по репозиториям, порядок обхода и "ожидающие" futures по (project_id, sha)
+        self._repos: dict[str, _RepoQueue] = {}
+        self._order: Deque[str] = deque()
         self._pending: dict[tuple[str, str], asyncio.Future[WorkflowResult]] = {}
-        self._worker_task: asyncio.Task | None = None
-        self._lock = asyncio.Lock()
+        self._watches: dict[tuple[str, str], _RunWatch] = {}
+        # репозитории с подтверждённым вебхуком (регистрация или подписанная доставка)
+        self._hooked: set[str] = set()
+        # EMA длительности сборки по репозиторию, сек
+        self._durations: dict[str, float] = {}
+        # {(tree_sha, workflow): (результат, monotonic-время истечения)}
+        self._results: OrderedDict[tuple[str, str], tuple[WorkflowResult, float]] = OrderedDict()
+        self.cache_hits = 0
+        self._workers: list[asyncio.Task] = []
+        self._cond: asyncio.Condition | None = None
 
     # =========================
     # Public async API
     # =========================
 
     def start(self) -> None:
-        """Запускаем воркер один раз."""
-        if self._worker_task is None:
-            self._worker_task = asyncio.create_task(self._worker_loop())
+        """Запускаем воркеры один раз."""
+        if self._workers:
+            return
+        self._cond = asyncio.Condition()
+        self._workers = [
+            asyncio.create_task(self._worker_loop()) for _ in range(self.concurrency)
+        ]
+
+    async def stop(self) -> None:
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
 
     async def submit_build(
         self,
@@ -113,6 +210,8 @@ class GitHubDeployService:
         agent_name: str,
         head_sha: str,
         *,
+        owner: str,
+        repo: str,
         include_raw_logs: bool = False,
         timeout_sec: int = 900,
         poll_sec: int = 120,
@@ -120,65 +219,204 @@ class GitHubDeployService:
         max_log_chars: int = 200_000,
         event: Optional[str] = None,
         workflow_name: Optional[str] = None,
+        tree_sha: Optional[str] = None,
     ) -> asyncio.Future[WorkflowResult]:
+        """tree_sha — дерево коммита head_sha, если известно: по нему ищется готовый результат."""
         loop = asyncio.get_running_loop()
 
-        if not head_sha:
+        if not head_sha or not owner or not repo:
             fut: asyncio.Future[WorkflowResult] = loop.create_future()
             fut.set_result(
-                WorkflowResult(ok=False, conclusion="no_sha", error_text="empty head_sha")
+                WorkflowResult(ok=False, conclusion="no_sha", error_text=f"empty head_sha/repo: {head_sha!r} {owner}/{repo}")
             )
             return fut
 
+        cached = await self.cached_build(tree_sha, workflow_name) if tree_sha else None
+        if cached is not None:
+            info(f"[BUILD_CACHE] {owner}/{repo}@{head_sha[:12]}: дерево {tree_sha[:12]} уже собиралось — {cached.conclusion}")  # type: ignore
+            fut = loop.create_future()
+            fut.set_result(cached)
+            return fut
+
         self.start()
+        assert self._cond is not None
 
         key = (project_id, head_sha)
 
-        async with self._lock:
+        async with self._cond:
             fut = self._pending.get(key)
             if fut is None or fut.done():
                 fut = loop.create_future()
                 self._pending[key] = fut
 
-                await self._q.put(
-                    _BuildJob(
-                        project_id=project_id,
-                        agent_name=agent_name,
-                        head_sha=head_sha,
-                        include_raw_logs=include_raw_logs,
-                        timeout_sec=timeout_sec,
-                        poll_sec=poll_sec,
-                        per_page=per_page,
-                        max_log_chars=max_log_chars,
-                        event=event,
-                        workflow_name=workflow_name,
-                    )
+                job = _BuildJob(
+                    project_id=project_id,
+                    agent_name=agent_name,
+                    owner=owner,
+                    repo=repo,
+                    head_sha=head_sha,
+                    include_raw_logs=include_raw_logs,
+                    timeout_sec=timeout_sec,
+                    poll_sec=poll_sec,
+                    per_page=per_page,
+                    max_log_chars=max_log_chars,
+                    event=event,
+                    workflow_name=workflow_name,
+                    tree_sha=tree_sha,
                 )
+                self._watches.setdefault(job.watch_key, _RunWatch())
+                queue = self._repos.setdefault(job.repo_key, _RepoQueue())
+                queue.jobs.append(job)
+                if job.repo_key not in self._order:
+                    self._order.append(job.repo_key)
+                self._cond.notify()
 
             return fut
 
+    def mark_webhook(self, owner: str, repo: str) -> None:
+        """Вебхук репозитория есть: его сборки дальше поллятся только как страховка."""
+        self._hooked.add(_repo_id(owner, repo))
+
+    def notify_run(
+        self,
+        owner: str,
+        repo: str,
+        head_sha: str,
+        run: Optional[dict[str, Any]] = None,
+    ) -> bool:
+        """
+        Событие от вебхука: run (workflow_run) или просто «что-то изменилось»
+        (check_suite). True — сборка по этому sha отслеживается.
+        """
+        watch = self._watches.get(_watch_key(owner, repo, head_sha))
+        if watch is None:
+            return False
+        if run and run.get("id") is not None:
+            watch.runs[int(run["id"])] = run
+        watch.wakeup.set()
+        return True
+
+    # =========================
+    # Build result cache
+    # =========================
+
+    async def cached_build(self, tree_sha: str, workflow_name: Optional[str] = None) -> Optional[WorkflowResult]:
+        key = (tree_sha, workflow_name or "")
+        entry = self._results.get(key)
+        if entry is not None and entry[1] <= time.monotonic():
+            self._results.pop(key, None)
+            entry = None
+
+        if entry is not None:
+            res = entry[0]
+        else:
+            try:
+                row = await asyncio.to_thread(builds_db.get_build_result, *key)
+            except Exception as e:
+                warning(f"[BUILD_CACHE] не удалось прочитать результат {tree_sha[:12]}: {e}")
+                row = None
+            if row is None:
+                return None
+            res = WorkflowResult(
+                **{**row, "diagnostics": [Diagnostic(**d) for d in row["diagnostics"]]},
+                tree_sha=tree_sha,
+            )
+            ttl = self._cache_ttl(res)
+            if ttl is None:
+                # строка старого формата (падение без ошибок в коде) — не доверяем
+                return None
+            self._remember_result(key, res, ttl)
+
+        self.cache_hits += 1
+        self._results.move_to_end(key)
+        return WorkflowResult(**{**res.__dict__, "cached": True, "logs_text": None})
+
+    @staticmethod
+    def _cache_ttl(res: WorkflowResult) -> Optional[int]:
+        """
+        TTL кэша для исхода; None — не кэшируем.
+        Падение кэшируется, только если есть ошибки с местом в коде (tsc, esbuild,
+        traceback): сбои npm registry, сети и раннеров от дерева не зависят.
+        """
+        if res.conclusion == "success":
+            return BUILD_SUCCESS_TTL_SEC
+        if res.conclusion == "failure" and any(d.file and d.line for d in res.diagnostics):
+            return BUILD_FAILURE_TTL_SEC
+        return None
+
+    async def _store_result(self, job: _BuildJob, res: WorkflowResult) -> None:
+        ttl = self._cache_ttl(res)
+        if not res.tree_sha or not ttl:
+            return
+
+        key = (res.tree_sha, job.workflow_name or "")
+        self._remember_result(key, res, ttl)
+        row = {**asdict(res), "diagnostics": [asdict(d) for d in res.diagnostics]}
+        try:
+            await asyncio.to_thread(builds_db.set_build_result, *key, row, ttl)
+        except Exception as e:
+            warning(f"[BUILD_CACHE] не удалось сохранить результат {res.tree_sha[:12]}: {e}")
+
+    def _remember_result(self, key: tuple[str, str], res: WorkflowResult, ttl: int) -> None:
+        self._results[key] = (res, time.monotonic() + ttl)
+        self._results.move_to_end(key)
+        while len(self._results) > BUILD_RESULT_CACHE_SIZE:
+            self._results.popitem(last=False)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "workers": len(self._workers),
+            "cached_results": len(self._results),
+            "cache_hits": self.cache_hits,
+            "pending": len(self._pending),
+            "watched": len(self._watches),
+            "webhook_repos": len(self._hooked),
+            "expected_duration_sec": {key: round(sec, 1) for key, sec in self._durations.items()},
+            "repos": {
+                key: {"queued": len(q.jobs), "active": q.active}
+                for key, q in self._repos.items()
+            },
+        }
+
     # =========================
     # Worker loop
     # =========================
 
+    def _next_job(self) -> Optional[_BuildJob]:
+        """Следующая работа по кругу репозиториев с учётом лимита per_repo."""
+        for _ in range(len(self._order)):
+            key = self._order[0]
+            self._order.rotate(-1)
+            queue = self._repos[key]
+            if queue.jobs and queue.active < self.per_repo:
+                queue.active += 1
+                return queue.jobs.popleft()
+        return None
+
+    def _job_done(self, job: _BuildJob) -> None:
+        queue = self._repos[job.repo_key]
+        queue.active -= 1
+        if not queue.jobs and queue.active == 0:
+            del self._repos[job.repo_key]
+            self._order.remove(job.repo_key)
+
     async def _worker_loop(self) -> None:
+        assert self._cond is not None
         while True:
-            job = await self._q.get()
+            async with self._cond:
+                job = self._next_job()
+                while job is None:
+                    await self._cond.wait()
+                    job = self._next_job()
+
             key = (job.project_id, job.head_sha)
 
             try:
-                # блокирующую логику уводим в отдельный thread
-                res = await asyncio.to_thread(
-                    self._wait_build_and_get_error_text_blocking,
-                    job.head_sha,
-                    job.timeout_sec,
-                    job.poll_sec,
-                    job.per_page,
-                    job.max_log_chars,
-                    job.include_raw_logs,
-                    job.event,
-                    job.workflow_name,
-                )
+                with github_priority(GitHubPriority.POLL):
+                    res = await self._wait_build_and_get_error_text(job)
+                await self._store_result(job, res)
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
                 res = WorkflowResult(
                     ok=False,
@@ -187,61 +425,51 @@ class GitHubDeployService:
                 )
 
             # проставляем результат в Future
-            async with self._lock:
+            async with self._cond:
                 fut = self._pending.get(key)
                 if fut is not None and not fut.done():
                     fut.set_result(res)
                 # чистим pending, чтобы не накапливать
                 self._pending.pop(key, None)
-
-            self._q.task_done()
+                self._watches.pop(job.watch_key, None)
+                self._job_done(job)
+                # освободился слот репозитория — его работы снова доступны
+                self._cond.notify_all()
 
     # =========================
-    # Blocking core (thread)
+    # Core
     # =========================
 
-    def _wait_build_and_get_error_text_blocking(
-        self,
-        head_sha: str,
-        timeout_sec: int,
-        poll_sec: int,
-        per_page: int,
-        max_log_chars: int,
-        include_raw_logs: bool,
-        event: Optional[str],
-        workflow_name: Optional[str],
-    ) -> WorkflowResult:
+    async def _wait_build_and_get_error_text(self, job: _BuildJob) -> WorkflowResult:
         """
-        Блокирующая функция (внутри thread).
         Ждёт появления workflow run по sha и затем ждёт завершения.
         """
-        deadline = time.time() + timeout_sec
-
-        run = self._wait_run_appears_by_sha(
-            head_sha=head_sha,
-            deadline=deadline,
-            poll_sec=poll_sec,
-            per_page=per_page,
-            event=event,
-            workflow_name=workflow_name,
-        )
+        deadline = time.time() + job.timeout_sec
+
+        run = await self._wait_run_appears_by_sha(job, deadline)
         if run is None:
             return WorkflowResult(
                 ok=False,
                 conclusion="timeout",
-                error_text=f"Не найден workflow run для sha={head_sha} за {timeout_sec}s",
+                error_text=f"Не найден workflow run для sha={job.head_sha} за {job.timeout_sec}s",
             )
 
         run_id = int(run["id"])
         run_url = run.get("html_url")
         wf_name = run.get("name")
+        tree = job.tree_sha or (run.get("head_commit") or {}).get("tree_id")
 
-        while time.time() < deadline:
-            data = self._get_json(f"/repos/{self.owner}/{self.repo}/actions/runs/{run_id}")
+        data = run
+        seen_status: Optional[str] = None
+        started_at = time.time()
+        attempt = 0
+
+        while True:
             status = (data.get("status") or "").lower()
             conclusion = (data.get("conclusion") or "").lower()
 
             if status == "completed":
+                self._record_duration(job, data, started_at)
                 if conclusion == "success":
                     return WorkflowResult(
                         ok=True,
@@ -249,19 +477,22 @@ class GitHubDeployService:
                         run_id=run_id,
                         run_url=run_url,
                         workflow_name=wf_name,
+                        tree_sha=tree,
                     )
 
-                # failed/cancelled/... -> download logs and extract error
+                # failed/cancelled/... -> логи только упавших jobs, ошибка ищется с конца
+                diagnostics: list[Diagnostic] = []
                 try:
-                    zip_bytes = self._get_bytes(
-                        f"/repos/{self.owner}/{self.repo}/actions/runs/{run_id}/logs",
-                        timeout=60,
-                    )
-                    files = self._unzip_logs(zip_bytes, max_total_chars=max_log_chars)
-                    err = self._extract_error_snippet(files)
-                    raw = self._join_files(files) if include_raw_logs else None
+                    files = await self._failed_logs(job, run_id)
+                    diagnostics = await asyncio.to_thread(extract_diagnostics, files)
+                    if diagnostics:
+                        err = format_diagnostics(diagnostics)
+                    else:
+                        # формат ошибки не распознан — сырой кусок лога вокруг последней ошибки
+                        err = await asyncio.to_thread(self._extract_error_snippet, files)
+                    raw = self._join_files(files) if job.include_raw_logs else None
                 except Exception as e:
-                    err = f"Не удалось скачать/распаковать logs.zip: {type(e).__name__}: {e}"
+                    err = f"Не удалось скачать логи сборки: {type(e).__name__}: {e}"
                     raw = None
 
                 return WorkflowResult(
@@ -272,9 +503,24 @@ class GitHubDeployService:
                     workflow_name=wf_name,
                     error_text=err,
                     logs_text=raw,
+                    diagnostics=diagnostics,
+                    tree_sha=tree,
                 )
 
-            time.sleep(poll_sec)
+            if status != seen_status:
+                seen_status, attempt = status, 0
+                if status not in _QUEUED_STATUSES:
+                    started_at = self._parse_ts(data.get("run_started_at")) or time.time()
+
+            if time.time() >= deadline:
+                break
+
+            await self._sleep(job, self._poll_delay(job, status, started_at, attempt), deadline)
+            attempt += 1
+
+            data = self._webhook_runs(job).get(run_id)
+            if not data or (data.get("status") or "").lower() != "completed":
+                data = await self._github.get_workflow_run(job.owner, job.repo, run_id)
 
         return WorkflowResult(
             ok=False,
@@ -282,47 +528,32 @@ class GitHubDeployService:
             run_id=run_id,
             run_url=run_url,
             workflow_name=wf_name,
-            error_text=f"Workflow run {run_id} не завершился за {timeout_sec}s",
+            error_text=f"Workflow run {run_id} не завершился за {job.timeout_sec}s",
         )
 
     # =========================
     # Internals
     # =========================
 
-    def _wait_run_appears_by_sha(
-        self,
-        head_sha: str,
-        deadline: float,
-        poll_sec: int,
-        per_page: int,
-        event: Optional[str],
-        workflow_name: Optional[str],
-    ) -> Optional[dict[str, Any]]:
+    async def _wait_run_appears_by_sha(self, job: _BuildJob, deadline: float) -> Optional[dict[str, Any]]:
         params: dict[str, Any] = {
-            "head_sha": head_sha,
-            "per_page": min(max(per_page, 1), 100),
+            "head_sha": job.head_sha,
+            "per_page": min(max(job.per_page, 1), 100),
         }
-        if event:
-            params["event"] = event
+        if job.event:
+            params["event"] = job.event
 
+        attempt = 0
         while time.time() < deadline:
-            try:
-                data = self._get_json(
-                    f"/repos/{self.owner}/{self.repo}/actions/runs",
-                    params=params,
-                )
-                runs = data.get("workflow_runs") or []
-            except Exception:
-                time.sleep(poll_sec)
-                continue
-
-            if workflow_name:
-                wn = workflow_name.lower()
-                runs = [
-                    r for r in runs
-                    if (r.get("name") or "").lower() == wn
-                    or wn in (r.get("name") or "").lower()
-                ]
+            runs = self._matching_runs(job, list(self._webhook_runs(job).values()))
+            if not runs:
+                try:
+                    data = await self._github.list_workflow_runs(job.owner, job.repo, **params)
+                    runs = self._matching_runs(job, data.get("workflow_runs") or [])
+                except Exception:
+                    await self._sleep(job, self._poll_delay(job, "", 0.0, attempt), deadline)
+                    attempt += 1
+                    continue
 
             if runs:
                 # берем самый свежий
@@ -334,56 +565,186 @@ class GitHubDeployService:
                     return max(active, key=ts)
                 return max(runs, key=ts)
 
-            time.sleep(poll_sec)
+            # run ещё не создан — это секунды после push, опрашиваем часто
+            await self._sleep(job, self._poll_delay(job, "", 0.0, attempt), deadline)
+            attempt += 1
 
         return None
 
-    def _get_json(self, path: str, params: Optional[dict] = None, timeout: int = 20) -> dict:
-        url = f"{self.api_base}{path}"
-        r = self._session.get(url, params=params, timeout=timeout)
-        if not r.ok:
-            raise RuntimeError(f"GitHub API {r.status_code}: {self._safe_text(r)}")
-        return r.json()
+    @staticmethod
+    def _matching_runs(job: _BuildJob, runs: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        if job.event:
+            runs = [r for r in runs if (r.get("event") or job.event) == job.event]
+        if job.workflow_name:
+            wn = job.workflow_name.lower()
+            runs = [
+                r for r in runs
+                if (r.get("name") or "").lower() == wn
+                or wn in (r.get("name") or "").lower()
+            ]
+        return runs
 
-    def _get_bytes(self, path: str, params: Optional[dict] = None, timeout: int = 20) -> bytes:
-        url = f"{self.api_base}{path}"
-        r = self._session.get(url, params=params, timeout=timeout, allow_redirects=True)
-        if not r.ok:
-            raise RuntimeError(f"GitHub API {r.status_code}: {self._safe_text(r)}")
-        return r.content
+    # =========================
+    # Poll schedule
+    # =========================
+
+    def _poll_delay(self, job: _BuildJob, status: str, started_at: float, attempt: int) -> float:
+        """
+        Интервал до следующего опроса run'а:
+        - вебхук репозитория подтверждён — редкая страховка;
+        - run не появился / в очереди, или истории по репо нет — от BUILD_POLL_MIN_SEC
+          с backoff x1.5;
+        - run идёт — половина оставшегося до ожидаемого конца, но не чаще минимума;
+        - сборка дольше обычного — интервал растёт с опозданием.
+        Сверху всё ограничено job.poll_sec.
+        """
+        if WEBHOOKS_ENABLED and _repo_id(job.owner, job.repo) in self._hooked:
+            return max(job.poll_sec, WEBHOOK_FALLBACK_POLL_SEC)
+
+        fast = min(BUILD_POLL_MIN_SEC, job.poll_sec)
+        expected = self._durations.get(job.repo_key)
+
+        if not status or status in _QUEUED_STATUSES or expected is None:
+            return min(job.poll_sec, fast * 1.5 ** attempt)
+
+        remaining = expected - (time.time() - started_at)
+        if remaining > 0:
+            return min(job.poll_sec, max(fast, remaining / 2))
+        return min(job.poll_sec, max(fast, -remaining / 4))
+
+    def _record_duration(self, job: _BuildJob, run: dict[str, Any], started_at: float) -> None:
+        started = self._parse_ts(run.get("run_started_at")) or started_at
+        finished = self._parse_ts(run.get("updated_at")) or time.time()
+        duration = finished - started
+        if duration <= 0:
+            return
+
+        prev = self._durations.get(job.repo_key)
+        self._durations[job.repo_key] = (
+            duration if prev is None
+            else prev + BUILD_DURATION_EMA_ALPHA * (duration - prev)
+        )
 
     @staticmethod
-    def _safe_text(resp: requests.Response, limit: int = 2000) -> str:
+    def _parse_ts(value: Optional[str]) -> Optional[float]:
+        if not value:
+            return None
+        try:
+            return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+        except ValueError:
+            return None
+
+    def _webhook_runs(self, job: _BuildJob) -> dict[int, dict[str, Any]]:
+        watch = self._watches.get(job.watch_key)
+        return watch.runs if watch else {}
+
+    async def _sleep(self, job: _BuildJob, seconds: float, deadline: float) -> None:
+        """Пауза поллинга, которую прерывает вебхук по этому sha."""
+        seconds = max(0.0, min(seconds, deadline - time.time()))
+        watch = self._watches.get(job.watch_key)
+        if watch is None:
+            await asyncio.sleep(seconds)
+            return
         try:
-            return (resp.text or "")[:limit]
-        except Exception:
-            return "<no response text>"
+            await asyncio.wait_for(watch.wakeup.wait(), seconds)
+        except asyncio.TimeoutError:
+            pass
+        watch.wakeup.clear()
 
     # =========================
     # Logs parsing
     # =========================
 
+    async def _failed_logs(self, job: _BuildJob, run_id: int) -> list[tuple[str, str]]:
+        """
+        Хвосты логов упавших jobs: каждый лог стримится в spooled-файл
+        и читается с конца, пока не найдётся строка с ошибкой.
+        Если jobs нет (startup_failure и т.п.) — общий logs.zip тем же способом.
+        """
+        try:
+            jobs = await self._github.list_run_jobs(job.owner, job.repo, run_id)
+        except GitHubAPIError:
+            jobs = []
+
+        failed = [j for j in jobs if (j.get("conclusion") or "").lower() in _FAILED_CONCLUSIONS]
+        files: list[tuple[str, str]] = []
+
+        if failed:
+            budget = max(1, job.max_log_chars // len(failed))
+            for j in failed:
+                with tempfile.SpooledTemporaryFile(max_size=BUILD_LOG_SPOOL_BYTES) as f:
+                    await self._github.download_job_logs(job.owner, job.repo, int(j["id"]), f)
+                    text = await asyncio.to_thread(self._scan_tail, f, budget)
+                files.append((self._job_title(j), text))
+            return files
+
+        with tempfile.SpooledTemporaryFile(max_size=BUILD_LOG_SPOOL_BYTES) as f:
+            await self._github.download_run_logs(job.owner, job.repo, run_id, f)
+            return await asyncio.to_thread(self._unzip_logs, f, job.max_log_chars)
+
+    @staticmethod
+    def _job_title(j: dict[str, Any]) -> str:
+        steps = [
+            st.get("name") or "?"
+            for st in j.get("steps") or []
+            if (st.get("conclusion") or "").lower() in _FAILED_CONCLUSIONS
+        ]
+        title = f"job {j.get('name') or j.get('id')}"
+        return f"{title} / step {', '.join(steps)}" if steps else title
+
     @staticmethod
-    def _unzip_logs(zip_bytes: bytes, max_total_chars: int) -> list[tuple[str, str]]:
+    def _scan_tail(
+        f: BinaryIO,
+        max_bytes: int,
+        ctx_before: int = 50,
+        block: int = 64 * 1024,
+    ) -> str:
+        """
+        Читает лог блоками с конца, пока в прочитанном нет строки-ошибки
+        с ctx_before строками перед ней (или пока не упёрлись в max_bytes).
+        """
+        f.seek(0, io.SEEK_END)
+        end = f.tell()
+        pos = end
+        buf = b""
+        lines: list[str] = []
+
+        while pos > 0 and end - pos < max_bytes:
+            step = min(block, pos, max_bytes - (end - pos))
+            pos -= step
+            f.seek(pos)
+            buf = f.read(step) + buf
+
+            lines = buf.decode("utf-8", errors="replace").splitlines()
+            if pos > 0:
+                # первая строка блока может быть обрезана
+                lines = lines[1:]
+
+            hits = [i for i, line in enumerate(lines) if _ERROR_RX.search(line)]
+            if hits and hits[-1] >= ctx_before:
+                break
+
+        return "\n".join(lines)
+
+    @classmethod
+    def _unzip_logs(cls, f: BinaryIO, max_total_chars: int) -> list[tuple[str, str]]:
         out: list[tuple[str, str]] = []
-        total = 0
-        with zipfile.ZipFile(io.BytesIO(zip_bytes)) as z:
-            for name in sorted(z.namelist()):
-                if not (name.endswith(".txt") or name.endswith(".log")):
-                    continue
+        with zipfile.ZipFile(f) as z:
+            names = [
+                n for n in sorted(z.namelist())
+                if n.endswith(".txt") or n.endswith(".log")
+            ]
+            if not names:
+                return out
+
+            budget = max(1, max_total_chars // len(names))
+            for name in names:
                 try:
-                    text = z.read(name).decode("utf-8", errors="replace")
+                    with z.open(name) as src, tempfile.SpooledTemporaryFile(max_size=BUILD_LOG_SPOOL_BYTES) as tmp:
+                        shutil.copyfileobj(src, tmp)
+                        out.append((name, cls._scan_tail(tmp, budget)))
                 except Exception:
                     continue
-
-                if total >= max_total_chars:
-                    break
-
-                remain = max_total_chars - total
-                if len(text) > remain:
-                    text = text[:remain]
-                out.append((name, text))
-                total += len(text)
         return out
 
     @staticmethod
@@ -392,11 +753,7 @@ class GitHubDeployService:
 
     @staticmethod
     def _extract_error_snippet(files: list[tuple[str, str]], ctx_before: int = 50, ctx_after: int = 50) -> str:
-        rx = re.compile(
-            r"(##\[error\]|traceback\b|exception\b|fatal\b|^\s*error\b|npm ERR!|yarn .*error|"
-            r"gradle.*failed|failed\b|build\s+failed|compilation\s+failed|segmentation fault)",
-            re.IGNORECASE,
-        )
+        rx = _ERROR_RX
 
         best_score = -1
         best_snip: Optional[str] = None
@@ -426,3 +783,14 @@ class GitHubDeployService:
         fname, text = max(files, key=lambda x: len(x[1]))
         tail_lines = text.splitlines()[-120:]
         return f"===== {fname} (tail) =====\n" + "\n".join(tail_lines).strip()
+
+
+_deploy_service: Optional[GitHubDeployService] = None
+
+
+def get_deploy_service() -> GitHubDeployService:
+    """Общий на процесс монитор сборок (токен — GH_PAT)."""
+    global _deploy_service
+    if _deploy_service is None:
+        _deploy_service = GitHubDeployService(os.getenv("GH_PAT") or "")
+    return _deploy_service
@@ -0,0 +1,219 @@
+import asyncio
+import itertools
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Any, Dict, Iterator, List, Mapping, Optional
+
+from dotenv import load_dotenv
+
+from app.logger.console_logger import warning
+
+load_dotenv()
+
+GITHUB_MAX_IN_FLIGHT = int(os.getenv("GITHUB_MAX_IN_FLIGHT", "16"))
+# доля часового лимита, которую не отдаём менее приоритетным запросам
+GITHUB_RESERVE_FOR_PUSH = float(os.getenv("GITHUB_RESERVE_FOR_PUSH", "0.05"))
+GITHUB_RESERVE_FOR_PROVISION = float(os.getenv("GITHUB_RESERVE_FOR_PROVISION", "0.20"))
+# ожидание бюджета идёт шагами, чтобы вовремя увидеть обновлённые заголовки
+GITHUB_WAIT_STEP_SEC = float(os.getenv("GITHUB_WAIT_STEP_SEC", "5"))
+
+
+class GitHubPriority(IntEnum):
+    """Чем меньше значение — тем раньше запрос получает бюджет."""
+
+    PUSH = 0
+    PROVISION = 1
+    POLL = 2
+
+
+_github_priority: ContextVar[GitHubPriority] = ContextVar("github_priority", default=GitHubPriority.PROVISION)
+
+
+@contextmanager
+def github_priority(priority: GitHubPriority) -> Iterator[None]:
+    """Помечает все GitHub-запросы внутри блока классом приоритета."""
+    token = _github_priority.set(priority)
+    try:
+        yield
+    finally:
+        _github_priority.reset(token)
+
+
+def current_github_priority() -> GitHubPriority:
+    return _github_priority.get()
+
+
+@dataclass
+class _Waiter:
+    priority: GitHubPriority
+    seq: int
+    future: asyncio.Future
+
+
+@dataclass
+class _PriorityStats:
+    count: int = 0
+    total_wait_sec: float = 0.0
+    max_wait_sec: float = 0.0
+    throttled: int = 0
+
+
+class RateLimitGovernor:
+    """
+    Бюджет запросов одного токена GitHub.
+
+    - remaining/reset берутся из X-RateLimit-* заголовков каждого ответа;
+    - когда бюджет подходит к концу, низкоприоритетные запросы (поллинг,
+      затем провижининг) ждут сброса, оставляя остаток пушам;
+    - слоты раздаются по приоритету, затем по порядку поступления;
+    - на 403/429 (secondary limit) ставим паузу для всего токена
+      и вдвое режем параллельность, на успехах поднимаем её на 1 (AIMD).
+    """
+
+    def __init__(self, max_in_flight: int = GITHUB_MAX_IN_FLIGHT):
+        self.max_in_flight = max(1, max_in_flight)
+        self._concurrency = self.max_in_flight
+        self._in_flight = 0
+        self._waiters: List[_Waiter] = []
+        self._seq = itertools.count()
+
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None
+        self.reset_at = 0.0
+        self._pause_until = 0.0
+
+        self._stats: Dict[GitHubPriority, _PriorityStats] = {p: _PriorityStats() for p in GitHubPriority}
+
+    # =========================
+    # Budget
+    # =========================
+
+    def _reserve(self, priority: GitHubPriority) -> int:
+        if self.limit is None:
+            return 0
+        if priority == GitHubPriority.POLL:
+            return int(self.limit * GITHUB_RESERVE_FOR_PROVISION)
+        if priority == GitHubPriority.PROVISION:
+            return int(self.limit * GITHUB_RESERVE_FOR_PUSH)
+        return 0
+
+    def _delay_for(self, priority: GitHubPriority) -> float:
+        now = time.time()
+        if self._pause_until > now:
+            return self._pause_until - now
+        if (
+            self.remaining is not None
+            and self.remaining <= self._reserve(priority)
+            and self.reset_at > now
+        ):
+            return self.reset_at - now
+        return 0.0
+
+    # =========================
+    # Slots
+    # =========================
+
+    def _dispatch(self) -> None:
+        while self._in_flight < self._concurrency and self._waiters:
+            waiter = min(self._waiters, key=lambda w: (w.priority, w.seq))
+            self._waiters.remove(waiter)
+            if waiter.future.done():
+                continue
+            self._in_flight += 1
+            waiter.future.set_result(None)
+
+    async def _take_slot(self, priority: GitHubPriority) -> None:
+        if self._in_flight < self._concurrency and not self._waiters:
+            self._in_flight += 1
+            return
+
+        waiter = _Waiter(priority, next(self._seq), asyncio.get_running_loop().create_future())
+        self._waiters.append(waiter)
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            elif waiter.future.done() and not waiter.future.cancelled():
+                self.release()
+            raise
+
+    async def acquire(self, priority: GitHubPriority) -> float:
+        """Ждёт слот и бюджет; возвращает время ожидания (сек)."""
+        started = time.monotonic()
+        while True:
+            await self._take_slot(priority)
+            delay = self._delay_for(priority)
+            if delay <= 0:
+                break
+            # слот не держим, пока ждём бюджет: он нужен более приоритетным
+            self.release()
+            await asyncio.sleep(min(delay, GITHUB_WAIT_STEP_SEC))
+
+        if self.remaining is not None:
+            self.remaining = max(0, self.remaining - 1)
+
+        waited = time.monotonic() - started
+        st = self._stats[priority]
+        st.count += 1
+        st.total_wait_sec += waited
+        st.max_wait_sec = max(st.max_wait_sec, waited)
+        return waited
+
+    def release(self) -> None:
+        self._in_flight = max(0, self._in_flight - 1)
+        self._dispatch()
+
+    # =========================
+    # Feedback from responses
+    # =========================
+
+    def observe(self, status: int, headers: Mapping[str, str]) -> None:
+        h = {k.lower(): v for k, v in headers.items()}
+        if h.get("x-ratelimit-resource", "core") == "core" and "x-ratelimit-remaining" in h:
+            try:
+                self.remaining = int(h["x-ratelimit-remaining"])
+                self.limit = int(h.get("x-ratelimit-limit", self.limit or 0)) or self.limit
+                self.reset_at = float(h.get("x-ratelimit-reset", self.reset_at))
+            except ValueError:
+                pass
+
+        if status < 400 and self._concurrency < self.max_in_flight:
+            self._concurrency += 1
+            self._dispatch()
+
+    def throttle(self, delay: float, priority: GitHubPriority) -> None:
+        """Ответ 403/429 по лимиту: пауза для всех запросов токена."""
+        self._pause_until = max(self._pause_until, time.time() + delay)
+        self._concurrency = max(1, self._concurrency // 2)
+        self._stats[priority].throttled += 1
+        warning(f"[GITHUB_BUDGET] throttled ({priority.name}), пауза {delay:.1f}s, параллельность {self._concurrency}")
+
+    # =========================
+    # Metrics
+    # =========================
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        return {
+            "limit": self.limit,
+            "remaining": self.remaining,
+            "reset_in_sec": max(0, round(self.reset_at - now)) if self.reset_at else None,
+            "paused_for_sec": round(max(0.0, self._pause_until - now), 1),
+            "concurrency": self._concurrency,
+            "in_flight": self._in_flight,
+            "queued": {p.name.lower(): sum(1 for w in self._waiters if w.priority == p) for p in GitHubPriority},
+            "requests": {
+                p.name.lower(): {
+                    "count": st.count,
+                    "avg_wait_sec": round(st.total_wait_sec / st.count, 3) if st.count else 0.0,
+                    "max_wait_sec": round(st.max_wait_sec, 3),
+                    "throttled": st.throttled,
+                }
+                for p, st in self._stats.items()
+            },
+        }
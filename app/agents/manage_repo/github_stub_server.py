@@ -0,0 +1,624 @@
+"""
+In-memory заглушка GitHub REST API для локального стенда и тестов.
+
+Поддерживает только эндпоинты, которые вызывает AsyncGitHub.
+SHA блобов и деревьев считаются так же, как в git, поэтому
+кэши листингов и пропуск неизменённых файлов ведут себя как с GitHub.
+
+Запуск: python -m app.agents.manage_repo.github_stub_server
+и GITHUB_API_URL=http://127.0.0.1:8765 для приложения.
+С GITHUB_STUB_RUN_SEC > 0 workflow run'ы идут заданное время,
+а с GITHUB_STUB_WEBHOOK_URL или зарегистрированным вебхуком репозитория
+о завершении приходит подписанный workflow_run.
+Сборка успешна, если build_check (в тестах) не вернул текст ошибки:
+тогда job build падает с этим текстом в логе.
+"""
+import asyncio
+import base64
+import hashlib
+import io
+import itertools
+import json
+import os
+import time
+import zipfile
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from aiohttp import web
+
+from .git_objects import blob_sha, tree_sha
+from .github_webhook_simulator import deliver, workflow_run_event
+
+GITHUB_STUB_PORT = int(os.getenv("GITHUB_STUB_PORT", "8765"))
+GITHUB_STUB_LOGIN = os.getenv("GITHUB_STUB_LOGIN", "stub-user")
+GITHUB_STUB_RATE_LIMIT = int(os.getenv("GITHUB_STUB_RATE_LIMIT", "5000"))
+GITHUB_STUB_RUN_SEC = float(os.getenv("GITHUB_STUB_RUN_SEC", "0"))
+GITHUB_STUB_WEBHOOK_URL = os.getenv("GITHUB_STUB_WEBHOOK_URL", "")
+
+
+@dataclass
+class StubRepo:
+    name: str
+    owner: str
+    blobs: Dict[str, str] = field(default_factory=dict)
+    trees: Dict[str, Dict[str, str]] = field(default_factory=dict)
+    commits: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    refs: Dict[str, str] = field(default_factory=dict)
+    pages: Optional[Dict[str, Any]] = None
+    runs: List[Dict[str, Any]] = field(default_factory=list)
+    run_jobs: Dict[int, List[Dict[str, Any]]] = field(default_factory=dict)
+    job_logs: Dict[int, str] = field(default_factory=dict)
+    hooks: List[Dict[str, Any]] = field(default_factory=list)
+
+    def to_json(self, base_url: str) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "full_name": f"{self.owner}/{self.name}",
+            "html_url": f"{base_url}/{self.owner}/{self.name}",
+            "default_branch": "main",
+            "owner": {"login": self.owner},
+        }
+
+
+class StubState:
+    def __init__(
+        self,
+        login: str = GITHUB_STUB_LOGIN,
+        rate_limit: int = GITHUB_STUB_RATE_LIMIT,
+        run_sec: float = GITHUB_STUB_RUN_SEC,
+        webhook_url: str = GITHUB_STUB_WEBHOOK_URL,
+        webhook_secret: Optional[str] = None,
+        build_check: Optional[Callable[[Dict[str, str]], Optional[str]]] = None,
+    ):
+        self.login = login
+        self.repos: Dict[str, StubRepo] = {}
+        self.requests = 0
+        self.rate_limit = rate_limit
+        self.rate_remaining = rate_limit
+        self.rate_reset = int(time.time()) + 3600
+        self._run_ids = itertools.count(1)
+        self._hook_ids = itertools.count(1)
+        self._job_ids = itertools.count(1000)
+        self.build_check = build_check
+        self.run_sec = run_sec
+        self.webhook_url = webhook_url
+        self.webhook_secret = webhook_secret
+        self.webhooks_sent = 0
+        self._tasks: Set[asyncio.Task] = set()
+
+    def add_blob(self, repo: StubRepo, content: str) -> str:
+        sha = blob_sha(content)
+        repo.blobs[sha] = content
+        return sha
+
+    def add_tree(self, repo: StubRepo, listing: Dict[str, str]) -> str:
+        sha = tree_sha(listing)
+        repo.trees[sha] = listing
+        return sha
+
+    def add_commit(self, repo: StubRepo, message: str, tree: str, parents: List[str]) -> str:
+        payload = json.dumps([tree, parents, message, time.time()]).encode("utf-8")
+        sha = hashlib.sha1(payload).hexdigest()
+        repo.commits[sha] = {"sha": sha, "message": message, "tree": {"sha": tree}, "parents": [{"sha": p} for p in parents]}
+        return sha
+
+    def move_ref(self, repo: StubRepo, ref: str, sha: str) -> None:
+        repo.refs[ref] = sha
+        if ref == "heads/main" or ref.startswith("heads/fix/"):
+            # каждый push в main и fix/** «запускает» workflow, который успешен
+            # сразу или через run_sec секунд; деплой — только из main
+            run_id = next(self._run_ids)
+            now = _iso_now()
+            run = {
+                "id": run_id,
+                "name": "Deploy to GitHub Pages",
+                "head_sha": sha,
+                "head_commit": {"id": sha, "tree_id": repo.commits[sha]["tree"]["sha"]},
+                "head_branch": ref[len("heads/"):],
+                "event": "push",
+                "status": "in_progress",
+                "conclusion": None,
+                "created_at": now,
+                "run_started_at": now,
+                "updated_at": now,
+                "html_url": f"https://example.invalid/{repo.owner}/{repo.name}/actions/runs/{run_id}",
+            }
+            repo.runs.insert(0, run)
+            if self.run_sec > 0:
+                self._spawn(self._finish_run(repo, run, self.run_sec))
+            else:
+                self._complete_run(repo, run)
+                self._spawn(self._send_webhook(repo, run))
+
+    def files_at(self, repo: StubRepo, commit: str) -> Dict[str, str]:
+        listing = repo.trees.get(repo.commits[commit]["tree"]["sha"], {})
+        return {path: repo.blobs.get(sha, "") for path, sha in listing.items()}
+
+    def _complete_run(self, repo: StubRepo, run: Dict[str, Any]) -> None:
+        failure = self.build_check(self.files_at(repo, run["head_sha"])) if self.build_check else None
+        conclusion = "failure" if failure else "success"
+        deploys = run["head_branch"] == "main" and not failure
+
+        build_id, deploy_id = next(self._job_ids), next(self._job_ids)
+        repo.run_jobs[run["id"]] = [
+            {
+                "id": build_id,
+                "run_id": run["id"],
+                "name": "build",
+                "status": "completed",
+                "conclusion": conclusion,
+                "steps": [
+                    {"number": 1, "name": "Set up job", "status": "completed", "conclusion": "success"},
+                    {"number": 2, "name": "Build", "status": "completed", "conclusion": conclusion},
+                ],
+            },
+            {
+                "id": deploy_id,
+                "run_id": run["id"],
+                "name": "deploy",
+                "status": "completed",
+                "conclusion": "success" if deploys else "skipped",
+                "steps": [],
+            },
+        ]
+        repo.job_logs[build_id] = _job_log("npm run build", failure)
+        repo.job_logs[deploy_id] = _job_log("actions/deploy-pages", None) if deploys else ""
+        run.update(status="completed", conclusion=conclusion, updated_at=_iso_now())
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.get_running_loop().create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _finish_run(self, repo: StubRepo, run: Dict[str, Any], delay: float) -> None:
+        await asyncio.sleep(delay)
+        self._complete_run(repo, run)
+        await self._send_webhook(repo, run)
+
+    def _webhook_targets(self, repo: StubRepo, event: str) -> List[tuple]:
+        targets = [(self.webhook_url, self.webhook_secret)] if self.webhook_url else []
+        for hook in repo.hooks:
+            if hook["active"] and (event == "ping" or event in hook["events"]):
+                targets.append((hook["config"]["url"], hook["config"].get("secret")))
+        return targets
+
+    async def _send_webhook(self, repo: StubRepo, run: Dict[str, Any]) -> None:
+        payload = workflow_run_event(f"{repo.owner}/{repo.name}", dict(run))
+        for url, secret in self._webhook_targets(repo, "workflow_run"):
+            kwargs = {"secret": secret} if secret is not None else {}
+            try:
+                await deliver("workflow_run", payload, url=url, **kwargs)
+                self.webhooks_sent += 1
+            except Exception:
+                # недоставленный вебхук — как на GitHub: приложение увидит run поллингом
+                pass
+
+    def add_hook(self, repo: StubRepo, config: Dict[str, Any], events: List[str], active: bool = True) -> Dict[str, Any]:
+        hook = {"id": next(self._hook_ids), "name": "web", "active": active, "events": events, "config": dict(config)}
+        repo.hooks.append(hook)
+        self._spawn(self.send_ping(repo, hook))
+        return hook
+
+    async def send_ping(self, repo: StubRepo, hook: Dict[str, Any]) -> None:
+        """GitHub шлёт ping сразу после создания вебхука."""
+        payload = {"zen": "Keep it logically awesome.", "hook_id": hook["id"],
+                   "repository": {"full_name": f"{repo.owner}/{repo.name}", "name": repo.name}}
+        try:
+            await deliver("ping", payload, url=hook["config"]["url"], secret=hook["config"].get("secret") or "")
+            self.webhooks_sent += 1
+        except Exception:
+            pass
+
+
+def _iso_now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def _job_log(command: str, failure: Optional[str]) -> str:
+    stamp = _iso_now()
+    lines = [f"{stamp} ##[group]Run {command}", f"{stamp} ##[endgroup]"]
+    lines += [f"{stamp} progress {i}" for i in range(200)]
+    if failure:
+        lines += [f"{stamp} {line}" for line in failure.splitlines()]
+        lines.append(f"{stamp} ##[error]Process completed with exit code 1.")
+    return "\n".join(lines) + "\n"
+
+
+def _not_found() -> web.Response:
+    return web.json_response({"message": "Not Found"}, status=404)
+
+
+def _repo(request: web.Request) -> StubRepo:
+    state: StubState = request.app["state"]
+    repo = state.repos.get(request.match_info["repo"])
+    if repo is None or repo.owner != request.match_info["owner"]:
+        raise web.HTTPNotFound(text=json.dumps({"message": "Not Found"}), content_type="application/json")
+    return repo
+
+
+# =========================
+# Handlers
+# =========================
+
+async def get_user(request: web.Request) -> web.Response:
+    return web.json_response({"login": request.app["state"].login})
+
+
+async def get_repo(request: web.Request) -> web.Response:
+    return web.json_response(_repo(request).to_json(request.app["base_url"]))
+
+
+async def create_repo(request: web.Request) -> web.Response:
+    state: StubState = request.app["state"]
+    body = await request.json()
+    name = body["name"]
+    if name in state.repos:
+        return web.json_response({"message": "name already exists on this account"}, status=422)
+
+    repo = state.repos[name] = StubRepo(name=name, owner=state.login)
+    if body.get("auto_init"):
+        readme = state.add_blob(repo, f"# {name}\n")
+        tree = state.add_tree(repo, {"README.md": readme})
+        repo.refs["heads/main"] = state.add_commit(repo, "Initial commit", tree, [])
+
+    return web.json_response(repo.to_json(request.app["base_url"]), status=201)
+
+
+async def list_repos(request: web.Request) -> web.Response:
+    state: StubState = request.app["state"]
+    per_page = int(request.query.get("per_page", "30"))
+    page = int(request.query.get("page", "1"))
+    repos = sorted(state.repos.values(), key=lambda r: r.name)[(page - 1) * per_page: page * per_page]
+    return web.json_response([r.to_json(request.app["base_url"]) for r in repos])
+
+
+async def rename_repo(request: web.Request) -> web.Response:
+    state: StubState = request.app["state"]
+    repo = _repo(request)
+    body = await request.json()
+    new_name = body.get("name", repo.name)
+    if new_name != repo.name:
+        if new_name in state.repos:
+            return web.json_response({"message": "name already exists on this account"}, status=422)
+        del state.repos[repo.name]
+        repo.name = new_name
+        state.repos[new_name] = repo
+    return web.json_response(repo.to_json(request.app["base_url"]))
+
+
+async def delete_repo(request: web.Request) -> web.Response:
+    repo = _repo(request)
+    del request.app["state"].repos[repo.name]
+    return web.Response(status=204)
+
+
+async def list_commits(request: web.Request) -> web.Response:
+    repo = _repo(request)
+    head = repo.refs.get("heads/main")
+    if head is None:
+        return web.json_response({"message": "Git Repository is empty."}, status=409)
+
+    history: List[str] = []
+    while head:
+        history.append(head)
+        parents = repo.commits[head]["parents"]
+        head = parents[0]["sha"] if parents else None
+
+    per_page = int(request.query.get("per_page", "30"))
+    page = int(request.query.get("page", "1"))
+    items = history[(page - 1) * per_page: page * per_page]
+    last = max(1, -(-len(history) // per_page))
+
+    headers = {}
+    if last > 1:
+        url = f"{request.app['base_url']}{request.path}?per_page={per_page}"
+        headers["Link"] = f'<{url}&page={min(page + 1, last)}>; rel="next", <{url}&page={last}>; rel="last"'
+    return web.json_response([{"sha": sha} for sha in items], headers=headers)
+
+
+async def get_ref(request: web.Request) -> web.Response:
+    repo = _repo(request)
+    ref = request.match_info["ref"]
+    sha = repo.refs.get(ref)
+    if sha is None:
+        return _not_found()
+    return web.json_response({"ref": f"refs/{ref}", "object": {"sha": sha, "type": "commit"}})
+
+
+async def update_ref(request: web.Request) -> web.Response:
+    state: StubState = request.app["state"]
+    repo = _repo(request)
+    ref = request.match_info["ref"]
+    body = await request.json()
+
+    sha = body["sha"]
+    if sha not in repo.commits:
+        return web.json_response({"message": "Object does not exist"}, status=422)
+
+    current = repo.refs.get(ref)
+    if current and not body.get("force"):
+        # fast-forward: текущий HEAD должен быть предком нового коммита
+        node: Optional[str] = sha
+        while node and node != current:
+            parents = repo.commits[node]["parents"]
+            node = parents[0]["sha"] if parents else None
+        if node != current:
+            return web.json_response({"message": "Update is not a fast forward"}, status=422)
+
+    state.move_ref(repo, ref, sha)
+    return web.json_response({"ref": f"refs/{ref}", "object": {"sha": sha, "type": "commit"}})
+
+
+async def create_ref(request: web.Request) -> web.Response:
+    state: StubState = request.app["state"]
+    repo = _repo(request)
+    body = await request.json()
+
+    ref = body["ref"][len("refs/"):]
+    if ref in repo.refs:
+        return web.json_response({"message": "Reference already exists"}, status=422)
+    if body["sha"] not in repo.commits:
+        return web.json_response({"message": "Object does not exist"}, status=422)
+
+    state.move_ref(repo, ref, body["sha"])
+    return web.json_response({"ref": f"refs/{ref}", "object": {"sha": body["sha"], "type": "commit"}}, status=201)
+
+
+async def delete_ref(request: web.Request) -> web.Response:
+    repo = _repo(request)
+    if repo.refs.pop(request.match_info["ref"], None) is None:
+        return web.json_response({"message": "Reference does not exist"}, status=422)
+    return web.Response(status=204)
+
+
+async def get_commit(request: web.Request) -> web.Response:
+    commit = _repo(request).commits.get(request.match_info["sha"])
+    return web.json_response(commit) if commit else _not_found()
+
+
+async def create_commit(request: web.Request) -> web.Response:
+    state: StubState = request.app["state"]
+    repo = _repo(request)
+    body = await request.json()
+    if body["tree"] not in repo.trees:
+        return web.json_response({"message": "Tree SHA does not exist"}, status=422)
+    sha = state.add_commit(repo, body["message"], body["tree"], body.get("parents", []))
+    return web.json_response(repo.commits[sha], status=201)
+
+
+async def get_tree(request: web.Request) -> web.Response:
+    repo = _repo(request)
+    sha = request.match_info["sha"]
+    listing = repo.trees.get(sha)
+    if listing is None:
+        return _not_found()
+
+    entries = [{"path": path, "mode": "100644", "type": "blob", "sha": blob} for path, blob in sorted(listing.items())]
+    return web.json_response({"sha": sha, "tree": entries, "truncated": False})
+
+
+async def create_tree(request: web.Request) -> web.Response:
+    state: StubState = request.app["state"]
+    repo = _repo(request)
+    body = await request.json()
+
+    base = body.get("base_tree")
+    listing = dict(repo.trees.get(base, {})) if base else {}
+
+    for el in body["tree"]:
+        path = el["path"]
+        if "content" in el:
+            listing[path] = state.add_blob(repo, el["content"])
+        elif el.get("sha") is None:
+            listing.pop(path, None)
+        elif el["sha"] in repo.blobs:
+            listing[path] = el["sha"]
+        else:
+            return web.json_response({"message": f"Blob {el['sha']} does not exist"}, status=422)
+
+    sha = state.add_tree(repo, listing)
+    return web.json_response({"sha": sha, "truncated": False}, status=201)
+
+
+async def create_blob(request: web.Request) -> web.Response:
+    state: StubState = request.app["state"]
+    body = await request.json()
+    sha = state.add_blob(_repo(request), body["content"])
+    return web.json_response({"sha": sha}, status=201)
+
+
+async def put_pages(request: web.Request) -> web.Response:
+    repo = _repo(request)
+    body = await request.json()
+    repo.pages = {"build_type": body.get("build_type", "workflow")}
+    return web.json_response(repo.pages, status=201 if request.method == "POST" else 200)
+
+
+async def get_contents(request: web.Request) -> web.Response:
+    repo = _repo(request)
+    head = repo.refs.get("heads/main")
+    listing = repo.trees[repo.commits[head]["tree"]["sha"]] if head else {}
+    sha = listing.get(request.match_info["path"])
+    if sha is None:
+        return _not_found()
+
+    content = base64.b64encode(repo.blobs[sha].encode("utf-8")).decode("ascii")
+    return web.json_response({"path": request.match_info["path"], "sha": sha, "encoding": "base64", "content": content})
+
+
+async def put_contents(request: web.Request) -> web.Response:
+    state: StubState = request.app["state"]
+    repo = _repo(request)
+    path = request.match_info["path"]
+    body = await request.json()
+
+    head = repo.refs.get("heads/main")
+    listing = dict(repo.trees[repo.commits[head]["tree"]["sha"]]) if head else {}
+    if path in listing and body.get("sha") != listing[path]:
+        return web.json_response({"message": "sha wasn't supplied or does not match"}, status=409)
+
+    listing[path] = state.add_blob(repo, base64.b64decode(body["content"]).decode("utf-8"))
+    commit = state.add_commit(repo, body["message"], state.add_tree(repo, listing), [head] if head else [])
+    state.move_ref(repo, "heads/main", commit)
+    return web.json_response({"content": {"path": path, "sha": listing[path]}, "commit": {"sha": commit}}, status=201)
+
+
+def _hook_json(hook: Dict[str, Any]) -> Dict[str, Any]:
+    # секрет GitHub в ответах не отдаёт
+    config = {**hook["config"], "secret": "********"} if hook["config"].get("secret") else hook["config"]
+    return {**hook, "config": config}
+
+
+async def list_hooks(request: web.Request) -> web.Response:
+    return web.json_response([_hook_json(h) for h in _repo(request).hooks])
+
+
+async def create_hook(request: web.Request) -> web.Response:
+    state: StubState = request.app["state"]
+    repo = _repo(request)
+    body = await request.json()
+    if any(h["config"].get("url") == body["config"]["url"] for h in repo.hooks):
+        return web.json_response({"message": "Hook already exists on this repository"}, status=422)
+
+    hook = state.add_hook(repo, body["config"], body.get("events", ["push"]), body.get("active", True))
+    return web.json_response(_hook_json(hook), status=201)
+
+
+async def update_hook(request: web.Request) -> web.Response:
+    repo = _repo(request)
+    hook_id = int(request.match_info["hook_id"])
+    hook = next((h for h in repo.hooks if h["id"] == hook_id), None)
+    if hook is None:
+        return _not_found()
+
+    body = await request.json()
+    for key in ("active", "events"):
+        if key in body:
+            hook[key] = body[key]
+    if "config" in body:
+        hook["config"] = dict(body["config"])
+    return web.json_response(_hook_json(hook))
+
+
+async def list_runs(request: web.Request) -> web.Response:
+    runs = _repo(request).runs
+    head_sha = request.query.get("head_sha")
+    if head_sha:
+        runs = [r for r in runs if r["head_sha"] == head_sha]
+    per_page = int(request.query.get("per_page", "30"))
+    return web.json_response({"total_count": len(runs), "workflow_runs": runs[:per_page]})
+
+
+async def list_run_jobs(request: web.Request) -> web.Response:
+    jobs = _repo(request).run_jobs.get(int(request.match_info["run_id"]), [])
+    return web.json_response({"total_count": len(jobs), "jobs": jobs})
+
+
+async def get_job_logs(request: web.Request) -> web.Response:
+    log = _repo(request).job_logs.get(int(request.match_info["job_id"]))
+    return web.Response(text=log, content_type="text/plain") if log is not None else _not_found()
+
+
+async def get_run_logs(request: web.Request) -> web.Response:
+    repo = _repo(request)
+    jobs = repo.run_jobs.get(int(request.match_info["run_id"]))
+    if jobs is None:
+        return _not_found()
+
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as z:
+        for n, job in enumerate(jobs):
+            z.writestr(f"{n}_{job['name']}.txt", repo.job_logs.get(job["id"], ""))
+    return web.Response(body=buf.getvalue(), content_type="application/zip")
+
+
+async def get_run(request: web.Request) -> web.Response:
+    run_id = int(request.match_info["run_id"])
+    run = next((r for r in _repo(request).runs if r["id"] == run_id), None)
+    return web.json_response(run) if run else _not_found()
+
+
+@web.middleware
+async def rate_limit(request: web.Request, handler):
+    """Часовой бюджет как у GitHub: X-RateLimit-* в каждом ответе, 403 при исчерпании."""
+    state: StubState = request.app["state"]
+    state.requests += 1
+
+    now = time.time()
+    if now >= state.rate_reset:
+        state.rate_remaining = state.rate_limit
+        state.rate_reset = int(now) + 3600
+
+    headers = {
+        "X-RateLimit-Limit": str(state.rate_limit),
+        "X-RateLimit-Resource": "core",
+        "X-RateLimit-Reset": str(state.rate_reset),
+    }
+    if state.rate_remaining <= 0:
+        headers["X-RateLimit-Remaining"] = "0"
+        return web.json_response({"message": "API rate limit exceeded"}, status=403, headers=headers)
+
+    state.rate_remaining -= 1
+    try:
+        response = await handler(request)
+    except web.HTTPException as e:
+        headers["X-RateLimit-Remaining"] = str(state.rate_remaining)
+        e.headers.update(headers)
+        raise
+
+    if request.method == "GET" and response.status == 200 and isinstance(response.body, bytes):
+        etag = '"' + hashlib.sha1(response.body).hexdigest() + '"'
+        if request.headers.get("If-None-Match") == etag:
+            # условный запрос с 304 лимит не расходует
+            state.rate_remaining += 1
+            response = web.Response(status=304)
+        response.headers["ETag"] = etag
+
+    headers["X-RateLimit-Remaining"] = str(state.rate_remaining)
+    response.headers.update(headers)
+    return response
+
+
+def create_stub_app(state: Optional[StubState] = None, base_url: str = "") -> web.Application:
+    app = web.Application(middlewares=[rate_limit])
+    app["state"] = state or StubState()
+    app["base_url"] = base_url or f"http://127.0.0.1:{GITHUB_STUB_PORT}"
+
+    repo = "/repos/{owner}/{repo}"
+    app.add_routes([
+        web.get("/user", get_user),
+        web.get("/user/repos", list_repos),
+        web.post("/user/repos", create_repo),
+        web.get(repo, get_repo),
+        web.patch(repo, rename_repo),
+        web.delete(repo, delete_repo),
+        web.get(repo + "/commits", list_commits),
+        web.get(repo + "/git/ref/{ref:.+}", get_ref),
+        web.post(repo + "/git/refs", create_ref),
+        web.patch(repo + "/git/refs/{ref:.+}", update_ref),
+        web.delete(repo + "/git/refs/{ref:.+}", delete_ref),
+        web.get(repo + "/git/commits/{sha}", get_commit),
+        web.post(repo + "/git/commits", create_commit),
+        web.get(repo + "/git/trees/{sha}", get_tree),
+        web.post(repo + "/git/trees", create_tree),
+        web.post(repo + "/git/blobs", create_blob),
+        web.post(repo + "/pages", put_pages),
+        web.put(repo + "/pages", put_pages),
+        web.get(repo + "/contents/{path:.+}", get_contents),
+        web.put(repo + "/contents/{path:.+}", put_contents),
+        web.get(repo + "/hooks", list_hooks),
+        web.post(repo + "/hooks", create_hook),
+        web.patch(repo + "/hooks/{hook_id:\\d+}", update_hook),
+        web.get(repo + "/actions/runs", list_runs),
+        web.get(repo + "/actions/runs/{run_id:\\d+}", get_run),
+        web.get(repo + "/actions/runs/{run_id:\\d+}/jobs", list_run_jobs),
+        web.get(repo + "/actions/runs/{run_id:\\d+}/logs", get_run_logs),
+        web.get(repo + "/actions/jobs/{job_id:\\d+}/logs", get_job_logs),
+    ])
+    return app
+
+
+if __name__ == "__main__":
+    web.run_app(create_stub_app(), host="127.0.0.1", port=GITHUB_STUB_PORT)
@@ -0,0 +1,93 @@
+"""
+Локальный симулятор вебхуков GitHub: собирает payload'ы workflow_run /
+check_suite в формате GitHub, подписывает их секретом и отправляет
+в /webhooks/github.
+
+Используется заглушкой API (github_stub_server) и вручную:
+python -m app.agents.manage_repo.github_webhook_simulator owner/repo <sha> [success|failure]
+"""
+import asyncio
+import json
+import os
+import sys
+import uuid
+from typing import Any, Dict, Optional
+
+import aiohttp
+from dotenv import load_dotenv
+
+from .github_webhooks import GH_WEBHOOK_SECRET, sign_payload
+
+load_dotenv()
+
+GITHUB_WEBHOOK_URL = os.getenv("GITHUB_WEBHOOK_URL", "http://127.0.0.1:8000/webhooks/github")
+
+
+def workflow_run_event(full_name: str, run: Dict[str, Any], action: str = "completed") -> Dict[str, Any]:
+    return {
+        "action": action,
+        "workflow_run": run,
+        "repository": {"full_name": full_name, "name": full_name.partition("/")[2]},
+    }
+
+
+def check_suite_event(
+    full_name: str,
+    head_sha: str,
+    conclusion: Optional[str] = "success",
+    action: str = "completed",
+) -> Dict[str, Any]:
+    return {
+        "action": action,
+        "check_suite": {
+            "head_sha": head_sha,
+            "status": "completed" if conclusion else "in_progress",
+            "conclusion": conclusion,
+        },
+        "repository": {"full_name": full_name, "name": full_name.partition("/")[2]},
+    }
+
+
+async def deliver(
+    event: str,
+    payload: Dict[str, Any],
+    url: str = GITHUB_WEBHOOK_URL,
+    secret: str = GH_WEBHOOK_SECRET,
+    session: Optional[aiohttp.ClientSession] = None,
+) -> int:
+    """Отправляет событие как GitHub; возвращает HTTP-статус ответа."""
+    body = json.dumps(payload).encode("utf-8")
+    headers = {
+        "Content-Type": "application/json",
+        "X-GitHub-Event": event,
+        "X-GitHub-Delivery": str(uuid.uuid4()),
+        "X-Hub-Signature-256": sign_payload(body, secret),
+    }
+
+    if session is not None:
+        async with session.post(url, data=body, headers=headers) as resp:
+            return resp.status
+
+    async with aiohttp.ClientSession() as own:
+        async with own.post(url, data=body, headers=headers) as resp:
+            return resp.status
+
+
+async def _main(full_name: str, head_sha: str, conclusion: str) -> None:
+    run = {
+        "id": int(uuid.uuid4().int % 10**9),
+        "name": "Deploy to GitHub Pages",
+        "head_sha": head_sha,
+        "event": "push",
+        "status": "completed",
+        "conclusion": conclusion,
+        "html_url": f"https://github.com/{full_name}/actions",
+    }
+    print("workflow_run:", await deliver("workflow_run", workflow_run_event(full_name, run)))
+    print("check_suite:", await deliver("check_suite", check_suite_event(full_name, head_sha, conclusion)))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        sys.exit(__doc__)
+    asyncio.run(_main(sys.argv[1], sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else "success"))
@@ -0,0 +1,68 @@
+"""
+Вебхуки GitHub: workflow_run и check_suite.
+
+Событие будит монитор сборок (GitHubDeployService), который ждёт run
+по этому sha, вместо того чтобы ждать следующего поллинга.
+Завершённый workflow_run несёт статус и conclusion — успешная сборка
+резолвится без единого запроса к API.
+"""
+import hashlib
+import hmac
+import os
+from typing import Any, Dict, Optional
+
+from dotenv import load_dotenv
+
+from app.logger.console_logger import info, warning
+
+from .github_deploy_service import get_deploy_service
+
+load_dotenv()
+
+# пустой секрет — вебхуки выключены, монитор работает только поллингом
+GH_WEBHOOK_SECRET = os.getenv("GH_WEBHOOK_SECRET", "")
+# публичный адрес /webhooks/github: на него вебхук регистрируется в каждом репозитории
+GH_WEBHOOK_URL = os.getenv("GH_WEBHOOK_URL", "")
+
+WEBHOOK_EVENTS = ("workflow_run", "check_suite")
+
+
+def sign_payload(body: bytes, secret: str) -> str:
+    """Значение X-Hub-Signature-256 для тела запроса."""
+    return "sha256=" + hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+
+
+def verify_signature(body: bytes, signature: str, secret: Optional[str] = None) -> bool:
+    secret = GH_WEBHOOK_SECRET if secret is None else secret
+    if not secret or not signature:
+        return False
+    return hmac.compare_digest(sign_payload(body, secret), signature)
+
+
+def dispatch_event(event: str, payload: Dict[str, Any]) -> bool:
+    """Передаёт событие монитору сборок; True — кто-то ждал этот sha."""
+    full_name = (payload.get("repository") or {}).get("full_name") or ""
+    owner, _, repo = full_name.partition("/")
+    if not owner or not repo:
+        if event in WEBHOOK_EVENTS:
+            warning(f"[WEBHOOK] {event} без repository.full_name")
+        return False
+
+    service = get_deploy_service()
+    # подписанная доставка (в том числе ping при создании) — вебхук репозитория работает,
+    # поллинг его сборок можно сделать редким
+    service.mark_webhook(owner, repo)
+    if event not in WEBHOOK_EVENTS:
+        return False
+
+    if event == "workflow_run":
+        run = payload.get("workflow_run") or {}
+        head_sha = run.get("head_sha") or ""
+    else:
+        # у check_suite нет id run'а — только будим монитор, run он найдёт сам
+        run = None
+        head_sha = (payload.get("check_suite") or {}).get("head_sha") or ""
+
+    matched = service.notify_run(owner, repo, head_sha, run)
+    info(f"[WEBHOOK] {event}/{payload.get('action')} {full_name}@{head_sha[:12]} matched={matched}")
+    return matched
@@ -0,0 +1,351 @@
+"""
+Локальная проверка файлов проекта перед push (pre-flight).
+
+Ловит то, что иначе всплывает только через 2–10 минут GitHub Actions:
+- синтаксис JSON, YAML (если установлен PyYAML) и Python;
+- синтаксис TS/JSX/JS настоящим парсером: esbuild, если он есть, иначе
+  node --check для JS (эвристик нет — ложная ошибка остановила бы push);
+- относительные импорты, которые не находятся среди файлов проекта;
+- опционально — PREFLIGHT_BUILD_CMD в отдельной рабочей копии проекта
+  (тайм-аут, свой process group, окружение без секретов).
+
+Результат — WorkflowResult(conclusion="preflight_failed") с диагностиками,
+который fix-цикл обрабатывает так же, как упавшую сборку в CI.
+"""
+import ast
+import json
+import os
+import posixpath
+import re
+import resource
+import shutil
+import signal
+import subprocess
+import tempfile
+from typing import Dict, Iterable, List, Optional
+
+from dotenv import load_dotenv
+
+from app.agents.context.symbol_index import JS_EXTENSIONS, PY_EXTENSIONS, parse_file, resolve_import
+from app.logger.console_logger import info, warning
+
+from .build_diagnostics import Diagnostic, extract_diagnostics, format_diagnostics
+from .github_deploy_service import WorkflowResult
+
+try:
+    import yaml
+except ImportError:  # YAML проверяется, только если PyYAML есть в окружении
+    yaml = None
+
+load_dotenv()
+
+PREFLIGHT_ENABLED = os.getenv("PREFLIGHT_ENABLED", "true").lower() == "true"
+# node для `node --check`; пусто — JS без esbuild не проверяется
+PREFLIGHT_NODE = os.getenv("PREFLIGHT_NODE", "node")
+# esbuild для синтаксиса TS/JSX; пусто — ищется в PATH
+PREFLIGHT_ESBUILD = os.getenv("PREFLIGHT_ESBUILD", "")
+# например: "cd frontend && npm install --no-audit --no-fund && npm run build"
+PREFLIGHT_BUILD_CMD = os.getenv("PREFLIGHT_BUILD_CMD", "")
+PREFLIGHT_BUILD_TIMEOUT_SEC = int(os.getenv("PREFLIGHT_BUILD_TIMEOUT_SEC", "300"))
+PREFLIGHT_BUILD_CPU_SEC = int(os.getenv("PREFLIGHT_BUILD_CPU_SEC", "600"))
+PREFLIGHT_DIR = os.getenv("PREFLIGHT_DIR", ".preflight")
+
+# JSON с комментариями (tsconfig и т.п.) строгим json не проверяем
+_JSONC_NAMES = re.compile(r"(^|/)(tsconfig[\w.-]*|jsconfig[\w.-]*|\.eslintrc[\w.-]*)\.json$")
+_YAML_EXTENSIONS = (".yml", ".yaml")
+_NODE_CHECK_EXTENSIONS = (".js", ".mjs", ".cjs")
+_MANIFEST = ".preflight_manifest.json"
+# из окружения сборки убираем всё, кроме необходимого: без токенов и ключей
+_BUILD_ENV_KEYS = ("PATH", "LANG", "LC_ALL", "NODE_OPTIONS", "npm_config_cache")
+
+_ESBUILD_LOADERS = {".ts": "ts", ".tsx": "tsx", ".js": "js", ".jsx": "jsx", ".mjs": "js", ".cjs": "js"}
+_ESM_RE = re.compile(r"^\s*(?:import|export)\b", re.MULTILINE)
+
+
+# =========================
+# Syntax checks
+# =========================
+
+def _check_json(path: str, content: str) -> List[Diagnostic]:
+    if _JSONC_NAMES.search(path):
+        return []
+    try:
+        json.loads(content)
+    except json.JSONDecodeError as e:
+        return [Diagnostic(path, e.lineno, "json", e.msg)]
+    return []
+
+
+def _check_yaml(path: str, content: str) -> List[Diagnostic]:
+    if yaml is None:
+        return []
+    try:
+        list(yaml.safe_load_all(content))
+    except yaml.YAMLError as e:
+        mark = getattr(e, "problem_mark", None)
+        problem = getattr(e, "problem", None) or str(e).splitlines()[0]
+        return [Diagnostic(path, mark.line + 1 if mark else None, "yaml", problem)]
+    return []
+
+
+def _check_python(path: str, content: str) -> List[Diagnostic]:
+    try:
+        ast.parse(content, filename=path)
+    except SyntaxError as e:
+        return [Diagnostic(path, e.lineno, type(e).__name__, e.msg)]
+    except ValueError as e:
+        return [Diagnostic(path, None, "SyntaxError", str(e))]
+    return []
+
+
+def _esbuild() -> Optional[str]:
+    return PREFLIGHT_ESBUILD or shutil.which("esbuild")
+
+
+def warn_if_no_ts_parser() -> None:
+    """Вызывается один раз при старте: без esbuild синтаксис TS/TSX до CI не проверяется."""
+    if PREFLIGHT_ENABLED and not _esbuild():
+        warning(
+            "[PREFLIGHT] esbuild не найден: синтаксис TS/TSX перед push не проверяется "
+            "(установите esbuild или задайте PREFLIGHT_ESBUILD)"
+        )
+
+
+def _check_esbuild(path: str, content: str) -> List[Diagnostic]:
+    """Настоящий парсер TS/JSX: esbuild transform из stdin, без сборки и node_modules."""
+    esbuild = _esbuild()
+    if not esbuild:
+        return []
+
+    loader = _ESBUILD_LOADERS[posixpath.splitext(path)[1]]
+    try:
+        proc = subprocess.run(
+            [esbuild, f"--loader={loader}", f"--sourcefile={path}", "--log-level=error", "--color=false"],
+            input=content,
+            capture_output=True,
+            text=True,
+            timeout=30,
+        )
+    except (OSError, subprocess.TimeoutExpired) as e:
+        warning(f"[PREFLIGHT] esbuild недоступен: {e}")
+        return []
+
+    if proc.returncode == 0:
+        return []
+    # ✘ [ERROR] Expected ";" but found "x"\n\n    src/App.tsx:3:5:
+    return extract_diagnostics([(path, proc.stderr)])
+
+
+def _check_node(path: str, content: str) -> List[Diagnostic]:
+    if not PREFLIGHT_NODE:
+        return []
+
+    suffix = posixpath.splitext(path)[1]
+    if suffix == ".js":
+        # по расширению node выбирает ESM или CommonJS
+        suffix = ".mjs" if _ESM_RE.search(content) else ".cjs"
+    with tempfile.NamedTemporaryFile("w", suffix=suffix, delete=False, encoding="utf-8") as f:
+        f.write(content)
+        tmp = f.name
+    try:
+        proc = subprocess.run(
+            [PREFLIGHT_NODE, "--check", tmp],
+            capture_output=True,
+            text=True,
+            timeout=30,
+        )
+    except (OSError, subprocess.TimeoutExpired) as e:
+        warning(f"[PREFLIGHT] node --check недоступен: {e}")
+        return []
+    finally:
+        os.unlink(tmp)
+
+    if proc.returncode == 0:
+        return []
+
+    # <tmp>:3\n<строка>\n   ^\n\nSyntaxError: Unexpected token ...
+    err = proc.stderr
+    m_line = re.search(re.escape(tmp) + r":(\d+)", err)
+    m_msg = re.search(r"^(\w*Error): (.+)$", err, re.MULTILINE)
+    if not m_msg:
+        return []
+    return [Diagnostic(path, int(m_line.group(1)) if m_line else None, m_msg.group(1), m_msg.group(2))]
+
+
+def check_syntax(path: str, content: str) -> List[Diagnostic]:
+    if path.endswith(".json"):
+        return _check_json(path, content)
+    if path.endswith(_YAML_EXTENSIONS):
+        return _check_yaml(path, content)
+    if path.endswith(PY_EXTENSIONS):
+        return _check_python(path, content)
+    if path.endswith(JS_EXTENSIONS):
+        # push блокирует только настоящий парсер; нет esbuild — TS/JSX проверят CI и импорты
+        if _esbuild():
+            return _check_esbuild(path, content)
+        if path.endswith(_NODE_CHECK_EXTENSIONS):
+            return _check_node(path, content)
+        return []
+    return []
+
+
+# =========================
+# Imports
+# =========================
+
+def _is_local_spec(path: str, spec: str) -> bool:
+    if path.endswith(PY_EXTENSIONS):
+        return spec.startswith(".")
+    return spec.startswith(".") or spec.startswith("@/")
+
+
+def _spec_line(content: str, spec: str) -> Optional[int]:
+    pos = content.find(spec)
+    return content.count("\n", 0, pos) + 1 if pos >= 0 else None
+
+
+def check_imports(path: str, content: str, file_set: set) -> List[Diagnostic]:
+    symbols = parse_file(path, content)
+    if symbols is None:
+        return []
+
+    out = []
+    for spec in symbols.imports:
+        if not _is_local_spec(path, spec):
+            continue
+        if resolve_import(path, spec, file_set) is None:
+            out.append(Diagnostic(path, _spec_line(content, spec), "import", f"Cannot resolve '{spec}'"))
+    return out
+
+
+# =========================
+# Sandboxed build
+# =========================
+
+def _sync_workdir(workdir: str, files: Dict[str, str]) -> None:
+    """Рабочая копия проекта: node_modules и кэши между запусками сохраняются."""
+    os.makedirs(workdir, exist_ok=True)
+    manifest_path = os.path.join(workdir, _MANIFEST)
+    try:
+        with open(manifest_path, encoding="utf-8") as f:
+            previous = set(json.load(f))
+    except (OSError, ValueError):
+        previous = set()
+
+    for path in previous - set(files):
+        try:
+            os.unlink(os.path.join(workdir, path))
+        except OSError:
+            pass
+
+    for path, content in files.items():
+        target = os.path.join(workdir, path)
+        if os.path.commonpath([os.path.abspath(target), os.path.abspath(workdir)]) != os.path.abspath(workdir):
+            continue
+        try:
+            with open(target, encoding="utf-8") as f:
+                if f.read() == content:
+                    continue
+        except OSError:
+            pass
+        os.makedirs(os.path.dirname(target) or workdir, exist_ok=True)
+        with open(target, "w", encoding="utf-8") as f:
+            f.write(content)
+
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(sorted(files), f)
+
+
+def _limit_child() -> None:
+    resource.setrlimit(resource.RLIMIT_CPU, (PREFLIGHT_BUILD_CPU_SEC, PREFLIGHT_BUILD_CPU_SEC))
+
+
+def run_build(workdir: str, files: Dict[str, str], cmd: str = PREFLIGHT_BUILD_CMD) -> List[Diagnostic]:
+    _sync_workdir(workdir, files)
+
+    env = {key: os.environ[key] for key in _BUILD_ENV_KEYS if key in os.environ}
+    env.update({"HOME": os.path.abspath(workdir), "CI": "1"})
+
+    proc = subprocess.Popen(
+        ["/bin/sh", "-c", cmd],
+        cwd=workdir,
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        start_new_session=True,
+        preexec_fn=_limit_child,
+    )
+    try:
+        output, _ = proc.communicate(timeout=PREFLIGHT_BUILD_TIMEOUT_SEC)
+    except subprocess.TimeoutExpired:
+        os.killpg(proc.pid, signal.SIGKILL)
+        proc.communicate()
+        return [Diagnostic("", None, "timeout", f"{cmd} не завершилась за {PREFLIGHT_BUILD_TIMEOUT_SEC}s")]
+
+    if proc.returncode == 0:
+        return []
+
+    text = output.decode("utf-8", errors="replace")[-200_000:]
+    found = extract_diagnostics([("build", text)])
+    if found:
+        return found
+    tail = "\n".join(text.splitlines()[-30:])
+    return [Diagnostic("", None, f"exit {proc.returncode}", f"{cmd}\n{tail}".rstrip())]
+
+
+# =========================
+# Entry point
+# =========================
+
+def files_after(files: Dict[str, str], operations: Iterable[Dict[str, str]]) -> Dict[str, str]:
+    """Файлы проекта после операций — без записи в БД (кандидаты исправлений)."""
+    result = dict(files)
+    for op in operations:
+        if op["op"] in ("create", "update"):
+            result[op["path"]] = op.get("content", "")
+        elif op["op"] == "delete":
+            result.pop(op["path"], None)
+    return result
+
+
+
+def preflight_check(
+    project_id: str,
+    files: Dict[str, str],
+    operations: Iterable[Dict[str, str]],
+    build_cmd: str = PREFLIGHT_BUILD_CMD,
+) -> Optional[WorkflowResult]:
+    """
+    files — все файлы проекта после применения operations.
+    None — проверки прошли; иначе результат для fix-цикла.
+    """
+    if not PREFLIGHT_ENABLED:
+        return None
+
+    operations = list(operations)
+    file_set = set(files)
+    changed = [op["path"] for op in operations if op["op"] in ("create", "update") and op["path"] in files]
+    # после удаления файла проверяем импорты всех файлов: кто-то мог ссылаться на удалённый
+    import_targets = list(files) if any(op["op"] == "delete" for op in operations) else changed
+
+    diagnostics: List[Diagnostic] = []
+    for path in changed:
+        diagnostics += check_syntax(path, files[path])
+    for path in import_targets:
+        diagnostics += check_imports(path, files[path], file_set)
+
+    if not diagnostics and build_cmd:
+        diagnostics = run_build(os.path.join(PREFLIGHT_DIR, project_id), files, build_cmd)
+
+    if not diagnostics:
+        info(f"[PREFLIGHT] {project_id}: ok ({len(changed)} файлов)")
+        return None
+
+    info(f"[PREFLIGHT] {project_id}: {len(diagnostics)} ошибок, push в CI не делаем")
+    return WorkflowResult(
+        ok=False,
+        conclusion="preflight_failed",
+        workflow_name="preflight",
+        error_text=format_diagnostics(diagnostics),
+        diagnostics=diagnostics,
+    )
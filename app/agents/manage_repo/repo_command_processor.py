@@ -54,7 +54,7 @@ class RepoCommandProcessor:
         except Exception:
             return None
 
-    def _maybe_unescape_content(self, content: Any) -> Any:
+    def maybe_unescape_content(self, content: Any) -> Any:
         """
         Приводит content к "сырому" тексту файла.
         Убирает двойное экранирование, которое часто возвращают LLM:
@@ -105,7 +105,7 @@ class RepoCommandProcessor:
                     files.append(
                         {
                             "path": item["path"],
-                            "content": self._maybe_unescape_content(item["content"]),
+                            "content": self.maybe_unescape_content(item["content"]),
                             "op": op,
                         }
                     )
@@ -1,49 +1,77 @@
+import asyncio
 import os
-from typing import Any, List, Dict
+import subprocess
+from typing import Any, List, Dict, Tuple
 import uuid
 import time
-from github import BadCredentialsException, Github, Auth, GithubException, InputGitTreeElement
-from github.Repository import Repository
-from github.AuthenticatedUser import AuthenticatedUser
-from github.GitRef import GitRef
 from dotenv import load_dotenv
 from app.logger.console_logger import error, info, success
+from .async_github import AsyncGitHub, GitHubAPIError, get_github
+from .github_rate_limit import GitHubPriority, github_priority
+from .git_mirror import GIT_TRANSPORT, GitMirror, GitMirrorError
+from .git_objects import blob_sha, tree_sha
 
 
 load_dotenv()
 
+# файлы до этого размера передаются inline в create_git_tree, без отдельного blob
+INLINE_BLOB_MAX_BYTES = int(os.getenv("INLINE_BLOB_MAX_BYTES", str(32 * 1024)))
+BLOB_UPLOAD_CONCURRENCY = int(os.getenv("BLOB_UPLOAD_CONCURRENCY", "8"))
+TREE_CACHE_SIZE = int(os.getenv("TREE_CACHE_SIZE", "256"))
+
+# листинги деревьев {tree_sha: {path: blob_sha}} — SHA дерева неизменяем,
+# поэтому кэш общий для всех проектов
+_tree_listings: Dict[str, Dict[str, str]] = {}
+
+# {repo_name: (head_sha, tree_sha)} main, каким его оставил наш последний push:
+# следующему push не нужно читать ref и коммит с GitHub
+_repo_heads: Dict[str, Tuple[str, str]] = {}
+
 GH_PAT = os.getenv("GH_PAT")
 if not GH_PAT:
     raise EnvironmentError("Установите GH_PAT в .env")
 
-try:
-    token = GH_PAT
-    auth = Auth.Token(GH_PAT)
-    gh = Github(auth=auth)
-    user = gh.get_user()
-    info(f"GitHub auth OK. Login:{user.login}")
-except BadCredentialsException as e:
-    raise RuntimeError("GH_PAT неверный или без прав") from e
+token = GH_PAT
+github = get_github(GH_PAT)
+
+
+async def github_login() -> str:
+    try:
+        return await github.login()
+    except GitHubAPIError as e:
+        if e.status == 401:
+            raise RuntimeError("GH_PAT неверный или без прав") from e
+        raise
 
 
 class RepoManager:
-    def __init__(self, project_id: uuid.UUID):
+    def __init__(self, project_id: uuid.UUID, owner: str, repo: Dict[str, Any] | None = None):
         self.project_id = project_id
-        self.user = user
-        self.gh = gh
+        self.github: AsyncGitHub = github
         self.token = token
+        self.owner = owner
         self.repo_name: str | None = None
         self.repo_url: str | None = None
-        self.repo_obj: Repository | None = None
+        self.repo_obj: Dict[str, Any] | None = None
+        self.set_repo(repo)
 
+    @classmethod
+    async def load(cls, project_id: uuid.UUID) -> "RepoManager":
+        owner = await github_login()
         try:
-            self.repo_obj = self.user.get_repo(f"project-{project_id}")
-            self.repo_url = self.repo_obj.html_url
-            self.repo_name = self.repo_obj.name
-        except GithubException:
-            self.repo_obj = None
+            repo = await github.get_repo(owner, f"project-{project_id}")
+        except GitHubAPIError as e:
+            if e.status != 404:
+                error(f"[REPO_MANAGER] Не удалось получить репозиторий: {e}")
+            repo = None
+        return cls(project_id, owner, repo)
 
-    def _wait_for_main_branch(self, timeout=5.0) -> GitRef | None:
+    def set_repo(self, repo: Dict[str, Any] | None) -> None:
+        self.repo_obj = repo
+        self.repo_name = repo["name"] if repo else None
+        self.repo_url = repo["html_url"] if repo else None
+
+    async def _wait_for_main_branch(self, timeout=5.0) -> Dict[str, Any] | None:
         if not self.repo_obj:
             error(f"[REPO_MANAGER] Репозиторий не найден или не инициализирован")
             return None
@@ -51,114 +79,338 @@ class RepoManager:
         start = time.time()
         while time.time() - start < timeout:
             try:
-                return self.repo_obj.get_git_ref("heads/main")
-            except GithubException:
-                time.sleep(0.3)
+                return await self.github.get_ref(self.owner, self.repo_name, "heads/main")  # type: ignore
+            except GitHubAPIError:
+                await asyncio.sleep(0.3)
         raise RuntimeError("Main branch did not appear after repo creation")
 
-    def create_repo(self, name: str, private: bool = False) -> None:
+    async def head(self, refresh: bool = False) -> Tuple[str, str] | None:
+        """(head_sha, tree_sha) ветки main; без refresh — локально отслеживаемое значение."""
+        if not self.repo_obj:
+            return None
+
+        known = None if refresh else _repo_heads.get(self.repo_name)  # type: ignore
+        if known:
+            return known
+
+        ref = await self._wait_for_main_branch()
+        if not ref:
+            return None
+
+        head_sha = ref["object"]["sha"]
+        commit = await self.github.get_commit(self.owner, self.repo_name, head_sha)  # type: ignore
+        _repo_heads[self.repo_name] = (head_sha, commit["tree"]["sha"])  # type: ignore
+        return _repo_heads[self.repo_name]  # type: ignore
+
+    def forget_head(self) -> None:
+        """main сдвинут мимо push_commit (contents API): head перечитается с GitHub."""
+        _repo_heads.pop(self.repo_name, None)  # type: ignore
+
+    async def create_repo(self, name: str, private: bool = False) -> None:
         try:
             try:
-                self.repo_obj = self.user.get_repo(name)
-                self.repo_name = self.repo_obj.name
-                self.repo_url = self.repo_obj.html_url
+                self.set_repo(await self.github.get_repo(self.owner, name))
 
-            except GithubException:
-                if not isinstance(self.user, AuthenticatedUser):
-                    error(f"[REPO_MANAGER] Создание репы. Не правильный юзер")
-                    return None
+            except GitHubAPIError as e:
+                if e.status != 404:
+                    raise
 
-                self.repo_obj = self.user.create_repo(
-                    name=name, private=private, auto_init=True
-                )
-                self.repo_name = self.repo_obj.name
-                self.repo_url = self.repo_obj.html_url
+                self.set_repo(await self.github.create_repo(name=name, private=private, auto_init=True))
 
-                self._wait_for_main_branch()
+                await self._wait_for_main_branch()
                 success(f"[REPO_MANAGER] Репозиторий создан: {self.repo_url}")
 
-        except GithubException as e:
+        except GitHubAPIError as e:
             error(f"[REPO_MANAGER] Ошибка создания репозитория {e}")
 
-    def delete_repo(self) -> None:
+    async def delete_repo(self) -> None:
         if not self.repo_obj:
             error(f"[REPO_MANAGER] Ошибка удаления. Такой репы не существует")
             return None
 
         try:
-            repo = self.user.get_repo(self.repo_obj.name)
-            repo.delete()
-
-            self.repo_obj = None
-            self.repo_name = None
-            self.repo_url = None
+            await self.github.delete_repo(self.owner, self.repo_name)  # type: ignore
+            _repo_heads.pop(self.repo_name, None)  # type: ignore
+            self.set_repo(None)
 
             success("Репозиторий удалён.")
 
-        except GithubException as e:
+        except GitHubAPIError as e:
             error(f"[REPO_MANAGER]Ошибка GitHub API при удалении: {e}")
 
         except Exception as e:
             error(f"[REPO_MANAGER]Ошибка удаления: {e}")
 
-    def push_commit(self, operations: List[Dict[str, Any]], message: str) -> str | None:
+    @staticmethod
+    def _tree_blob(path: str, sha: Any = None, content: str | None = None) -> Dict[str, Any]:
+        element: Dict[str, Any] = {"path": path, "mode": "100644", "type": "blob"}
+        if content is not None:
+            element["content"] = content
+        else:
+            # sha=None удаляет файл из base_tree
+            element["sha"] = sha
+        return element
+
+    async def create_blob(self, content: str) -> str:
+        blob = await self.github.create_blob(self.owner, self.repo_name, content)  # type: ignore
+        return blob["sha"]
+
+    async def _create_blobs(self, contents: Dict[str, str]) -> Dict[str, str]:
+        """{path: content} -> {path: sha}; одинаковое содержимое грузится один раз."""
+        if not contents or not self.repo_obj:
+            return {}
+
+        by_sha = {blob_sha(content): content for content in contents.values()}
+        semaphore = asyncio.Semaphore(BLOB_UPLOAD_CONCURRENCY)
+
+        async def upload(content: str) -> str:
+            async with semaphore:
+                return await self.create_blob(content)
+
+        shas = list(by_sha)
+        results = await asyncio.gather(*(upload(by_sha[sha]) for sha in shas))
+        created = dict(zip(shas, results))
+
+        return {path: created[blob_sha(content)] for path, content in contents.items()}
+
+    # ==========================================================
+    # BASE TREE (для пропуска неизменённых файлов)
+    # ==========================================================
+    async def _tree_listing(self, tree_sha: str) -> Dict[str, str] | None:
+        """{path: blob_sha} для рекурсивного дерева; кэшируется по SHA дерева."""
+        if tree_sha in _tree_listings:
+            return _tree_listings[tree_sha]
+
+        try:
+            tree = await self.github.get_tree(self.owner, self.repo_name, tree_sha, recursive=True)  # type: ignore
+        except GitHubAPIError as e:
+            error(f"[REPO_MANAGER] Не удалось получить дерево {tree_sha}: {e}")
+            return None
+
+        if tree.get("truncated"):
+            return None
+
+        listing = {el["path"]: el["sha"] for el in tree["tree"] if el["type"] == "blob"}
+        self._cache_listing(tree_sha, listing)
+        return listing
+
+    @staticmethod
+    def _cache_listing(tree_sha: str, listing: Dict[str, str]) -> None:
+        _tree_listings[tree_sha] = listing
+        while len(_tree_listings) > TREE_CACHE_SIZE:
+            _tree_listings.pop(next(iter(_tree_listings)))
+
+    def _remember_tree(
+        self,
+        tree_sha: str,
+        base_listing: Dict[str, str] | None,
+        operations: List[Dict[str, Any]],
+    ) -> None:
+        """Новое дерево считаем локально, без повторного запроса листинга."""
+        if base_listing is None:
+            return
+        self._cache_listing(tree_sha, self._apply_operations(base_listing, operations))
+
+    @staticmethod
+    def _apply_operations(base_listing: Dict[str, str], operations: List[Dict[str, Any]]) -> Dict[str, str]:
+        listing = dict(base_listing)
+        for op in operations:
+            if op["op"] in ("create", "update"):
+                listing[op["path"]] = blob_sha(op["content"])
+            elif op["op"] == "delete":
+                listing.pop(op["path"], None)
+        return listing
+
+    async def tree_after(self, operations: List[Dict[str, Any]]) -> str | None:
+        """
+        SHA дерева main после push операций, посчитанный локально.
+        None — листинг текущего дерева неизвестен (например, обрезан GitHub).
+        """
+        head = await self.head()
+        if not head:
+            return None
+
+        base_listing = await self._tree_listing(head[1])
+        if base_listing is None:
+            return None
+        return tree_sha(self._apply_operations(base_listing, operations))
+
+    @staticmethod
+    def _changed_operations(
+        operations: List[Dict[str, Any]],
+        base_listing: Dict[str, str] | None,
+    ) -> List[Dict[str, Any]]:
+        if base_listing is None:
+            return operations
+
+        changed = []
+        for op in operations:
+            path = op["path"]
+            if op["op"] in ("create", "update"):
+                if base_listing.get(path) == blob_sha(op["content"]):
+                    continue
+            elif op["op"] == "delete":
+                if path not in base_listing:
+                    continue
+            changed.append(op)
+        return changed
+
+    def _push_via_mirror(self, operations: List[Dict[str, Any]], message: str) -> str | None:
+        """Коммит через локальное зеркало и git push. None — откатываемся на REST."""
+        mirror = GitMirror.for_repo(self.token, self.owner, self.repo_name)  # type: ignore
+        try:
+            return mirror.push_commit(operations, message)
+        except (GitMirrorError, OSError, subprocess.SubprocessError) as e:
+            error(f"[REPO_MANAGER] git mirror недоступен, используем REST: {e}")
+            return None
+
+    async def push_commit(
+        self,
+        operations: List[Dict[str, Any]],
+        message: str,
+        blob_shas: Dict[str, str] | None = None,
+        branch: str = "main",
+    ) -> str | None:
+        """
+        blob_shas — {path: sha} блобов, уже загруженных заранее (BlobUploadPipeline).
+        Для них create_git_blob не вызывается.
+        branch != "main" — коммит поверх main в новую ветку (кандидаты исправлений);
+        main при этом не двигается.
+        """
+        with github_priority(GitHubPriority.PUSH):
+            return await self._push_commit(operations, message, blob_shas or {}, branch)
+
+    async def _push_commit(
+        self,
+        operations: List[Dict[str, Any]],
+        message: str,
+        blob_shas: Dict[str, str],
+        branch: str = "main",
+    ) -> str | None:
         if not self.repo_obj:
             error(f"[REPO_MANAGER] Репозиторий не инициализирован")
             return None
 
+        # ветки кандидатов создаются через REST: зеркало отслеживает только main
+        if GIT_TRANSPORT == "mirror" and branch == "main":
+            sha = await asyncio.to_thread(self._push_via_mirror, operations, message)
+            if sha is not None:
+                # дерево нового коммита локально неизвестно — перечитаем при следующем push
+                _repo_heads.pop(self.repo_name, None)  # type: ignore
+                return sha
+
         try:
-            ref = self._wait_for_main_branch()
-            if not ref:
-                error(f"[REPO_MANAGER] ref === None")
-                return None
-
-            latest_commit = self.repo_obj.get_git_commit(ref.object.sha)
-            tree_elements: List[InputGitTreeElement] = []
-
-            for op in operations:
-                path = op["path"]
-
-                if op["op"] in ("create", "update"):
-                    blob = self.repo_obj.create_git_blob(
-                        op["content"], "utf-8")
-                    tree_elements.append(
-                        InputGitTreeElement(
-                            path=path,
-                            mode="100644",
-                            type="blob",
-                            sha=blob.sha,
-                        )
-                    )
-
-                elif op["op"] == "delete":
-                    tree_elements.append(
-                        InputGitTreeElement(
-                            path=path,
-                            mode="100644",
-                            type="blob",
-                            sha=None,
-                        )
-                    )
-
-            # 2. Создаём новое дерево
-            new_tree = self.repo_obj.create_git_tree(
-                tree=tree_elements, base_tree=latest_commit.tree
-            )
-
-            # 3. Создаём коммит
-            new_commit = self.repo_obj.create_git_commit(
-                message=message,
-                tree=new_tree,
-                parents=[latest_commit],
-            )
-
-            # 4. Передвигаем HEAD
-            ref.edit(new_commit.sha)
-
-            success(f"Коммит создан: {new_commit.sha}")
-            return new_commit.sha
-
-        except GithubException as e:
+            # main может уйти вперёд мимо нас (Pages, ручной коммит):
+            # тогда ref не сдвинется как fast-forward — перечитываем head и повторяем
+            for attempt in range(2):
+                head = await self.head(refresh=attempt > 0)
+                if not head:
+                    error(f"[REPO_MANAGER] ref === None")
+                    return None
+
+                try:
+                    return await self._commit_on(head, operations, message, blob_shas, branch)
+                except GitHubAPIError as e:
+                    if e.status != 422 or attempt > 0 or branch != "main":
+                        raise
+                    info(f"[REPO_MANAGER] main изменился на GitHub, перечитываем head")
+
+            return None
+
+        except GitHubAPIError as e:
             return f"Ошибка Github API: {e}"
         except Exception as e:
             return f"Ошибка batch commit: {e}"
+
+    async def _commit_on(
+        self,
+        head: Tuple[str, str],
+        operations: List[Dict[str, Any]],
+        message: str,
+        blob_shas: Dict[str, str],
+        branch: str = "main",
+    ) -> str:
+        owner, repo = self.owner, self.repo_name
+        head_sha, base_tree_sha = head
+        base_listing = await self._tree_listing(base_tree_sha)
+
+        operations = self._changed_operations(operations, base_listing)
+        if not operations:
+            info(f"[REPO_MANAGER] Изменений относительно main нет — коммит пропущен")
+            return head_sha
+
+        tree_elements: List[Dict[str, Any]] = []
+        large_blobs: Dict[str, str] = {}
+
+        for op in operations:
+            path = op["path"]
+
+            if op["op"] in ("create", "update"):
+                content = op["content"]
+                sha = blob_shas.get(path)
+
+                if sha is not None and sha == blob_sha(content):
+                    tree_elements.append(self._tree_blob(path, sha=sha))
+                elif len(content.encode("utf-8")) <= INLINE_BLOB_MAX_BYTES:
+                    # маленькие файлы уходят прямо в payload дерева
+                    tree_elements.append(self._tree_blob(path, content=content))
+                else:
+                    large_blobs[path] = content
+
+            elif op["op"] == "delete":
+                tree_elements.append(self._tree_blob(path, sha=None))
+
+        # 1. Большие блобы — параллельно
+        for path, sha in (await self._create_blobs(large_blobs)).items():
+            tree_elements.append(self._tree_blob(path, sha=sha))
+
+        # 2. Создаём новое дерево
+        new_tree = await self.github.create_tree(owner, repo, tree_elements, base_tree=base_tree_sha)  # type: ignore
+
+        # 3. Создаём коммит
+        new_commit = await self.github.create_commit(
+            owner, repo, message=message, tree=new_tree["sha"], parents=[head_sha]  # type: ignore
+        )
+
+        # 4. Передвигаем HEAD (или создаём ветку кандидата)
+        self._remember_tree(new_tree["sha"], base_listing, operations)
+        if branch == "main":
+            await self.github.update_ref(owner, repo, "heads/main", new_commit["sha"])  # type: ignore
+            _repo_heads[repo] = (new_commit["sha"], new_tree["sha"])  # type: ignore
+        else:
+            await self.github.create_ref(owner, repo, f"refs/heads/{branch}", new_commit["sha"])  # type: ignore
+
+        success(f"Коммит создан: {new_commit['sha']} ({branch})")
+        return new_commit["sha"]
+
+    # ==========================================================
+    # BRANCHES
+    # ==========================================================
+    async def fast_forward_main(self, sha: str, tree: str | None = None) -> bool:
+        """
+        Переводит main на коммит из ветки без нового коммита.
+        False — main ушёл вперёд и sha больше не его потомок.
+        """
+        with github_priority(GitHubPriority.PUSH):
+            try:
+                await self.github.update_ref(self.owner, self.repo_name, "heads/main", sha)  # type: ignore
+            except GitHubAPIError as e:
+                if e.status != 422:
+                    raise
+                info(f"[REPO_MANAGER] main нельзя перемотать на {sha[:12]}: {e}")
+                return False
+
+        if tree:
+            _repo_heads[self.repo_name] = (sha, tree)  # type: ignore
+        else:
+            _repo_heads.pop(self.repo_name, None)  # type: ignore
+        return True
+
+    async def delete_branch(self, branch: str) -> None:
+        with github_priority(GitHubPriority.PUSH):
+            try:
+                await self.github.delete_ref(self.owner, self.repo_name, f"heads/{branch}")  # type: ignore
+            except GitHubAPIError as e:
+                # ветки могло и не быть: кандидат без изменений не создаёт ref
+                if e.status not in (404, 422):
+                    error(f"[REPO_MANAGER] Не удалось удалить ветку {branch}: {e}")
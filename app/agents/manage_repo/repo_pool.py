@@ -0,0 +1,166 @@
+import asyncio
+import os
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from dotenv import load_dotenv
+
+from app.logger.console_logger import error, info, success
+
+from .async_github import GitHubAPIError
+from .deployment_manager import DeploymentManager
+from .repo_manager import github, github_login
+
+load_dotenv()
+
+# 0 — пул выключен, репозитории создаются синхронно при создании проекта
+REPO_POOL_SIZE = int(os.getenv("REPO_POOL_SIZE", "0"))
+REPO_POOL_PREFIX = os.getenv("REPO_POOL_PREFIX", "pool-")
+REPO_POOL_PRIVATE = os.getenv("REPO_POOL_PRIVATE", "false").lower() == "true"
+# повтор неудачной подготовки: пауза удваивается от BASE до MAX
+REPO_POOL_RETRY_BASE_SEC = float(os.getenv("REPO_POOL_RETRY_BASE_SEC", "5"))
+REPO_POOL_RETRY_MAX_SEC = float(os.getenv("REPO_POOL_RETRY_MAX_SEC", "300"))
+
+
+class RepoPool:
+    """
+    Пул заранее подготовленных репозиториев (auto_init, Pages, workflow, вебхук).
+
+    - готовые репозитории называются pool-<id>, недоделанные — pool-pending-<id>;
+      после рестарта готовые находятся листингом, недоделанные доводятся;
+    - take(name) переименовывает готовый репозиторий в репозиторий проекта
+      и в фоне запускает пополнение пула;
+    - неудачная подготовка повторяется с растущей паузой, слот остаётся занятым.
+    """
+
+    def __init__(self, size: int = REPO_POOL_SIZE, prefix: str = REPO_POOL_PREFIX):
+        self.size = size
+        self.prefix = prefix
+        self.pending_prefix = f"{prefix}pending-"
+        self._ready: List[Dict[str, Any]] = []
+        self._provisioning = 0
+        self._tasks: Set[asyncio.Task] = set()
+
+    # =========================
+    # Lifecycle
+    # =========================
+
+    def start(self) -> None:
+        if self.size <= 0:
+            return
+        self._spawn(self._discover())
+
+    async def stop(self) -> None:
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    @staticmethod
+    async def _retry(what: str, attempt: Callable[[], Awaitable[Any]]) -> Any:
+        delay = REPO_POOL_RETRY_BASE_SEC
+        while True:
+            try:
+                return await attempt()
+            except (GitHubAPIError, RuntimeError) as e:
+                error(f"[REPO_POOL] {what}: {e}; повтор через {delay:.0f} с")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, REPO_POOL_RETRY_MAX_SEC)
+
+    async def _discover(self) -> None:
+        async def list_repos():
+            return await github_login(), await github.list_user_repos()
+
+        owner, repos = await self._retry("Не удалось получить список репозиториев", list_repos)
+        for repo in repos:
+            name = repo["name"]
+            if name.startswith(self.pending_prefix):
+                self._provisioning += 1
+                self._spawn(self._fill_slot(repo))
+            elif name.startswith(self.prefix):
+                self._ready.append(repo)
+
+        info(f"[REPO_POOL] найдено готовых: {len(self._ready)}, недоделанных: {self._provisioning}")
+        self.refill()
+
+    # =========================
+    # Pool
+    # =========================
+
+    def refill(self) -> None:
+        missing = self.size - len(self._ready) - self._provisioning
+        for _ in range(max(0, missing)):
+            self._provisioning += 1
+            self._spawn(self._fill_slot())
+
+    async def _fill_slot(self, repo: Optional[Dict[str, Any]] = None) -> None:
+        """Один слот пула: создаёт (если repo нет) и готовит репозиторий до успеха."""
+        async def attempt() -> None:
+            nonlocal repo
+            owner = await github_login()
+            if repo is None:
+                repo = await github.create_repo(
+                    f"{self.pending_prefix}{uuid.uuid4().hex[:12]}", private=REPO_POOL_PRIVATE, auto_init=True
+                )
+            # созданный pending-репозиторий при повторе доводится, а не создаётся заново
+            await self._provision(owner, repo)
+
+        try:
+            await self._retry("Ошибка подготовки репозитория", attempt)
+        finally:
+            self._provisioning -= 1
+
+    async def _provision(self, owner: str, repo: Dict[str, Any]) -> None:
+        name = repo["name"]
+        await self._wait_for_main_branch(owner, name)
+
+        deployment = DeploymentManager(github=github, owner=owner, repo=name)
+        await deployment.enable_pages()
+        await deployment.push_actions_workflow()
+        await deployment.register_webhook()
+
+        # готовность фиксируется именем: после рестарта такой репозиторий берётся как есть
+        ready = await github.rename_repo(owner, name, f"{self.prefix}{uuid.uuid4().hex[:12]}")
+        self._ready.append(ready)
+        success(f"[REPO_POOL] Репозиторий готов: {ready['name']} (в пуле {len(self._ready)})")
+
+    @staticmethod
+    async def _wait_for_main_branch(owner: str, name: str, timeout: float = 10.0) -> None:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while loop.time() < deadline:
+            try:
+                await github.get_ref(owner, name, "heads/main")
+                return
+            except GitHubAPIError:
+                await asyncio.sleep(0.3)
+        raise RuntimeError(f"Main branch did not appear in {name}")
+
+    async def take(self, name: str) -> Optional[Dict[str, Any]]:
+        """Готовый репозиторий, переименованный в name; None — пул пуст."""
+        if self.size <= 0:
+            return None
+
+        try:
+            owner = await github_login()
+            while self._ready:
+                repo = self._ready.pop(0)
+                try:
+                    return await github.rename_repo(owner, repo["name"], name)
+                except GitHubAPIError as e:
+                    # репозиторий могли удалить руками — берём следующий
+                    error(f"[REPO_POOL] Не удалось взять {repo['name']}: {e}")
+            info(f"[REPO_POOL] Пул пуст — создаём репозиторий синхронно")
+            return None
+        finally:
+            self.refill()
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": self.size, "ready": len(self._ready), "provisioning": self._provisioning}
+
+
+repo_pool = RepoPool()
@@ -1,30 +1,49 @@
 from typing import List, Dict
 import uuid
-from github import GithubException
 
-from app.logger.console_logger import error
+from app.logger.console_logger import error, success
 
+from .async_github import GitHubAPIError
+from .github_deploy_service import get_deploy_service
+from .github_rate_limit import GitHubPriority, github_priority
 from .repo_manager import RepoManager
+from .repo_pool import repo_pool
 from app.agents.manage_repo.deployment_manager import DeploymentManager
 
 
 class RepositoryService:
-    def __init__(self, project_id: uuid.UUID):
+    def __init__(self, project_id: uuid.UUID, manager: RepoManager):
         self.project_id = project_id
-        self.manager = RepoManager(project_id)
+        self.manager = manager
         self.deployment: DeploymentManager | None = None
+        self._fix_branches: bool | None = None
 
-    def create_repo(self, name: str) -> None:
+    @classmethod
+    async def load(cls, project_id: uuid.UUID) -> "RepositoryService":
+        return cls(project_id, await RepoManager.load(project_id))
+
+    async def create_repo(self, name: str) -> None:
         if not self.manager.repo_obj:
-            self.manager.create_repo(name)
+            pooled = await repo_pool.take(name)
+            if pooled:
+                # Pages и workflow в репозитории из пула уже настроены
+                self.manager.set_repo(pooled)
+                self._init_deployment()
+                success(f"[RepositoryService] Репозиторий из пула: {self.manager.repo_url}")
+                # вебхук создан при подготовке; подтверждается под новым именем
+                await self.ensure_webhook()
+                return
+
+            await self.manager.create_repo(name)
             self._init_deployment()
 
             if not self.deployment:
                 error(f"[RepositoryService] deployment не инициализирован")
                 return
 
-            self.deployment.enable_pages()
-            self.deployment.push_actions_workflow()
+            await self.deployment.enable_pages()
+            await self.deployment.push_actions_workflow()
+            await self.ensure_webhook()
 
         self._init_deployment()
 
@@ -32,22 +51,67 @@ class RepositoryService:
             error(f"[RepositoryService] deployment не инициализирован")
             return
 
-        self.deployment.update_pages()
+        await self.deployment.update_pages()
+
+    async def ensure_webhook(self) -> None:
+        """Регистрирует вебхук сборок; с ним монитор поллит этот репозиторий только как страховку."""
+        if not self.deployment:
+            self._init_deployment()
+        if not self.deployment:
+            return
+
+        if await self.deployment.register_webhook():
+            get_deploy_service().mark_webhook(self.manager.owner, self.manager.repo_name)  # type: ignore
+
+    async def supports_fix_branches(self) -> bool:
+        """
+        Собирает ли CI ветки fix/** — без этого кандидатам гонки нечего ждать.
+        Workflow репозиториев, созданных раньше, обновляется один раз.
+        """
+        if self._fix_branches is not None:
+            return self._fix_branches
 
-    def delete_repo(self) -> None:
-        self.manager.delete_repo()
+        if not self.deployment:
+            self._init_deployment()
+        if not self.deployment:
+            return False
+
+        supported = await self.deployment.builds_fix_branches()
+        if not supported:
+            await self.deployment.update_actions_workflow()
+            # коммит с workflow сделан через contents API: ветки кандидатов должны идти от него
+            self.manager.forget_head()
+            supported = await self.deployment.builds_fix_branches()
+            if supported:
+                success(f"[RepositoryService] workflow обновлён: сборка веток fix/**")
+
+        self._fix_branches = supported
+        return supported
+
+    async def delete_repo(self) -> None:
+        await self.manager.delete_repo()
         self.deployment = None
 
-    def push(self, files: List[Dict[str, str]]) -> str | None:
+    async def push(
+        self,
+        files: List[Dict[str, str]],
+        blob_shas: Dict[str, str] | None = None,
+        branch: str = "main",
+    ) -> str | None:
+        with github_priority(GitHubPriority.PUSH):
+            has_commits = await self._has_commits()
+
         commit_msg = (
             "Initial commit – full project"
-            if not self._has_commits()
-            else "Patch update"
+            if not has_commits
+            else "Patch update" if branch == "main" else f"Fix candidate ({branch})"
         )
 
-        result = self.manager.push_commit(
+        result = await self.manager.push_commit(
             operations=files,
             message=commit_msg,
+            blob_shas=blob_shas,
+            branch=branch,
         )
 
         if not result:
@@ -55,12 +119,12 @@ class RepositoryService:
 
         return result
 
-    def info(self) -> Dict[str, str]:
-        login = getattr(self.manager.user, "login", None)
+    async def info(self) -> Dict[str, str]:
+        login = self.manager.owner
         repo_name = self.manager.repo_name or "not-created"
         pages_link = f"https://{login}.github.io/{repo_name}/" if login else "n/a"
         commits_count = str(
-            self.manager.repo_obj.get_commits().totalCount
+            await self.manager.github.count_commits(login, repo_name)
             if self.manager.repo_obj
             else 0
         )
@@ -74,16 +138,20 @@ class RepositoryService:
         }
 
     def _init_deployment(self) -> None:
+        if not self.manager.repo_name:
+            self.deployment = None
+            return
+
         self.deployment = DeploymentManager(
-            repo_obj=self.manager.repo_obj, gh=self.manager.gh, user=self.manager.user
+            github=self.manager.github, owner=self.manager.owner, repo=self.manager.repo_name
         )
 
-    def _has_commits(self) -> bool:
+    async def _has_commits(self) -> bool:
         if not self.manager.repo_obj:
             return False
 
         try:
-            commits = self.manager.repo_obj.get_commits()
-            return commits.totalCount > 0
-        except GithubException:
+            # head отслеживается локально после каждого push — без подсчёта коммитов
+            return await self.manager.head() is not None
+        except (GitHubAPIError, RuntimeError):
             return False
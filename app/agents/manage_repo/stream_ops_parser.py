@@ -0,0 +1,108 @@
+import json
+from typing import Any, Dict, List, Optional
+
+from .repo_command_processor import RepoCommandProcessor
+
+
+class StreamingOpsParser:
+    """
+    Инкрементальный парсер ответа агента вида
+    {"create":[{...}], "update":[{...}], "delete":[{...}]}.
+
+    feed(chunk) возвращает операции, чей объект закрылся в этом чанке,
+    не дожидаясь конца ответа. Текст до первой '{' (например ```json)
+    и после закрытия корневого объекта (строка ГОТОВО) игнорируется.
+    """
+
+    OPS = ("create", "update", "delete")
+
+    def __init__(self, processor: Optional[RepoCommandProcessor] = None):
+        self._processor = processor or RepoCommandProcessor()
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._done = False
+
+        self._key_chars: List[str] = []
+        self._last_key: Optional[str] = None
+        self._array_op: Optional[str] = None
+
+        self._item_chars: List[str] = []
+        self._in_item = False
+
+    @property
+    def done(self) -> bool:
+        return self._done
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        ops: List[Dict[str, Any]] = []
+        if self._done or not chunk:
+            return ops
+
+        for ch in chunk:
+            if self._in_item:
+                self._item_chars.append(ch)
+
+            if self._in_string:
+                if self._depth == 1:
+                    self._key_chars.append(ch)
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._last_key = "".join(self._key_chars[:-1])
+                continue
+
+            if ch == '"':
+                if self._depth == 0:
+                    continue
+                self._in_string = True
+                if self._depth == 1:
+                    self._key_chars = []
+            elif ch in "{[":
+                if self._depth == 2 and ch == "{" and self._array_op:
+                    self._in_item = True
+                    self._item_chars = [ch]
+                if self._depth == 1 and ch == "[":
+                    self._array_op = self._last_key if self._last_key in self.OPS else None
+                self._depth += 1
+            elif ch in "}]":
+                if self._depth == 0:
+                    continue
+                self._depth -= 1
+                if self._depth == 2 and ch == "}" and self._in_item:
+                    self._in_item = False
+                    op = self._parse_item("".join(self._item_chars))
+                    if op is not None:
+                        ops.append(op)
+                elif self._depth == 1 and ch == "]":
+                    self._array_op = None
+                elif self._depth == 0:
+                    self._done = True
+                    break
+
+        return ops
+
+    def _parse_item(self, text: str) -> Optional[Dict[str, Any]]:
+        try:
+            item = json.loads(text)
+        except json.JSONDecodeError:
+            return None
+
+        if not isinstance(item, dict) or "path" not in item:
+            return None
+
+        if self._array_op == "delete":
+            return {"path": item["path"], "op": "delete"}
+
+        if "content" not in item:
+            return None
+
+        return {
+            "path": item["path"],
+            "content": self._processor.maybe_unescape_content(item["content"]),
+            "op": self._array_op,
+        }
@@ -1,39 +1,63 @@
+from app.agents.agent_scheduler import AgentScheduler
 from app.agents.ai_agents import (
-    get_ai_agents_by_ids,
-    product_manager,
-    contract_agent,
+    AI_AGENT_ROLES,
+    agent_pool,
+    get_ai_agent_ids,
 )
-from app.agents.manage_repo.github_deploy_service import GitHubDeployService, WorkflowResult
+from app.agents.manage_repo.github_deploy_service import GitHubDeployService, WorkflowResult, get_deploy_service
+from .manage_repo.blob_upload_pipeline import BlobUploadPipeline
+from .manage_repo.build_diagnostics import format_diagnostics, resolve_paths
+from .manage_repo.fix_knowledge import fingerprint, known_fixes, remember_fix
+from .manage_repo.preflight import files_after, preflight_check
 from .manage_repo.repo_command_processor import RepoCommandProcessor
+from .manage_repo.stream_ops_parser import StreamingOpsParser
 from .manage_repo.repository_service import RepositoryService
-from typing import AsyncGenerator, Dict
+from contextlib import AsyncExitStack, aclosing
+from typing import AsyncGenerator, Awaitable, Callable, Dict
+from dotenv import load_dotenv
+import asyncio
+import dataclasses
+import os
 import uuid
 
 from app.agents.context.build_agent_context import build_agent_context
 from app.agents.context.project_context_service import ProjectContextService
+from app.agents.llm.dispatcher import LLMPriority, llm_call_context
 from app.agents.prompts import build_fix_prompt, generate_agent_prompt
+from app.agents.stream_markers import done_line_detector, tz_done_detector
 
 from autogen_agentchat.messages import ModelClientStreamingChunkEvent
 from autogen_agentchat.base import TaskResult
 from autogen_agentchat.agents import AssistantAgent
 
-from app.logger.console_logger import info, error
+from app.logger.console_logger import info, error, warning
 from app.status.enums import AgentTask, ProjectStage
 import app.status.status_helpers as status
 
+load_dotenv()
+
 BUILD_CHECK_AGENTS: set[str] = {"Frontend"}
 
+# FIX_RACE_CANDIDATES > 1 — кандидаты исправления генерируются параллельно и собираются
+# в своих ветках fix/*; стоимость ограничена: кандидаты × FIX_RACE_ROUNDS вызовов агента
+FIX_RACE_CANDIDATES = int(os.getenv("FIX_RACE_CANDIDATES", "1"))
+FIX_RACE_ROUNDS = int(os.getenv("FIX_RACE_ROUNDS", "2"))
+
 
 class BuildFailed(Exception):
     pass
 
 
-max_fix_rounds = 5
-repo_services: Dict[uuid.UUID, RepositoryService] = {}
+class PreflightFailed(Exception):
+    def __init__(self, result: WorkflowResult):
+        super().__init__(result.error_text)
+        self.result = result
 
 
-def _tz_done(text: str) -> bool:
-    return "ТЗ завершено" in text
+max_fix_rounds = 5
+repo_services: Dict[uuid.UUID, RepositoryService] = {}
+# параллельные агенты одного проекта пушат в main по очереди
+push_locks: Dict[uuid.UUID, asyncio.Lock] = {}
 
 
 def _build_pm_task(user_message: str, history: list[dict]) -> str:
@@ -69,15 +93,19 @@ async def run_product_manager_stream(
 
     task = _build_pm_task(user_message, history)
 
-    async for msg in product_manager.run_stream(task=task):
-        if isinstance(msg, ModelClientStreamingChunkEvent):
-            content = getattr(msg, "content", "")
-            if content:
-                yield content
+    with llm_call_context(project_id, LLMPriority.CHAT):
+        async with agent_pool.acquire("product_manager") as product_manager:
+            async for msg in product_manager.run_stream(task=task):
+                if isinstance(msg, ModelClientStreamingChunkEvent):
+                    content = getattr(msg, "content", "")
+                    if content:
+                        yield content
 
 
 async def build_contract(project_id, specification) -> str:
-    result = await contract_agent.run(task=_build_contract_task(project_id, specification))
+    with llm_call_context(project_id, LLMPriority.CONTRACT):
+        async with agent_pool.acquire("contract") as contract_agent:
+            result = await contract_agent.run(task=_build_contract_task(project_id, specification))
 
     if result.messages:
         return (result.messages[-1].content or "").strip()  # type: ignore
@@ -93,17 +121,80 @@ def _strip_json_fences(text: str) -> str:
     return t.strip()
 
 
-def _get_repo_service(project_id: uuid.UUID) -> RepositoryService:
+async def _get_repo_service(project_id: uuid.UUID) -> RepositoryService:
     if project_id not in repo_services:
-        repo_services[project_id] = RepositoryService(project_id)
+        service = await RepositoryService.load(project_id)
+        # репозитории, созданные до вебхуков, получают его при первой работе с проектом
+        await service.ensure_webhook()
+        repo_services[project_id] = service
     return repo_services[project_id]
 
 
-async def _rebuild_agent_context(agent, project_id: uuid.UUID, task: str):
+async def _apply_and_push(
+    project_id: uuid.UUID,
+    context_service: ProjectContextService,
+    repo_service: RepositoryService,
+    commands: list,
+    applied: list | None = None,
+    pipeline: BlobUploadPipeline | None = None,
+    preflight: bool = False,
+) -> str | None:
+    lock = push_locks.setdefault(project_id, asyncio.Lock())
+    applied = applied or []
+    # операция, записанная при стриминге, но пропавшая из итогового ответа, тоже уходит в GitHub
+    commands = _merge_commands(applied, commands)
+    blob_shas = await pipeline.result() if pipeline else {}
+
+    def apply_files() -> WorkflowResult | None:
+        # операции, записанные во время стриминга, второй раз не пишем
+        context_service.apply_files([cmd for cmd in commands if cmd not in applied])
+        context_service.refresh(commands)
+        if preflight:
+            return preflight_check(str(project_id), context_service.all_files(), commands)
+        return None
+
+    async with lock:
+        failed = await asyncio.to_thread(apply_files)
+        if failed:
+            # файлы уже в БД, но в GitHub не уходят: CI на заведомо битом коммите не запускаем
+            raise PreflightFailed(failed)
+        return await repo_service.push(commands, blob_shas=blob_shas)
+
+
+def _merge_commands(pending: list, commands: list) -> list:
+    """Неотправленные операции + новые; по одному пути остаётся последняя."""
+    merged = {cmd["path"]: cmd for cmd in pending}
+    merged.update((cmd["path"], cmd) for cmd in commands)
+    return list(merged.values())
+
+
+def _streamed_apply(
+    context_service: ProjectContextService,
+    applied: list,
+    pipeline: BlobUploadPipeline,
+) -> Callable[[dict], Awaitable[None]]:
+    async def on_op(op: dict) -> None:
+        # блоб начинает грузиться в GitHub параллельно с записью в БД
+        pipeline.submit(op)
+        await asyncio.to_thread(context_service.apply_files, [op])
+        applied.append(op)
+
+    return on_op
+
+
+async def _rebuild_agent_context(
+    agent,
+    project_id: uuid.UUID,
+    task: str,
+    focus_paths: list[str] | None = None,
+    fix_paths: list[str] | None = None,
+):
     new_ctx = await build_agent_context(
         agent_name=agent.name,
         project_id=project_id,
         task=task,
+        focus_paths=focus_paths,
+        fix_paths=fix_paths,
     )
 
     await agent.model_context.clear()
@@ -122,59 +213,359 @@ async def _check_build_on_success(
     processor,
     deploy_service: GitHubDeployService,
     commands: list,
+    applied: list,
+    pipeline: BlobUploadPipeline,
 ) -> str:
-    def push_or_raise(cmds: list) -> str:
-        context_service.apply_operations(cmds)
-        sha = repo_service.push(cmds)
+    # операции, не прошедшие pre-flight: в БД они есть, в репозитории — нет
+    unpushed: list = []
+
+    async def push_and_build(
+        cmds: list, applied_cmds: list, cmds_pipeline: BlobUploadPipeline | None
+    ) -> tuple[str | None, WorkflowResult]:
+        nonlocal unpushed
+        cmds = _merge_commands(unpushed, _merge_commands(applied_cmds, cmds))
+        try:
+            sha = await _apply_and_push(
+                project_id, context_service, repo_service, cmds, unpushed + applied_cmds, cmds_pipeline,
+                preflight=True,
+            )
+        except PreflightFailed as e:
+            unpushed = cmds
+            return None, e.result
+
+        unpushed = []
         if not sha:
             raise BuildFailed("push failed (no sha)")
-        return sha
+        info(f"[BUILD] sha: {sha}")
+        build = await _wait_and_get_build(deploy_service, repo_service, project_id=project_id, agent_name=agent.name, head_sha=sha)
+        files = await asyncio.to_thread(context_service.all_files)
+        return sha, _with_project_paths(build, files)
 
-    sha = push_or_raise(commands)
-    info(f"[BUILD] sha: {sha}")
-    build = await _wait_and_get_build(deploy_service, project_id=project_id, agent_name=agent.name, head_sha=sha)
+    sha, build = await push_and_build(commands, applied, pipeline)
     if build.ok:
         return sha
 
     error(f"[BUILD] is ok: {build.ok}")
-    for round_idx in range(1, max_fix_rounds + 1):
-        fix_task = build_fix_prompt(specification, agent.name, build)
-        fix_agent_result = await _run_agent_and_get_result(project_id, agent, fix_task)
-        fix_commands = processor.parse_task_result(fix_agent_result)
-        sha = push_or_raise(fix_commands)
-        info(f"[BUILD] retry fix build sha: {sha}")
-        build = await _wait_and_get_build(deploy_service, project_id=project_id, agent_name=agent.name, head_sha=sha)
+
+    # отпечатки ошибок этого цикла: {fp: (число диагностик, диагностики, файлы на момент ошибки)}
+    failures: Dict[str, tuple[int, list, dict]] = {}
+    # файлы, которые меняли раунды исправления: другие агенты в diff не попадают
+    fixed_paths: set[str] = set()
+
+    async def record_failure(failed: WorkflowResult) -> str | None:
+        fp = fingerprint(failed.diagnostics)
+        if fp is None:
+            return None
+
+        seen = failures.get(fp)
+        if seen is not None:
+            if len(failed.diagnostics) >= seen[0]:
+                # та же ошибка и не меньше — дальнейшие раунды тратят CI и LLM впустую
+                raise BuildFailed(
+                    f"Build failure {fp} repeated without progress; "
+                    f"last run: {failed.run_url}, conclusion={failed.conclusion}"
+                )
+            failures[fp] = (len(failed.diagnostics), seen[1], seen[2])
+            return fp
+
+        files = await asyncio.to_thread(context_service.all_files)
+        failures[fp] = (len(failed.diagnostics), failed.diagnostics, files)
+        return fp
+
+    async def succeeded(green_sha: str) -> str:
+        # diff от каждой встреченной ошибки до зелёного состояния — в базу исправлений
+        if failures:
+            files = await asyncio.to_thread(context_service.all_files)
+            after = {path: files[path] for path in fixed_paths if path in files}
+            for fp, (_, diagnostics, before) in failures.items():
+                before = {path: before[path] for path in fixed_paths if path in before}
+                await remember_fix(fp, project_id, diagnostics, before, after)
+        return green_sha
+
+    race = FIX_RACE_CANDIDATES > 1
+    if race:
+        # кандидаты собираются в ветках fix/*; если workflow их не собирает — обычный цикл
+        async with push_locks.setdefault(project_id, asyncio.Lock()):
+            race = await repo_service.supports_fix_branches()
+        if not race:
+            warning(f"[BUILD][RACE] {project_id}: workflow не собирает fix/** — исправления по очереди")
+    rounds = FIX_RACE_ROUNDS if race else max_fix_rounds
+    for round_idx in range(1, rounds + 1):
+        fp = await record_failure(build)
+        # известные исправления — только в первый раунд, дальше агент правит своё
+        hints = await known_fixes(fp) if round_idx == 1 else []
+
+        # раунд исправления видит только падающие файлы и их соседей, а не весь проект
+        fix_paths = await asyncio.to_thread(context_service.symbols.focus_paths, build.error_text or "") or sorted(
+            {cmd["path"] for cmd in commands if cmd["op"] != "delete"}
+        )
+        fix_task = build_fix_prompt(specification, agent.name, build, paths=fix_paths, known_fixes=hints)
+
+        if race:
+            commands, sha, build = await _race_fix_candidates(
+                agent, project_id, repo_service, context_service, processor, deploy_service,
+                fix_task, fix_paths, unpushed, round_idx,
+            )
+            fixed_paths.update(cmd["path"] for cmd in commands)
+            if build.ok and await _promote_candidate(project_id, context_service, repo_service, commands, sha, build):
+                return await succeeded(sha)
+            if build.ok:
+                # main ушёл вперёд — победитель идёт в main обычным коммитом
+                sha, build = await push_and_build(commands, [], None)
+                if build.ok:
+                    return await succeeded(sha)
+            else:
+                # лучший из проигравших становится текущим состоянием проекта,
+                # чтобы следующий раунд исправлял именно его ошибки
+                await _apply_unpushed(project_id, context_service, commands)
+                unpushed = commands
+            continue
+
+        fix_applied: list = []
+        fix_pipeline = BlobUploadPipeline(repo_service.manager)
+        fix_agent_result = await _run_agent_and_get_result(
+            project_id,
+            agent,
+            fix_task,
+            fix_paths=fix_paths,
+            priority=LLMPriority.FIX,
+            on_op=_streamed_apply(context_service, fix_applied, fix_pipeline),
+        )
+        fix_commands = _merge_commands(fix_applied, processor.parse_task_result(fix_agent_result))
+        commands = fix_commands
+        fixed_paths.update(cmd["path"] for cmd in commands)
+        sha, build = await push_and_build(fix_commands, fix_applied, fix_pipeline)
 
         if build.ok:
-            return sha
+            return await succeeded(sha)
 
     raise BuildFailed(
-        f"Build still failing after {max_fix_rounds} fix rounds. "
+        f"Build still failing after {rounds} fix rounds. "
         f"Last run: {build.run_url}, conclusion={build.conclusion}"
     )
 
 
+async def _race_fix_candidates(
+    agent: AssistantAgent,
+    project_id: uuid.UUID,
+    repo_service: RepositoryService,
+    context_service: ProjectContextService,
+    processor: RepoCommandProcessor,
+    deploy_service: GitHubDeployService,
+    fix_task: str,
+    fix_paths: list[str],
+    unpushed: list,
+    round_idx: int,
+) -> tuple[list, str | None, WorkflowResult]:
+    """
+    Раунд гонки: FIX_RACE_CANDIDATES исправлений генерируются на агенте вызывающего
+    и свободных агентах пула (без ожидания слотов), каждое пушится поверх main
+    в свою ветку fix/*, сборки ждутся одновременно; сбой кандидата — его неудача.
+    Возвращает (операции, sha, результат) первого зелёного кандидата,
+    а если зелёных нет — кандидата с наименьшим числом ошибок. Ветки удаляются.
+    """
+    role = agent.name.lower()
+    run_tag = uuid.uuid4().hex[:6]
+    base_files = await asyncio.to_thread(context_service.all_files)
+    branches: list[str] = []
+
+    async def generate(worker: AssistantAgent, idx: int) -> list:
+        # у кандидатов разные задачи: иначе кэш ответов LLM вернёт один и тот же ответ
+        task = fix_task if idx == 0 else (
+            f"{fix_task}\n\nAlternative candidate #{idx + 1}: "
+            "if the obvious fix is uncertain, take a different approach."
+        )
+        result = await _run_agent_and_get_result(
+            project_id, worker, task, priority=LLMPriority.FIX, fix_paths=fix_paths
+        )
+        return _merge_commands(unpushed, processor.parse_task_result(result))
+
+    async def generate_on(worker: AssistantAgent, indices: range) -> Dict[int, list]:
+        # один экземпляр — один model_context: его кандидаты генерируются по очереди
+        generated = {}
+        for idx in indices:
+            try:
+                generated[idx] = await generate(worker, idx)
+            except Exception as e:
+                error(f"[BUILD][RACE] кандидат {idx + 1} не сгенерирован: {e}")
+        return generated
+
+    async def build_candidate(idx: int, cmds: list) -> tuple[int, str | None, WorkflowResult]:
+        files = files_after(base_files, cmds)
+        # у каждого кандидата своя рабочая копия pre-flight сборки
+        failed = await asyncio.to_thread(preflight_check, f"{project_id}-c{idx + 1}", files, cmds)
+        if failed:
+            return idx, None, failed
+
+        branch = f"fix/{role}-{run_tag}-r{round_idx}-c{idx + 1}"
+        branches.append(branch)
+        tree = await repo_service.manager.tree_after(cmds)
+        sha = await repo_service.push(cmds, branch=branch)
+        if not sha or len(sha) != 40:
+            return idx, None, WorkflowResult(ok=False, conclusion="push_failed", error_text=sha or "push failed")
+
+        info(f"[BUILD][RACE] {branch}: {sha}")
+        build = await deploy_service.submit_build(
+            project_id=str(project_id),
+            agent_name=agent.name,
+            head_sha=sha,
+            owner=repo_service.manager.owner,
+            repo=repo_service.manager.repo_name or "",
+            tree_sha=tree,
+        )
+        # future сборки общий (дедупликация по sha) — отмена гонки его не трогает
+        return idx, sha, _with_project_paths(await asyncio.shield(build), files)
+
+    async def push_and_wait(idx: int, cmds: list) -> tuple[int, str | None, WorkflowResult]:
+        # сбой одного кандидата (GitHub API, ожидание main) не прерывает гонку
+        try:
+            return await build_candidate(idx, cmds)
+        except Exception as e:
+            error(f"[BUILD][RACE] кандидат {idx + 1} не собран: {e}")
+            return idx, None, WorkflowResult(ok=False, conclusion="candidate_failed", error_text=str(e))
+
+    # вызывающий уже держит слот пула: дополнительные экземпляры берутся только
+    # свободные и без ожидания, один слот оставляется под чат PM
+    async with AsyncExitStack() as stack:
+        workers = [agent]
+        for _ in range(FIX_RACE_CANDIDATES - 1):
+            extra = await stack.enter_async_context(agent_pool.try_acquire(role, keep_free=1))
+            if extra is None:
+                break
+            workers.append(extra)
+        if len(workers) < FIX_RACE_CANDIDATES:
+            info(f"[BUILD][RACE] свободных агентов {len(workers)} из {FIX_RACE_CANDIDATES}")
+
+        parts = await asyncio.gather(*(
+            generate_on(worker, range(i, FIX_RACE_CANDIDATES, len(workers)))
+            for i, worker in enumerate(workers)
+        ))
+    candidates = dict(sorted((idx, cmds) for part in parts for idx, cmds in part.items() if cmds))
+    if not candidates:
+        raise BuildFailed("no fix candidates generated")
+
+    tasks = [asyncio.create_task(push_and_wait(idx, cmds)) for idx, cmds in candidates.items()]
+    results: list[tuple[int, str | None, WorkflowResult]] = []
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            idx, sha, build = await next_done
+            info(f"[BUILD][RACE] кандидат {idx + 1}: {build.conclusion}")
+            if build.ok:
+                return candidates[idx], sha, build
+            results.append((idx, sha, build))
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await asyncio.gather(
+            *(repo_service.manager.delete_branch(branch) for branch in branches), return_exceptions=True
+        )
+
+    # зелёных нет: дальше исправляется кандидат с наименьшим числом ошибок
+    idx, sha, build = min(results, key=lambda r: len(r[2].diagnostics) or float("inf"))
+    return candidates[idx], sha, build
+
+
+async def _promote_candidate(
+    project_id: uuid.UUID,
+    context_service: ProjectContextService,
+    repo_service: RepositoryService,
+    commands: list,
+    sha: str,
+    build: WorkflowResult,
+) -> bool:
+    """Перематывает main на зелёный коммит кандидата; False — main ушёл вперёд."""
+    lock = push_locks.setdefault(project_id, asyncio.Lock())
+    async with lock:
+        if not await repo_service.manager.fast_forward_main(sha, build.tree_sha):
+            return False
+        await asyncio.to_thread(context_service.apply_operations, commands)
+
+    info(f"[BUILD][RACE] main -> {sha}")
+    return True
+
+
+async def _apply_unpushed(
+    project_id: uuid.UUID,
+    context_service: ProjectContextService,
+    commands: list,
+) -> None:
+    lock = push_locks.setdefault(project_id, asyncio.Lock())
+    async with lock:
+        await asyncio.to_thread(context_service.apply_operations, commands)
+
+
+def _with_project_paths(build: WorkflowResult, file_paths) -> WorkflowResult:
+    """Диагностики CI с путями файлов проекта, а не от директории сборки (frontend/)."""
+    if not build.diagnostics:
+        return build
+    diagnostics = resolve_paths(build.diagnostics, file_paths)
+    if diagnostics == build.diagnostics:
+        return build
+    # результат сборки общий (кэш монитора) — не меняем его, а копируем
+    return dataclasses.replace(build, diagnostics=diagnostics, error_text=format_diagnostics(diagnostics))
+
+
 async def _wait_and_get_build(
     deploy_service: GitHubDeployService,
+    repo_service: RepositoryService,
     project_id: uuid.UUID,
     agent_name: str,
     head_sha: str,
 ) -> WorkflowResult:
     info(f"[_wait_and_get_build]: {agent_name}")
+    # дерево коммита известно локально после push: по нему берётся готовый результат сборки,
+    # если такое же дерево уже собиралось (агент повторил те же файлы)
+    head = await repo_service.manager.head()
     build = await deploy_service.submit_build(
         project_id=str(project_id),
         agent_name=agent_name,
         head_sha=head_sha,
+        owner=repo_service.manager.owner,
+        repo=repo_service.manager.repo_name or "",
+        tree_sha=head[1] if head and head[0] == head_sha else None,
     )
     return await build
 
 
-async def _run_agent_and_get_result(project_id: uuid.UUID, agent: AssistantAgent, task: str):
-    await _rebuild_agent_context(agent, project_id, task=task)
+async def _run_agent_and_get_result(
+    project_id: uuid.UUID,
+    agent: AssistantAgent,
+    task: str,
+    focus_paths: list[str] | None = None,
+    priority: LLMPriority = LLMPriority.CODING,
+    fix_paths: list[str] | None = None,
+    on_op: Callable[[dict], Awaitable[None]] | None = None,
+) -> TaskResult | None:
+    """
+    Запускает агента через run_stream. Каждая операция create/update/delete
+    передаётся в on_op сразу, как только её JSON-объект закрылся.
+    """
+    await _rebuild_agent_context(agent, project_id, task=task, focus_paths=focus_paths, fix_paths=fix_paths)
     await status.agent_live(project_id, agent.name, AgentTask.GENERATING_CODE)
-    result = await agent.run(task=task)
+
+    parser = StreamingOpsParser()
+    done = done_line_detector(agent.name)
+    result: TaskResult | None = None
+
+    with llm_call_context(project_id, priority):
+        async for msg in agent.run_stream(task=task):
+            if isinstance(msg, TaskResult):
+                result = msg
+                continue
+
+            if not isinstance(msg, ModelClientStreamingChunkEvent) or not msg.content:
+                continue
+
+            if on_op is not None:
+                for op in parser.feed(msg.content):
+                    await on_op(op)
+
+            if not done.found and done.feed(msg.content):
+                await status.agent_live(project_id, agent.name, AgentTask.FINALIZING)
+
     await status.set_stage(project_id, ProjectStage.CODING, None)
-    return result if isinstance(result, TaskResult) else result
+    return result
 
 
 async def run_ai_agents(
@@ -182,28 +573,36 @@ async def run_ai_agents(
     agent_ids: list[str],
     project_id: uuid.UUID,
 ):
-    repo_service = _get_repo_service(project_id)
+    repo_service = await _get_repo_service(project_id)
     context_service = ProjectContextService(project_id)
-    deploy_service = GitHubDeployService(
-        repo_service.manager.token,
-        repo_service.manager.user.login,
-        repo_service.manager.repo_name or ''
-    )
-    participants = get_ai_agents_by_ids(agent_ids)
+    deploy_service = get_deploy_service()
+    role_ids = get_ai_agent_ids(agent_ids)
 
     await status.set_stage(project_id, ProjectStage.ANALYSIS, 100)
     await status.set_stage(project_id, ProjectStage.CODING, 0)
 
     processor = RepoCommandProcessor()
     repo_update_started = False
+    completed = 0
+
+    async def run_agent(role_id: str) -> None:
+        # у каждого запуска свой экземпляр агента и свой model_context
+        async with agent_pool.acquire(role_id) as agent:
+            await run_acquired_agent(agent)
+
+    async def run_acquired_agent(agent: AssistantAgent) -> None:
+        nonlocal repo_update_started, completed
 
-    for idx, agent in enumerate(participants):
         prompt = generate_agent_prompt(
             specification=specification,
             role=agent.name,
         )
         await status.agent_working(project_id, agent.name, AgentTask.ANALYZING_SPEC)
-        agent_result = await _run_agent_and_get_result(project_id, agent, prompt)
+        applied: list = []
+        pipeline = BlobUploadPipeline(repo_service.manager)
+        agent_result = await _run_agent_and_get_result(
+            project_id, agent, prompt, on_op=_streamed_apply(context_service, applied, pipeline)
+        )
         info(f"[AI_AGENT][{agent.name}] AI response: {agent_result}")
         commands = processor.parse_task_result(agent_result)
 
@@ -223,14 +622,19 @@ async def run_ai_agents(
                 processor=processor,
                 deploy_service=deploy_service,
                 commands=commands,
+                applied=applied,
+                pipeline=pipeline,
             )
         else:
-            context_service.apply_operations(commands)
-            repo_service.push(commands)
-            continue
+            await _apply_and_push(
+                project_id, context_service, repo_service, commands, applied, pipeline
+            )
 
+        completed += 1
         await status.agent_completed(project_id, agent.name)
-        await status.set_stage(project_id, ProjectStage.CODING, int(((idx + 1) / len(participants)) * 100))
+        await status.set_stage(project_id, ProjectStage.CODING, int((completed / len(role_ids)) * 100))
+
+    await AgentScheduler(AI_AGENT_ROLES).run(role_ids, run_agent)
 
     await status.set_stage(project_id, ProjectStage.REPO_UPDATE, 100)
 
@@ -241,19 +645,21 @@ async def get_ai_response(
     history: list[dict],
 ) -> AsyncGenerator[str, None]:
     tz_buffer: list[str] = []
+    tz_done = tz_done_detector()
     specification: str | None = None
 
     try:
-        async for token in run_product_manager_stream(project_id, user_message, history):
-            yield token
+        # aclosing — чтобы агент PM сразу вернулся в пул после break
+        async with aclosing(run_product_manager_stream(project_id, user_message, history)) as pm_stream:
+            async for token in pm_stream:
+                yield token
 
-            tz_buffer.append(token)
-            full_pm_text = "".join(tz_buffer)
+                tz_buffer.append(token)
 
-            if _tz_done(full_pm_text):
-                specification = full_pm_text
-                await status.set_stage(project_id, ProjectStage.PM_TZ, 100)
-                break
+                if tz_done.feed(token):
+                    specification = "".join(tz_buffer)
+                    await status.set_stage(project_id, ProjectStage.PM_TZ, 100)
+                    break
 
     except Exception as pm_error:
         await status.set_error(project_id)
@@ -299,7 +705,7 @@ async def get_ai_response(
 
     await status.set_completed(project_id)
 
-    info_obj = _get_repo_service(project_id).info()
+    info_obj = await (await _get_repo_service(project_id)).info()
 
     info(f"\n🎉 Команда завершила работу. Репозиторий обновлён.\n\n")
 
@@ -1,3 +1,7 @@
+import json
+
+TZ_DONE_MARKER = "ТЗ завершено"
+
 PRODUCT_MANAGER_SYSTEM_PROMPT = """
 Ты — опытный Product Manager уровня Senior/Lead.
 
@@ -715,7 +719,7 @@ def _role_norm(role: str) -> str:
     return role.strip().lower()
 
 
-def _done_line(role: str) -> str:
+def done_line(role: str) -> str:
     # чтобы было единообразно и для парсера
     return f"ГОТОВО: {role.strip().upper()}"
 
@@ -782,24 +786,118 @@ def _role_rules_block(role: str) -> str:
     )
 
 
-def build_fix_prompt(specification: str, agent_name: str, build) -> str:
+def contract_sections(specification: str, role: str, paths) -> str:
+    """
+    Части контракта, которые относятся к исправляемым файлам: цель,
+    интеграционный контракт, модуль роли и выходы/проверки с этими путями.
+    Если контракт не JSON — возвращается целиком.
+    """
+    try:
+        contract = json.loads(specification)
+    except ValueError:
+        return specification
+    if not isinstance(contract, dict):
+        return specification
+
+    # контракт пишет LLM: при неожиданной форме любого элемента — контракт целиком
+    core = contract.get("core") or {}
+    modules = contract.get("modules") or {}
+    if not isinstance(core, dict) or not isinstance(modules, dict):
+        return specification
+    acceptance = core.get("acceptance") or {}
+    if not isinstance(acceptance, dict):
+        return specification
+    all_checks = acceptance.get("checks") or []
+    if not isinstance(all_checks, list) or not all(isinstance(check, dict) for check in all_checks):
+        return specification
+
+    module_outputs = {}
+    for name, module in modules.items():
+        if not isinstance(module or {}, dict):
+            return specification
+        items = (module or {}).get("required_outputs") or []
+        if not isinstance(items, list) or not all(isinstance(out, dict) for out in items):
+            return specification
+        module_outputs[name] = items
+
+    paths = set(paths)
+    role_key = _role_norm(role)
+
+    def touches(out: dict) -> bool:
+        targets = out.get("must_create_or_update_paths") or []
+        return isinstance(targets, list) and any(isinstance(p, str) and p in paths for p in targets)
+
+    outputs = {
+        name: [out for out in items if name == role_key or touches(out)]
+        for name, items in module_outputs.items()
+    }
+    checks = [check for check in all_checks if isinstance(check.get("path"), str) and check["path"] in paths]
+
+    sections = {
+        "goal": core.get("goal"),
+        "integration_contract": core.get("integration_contract"),
+        "modules": {name: {"required_outputs": items} for name, items in outputs.items() if items},
+        "acceptance_checks": checks,
+    }
+    return json.dumps({k: v for k, v in sections.items() if v}, ensure_ascii=False, indent=2)
+
+
+def build_fix_prompt(specification: str, agent_name: str, build, paths=None, known_fixes=None) -> str:
+    """
+    paths — исправляемые файлы: вместо всего контракта в промпт идут
+    только относящиеся к ним секции (contract_sections).
+    known_fixes — diff'ы, которые уже исправляли такую же ошибку в других проектах.
+    """
+    diagnostics = build.diagnostics
+    if diagnostics:
+        # разобранные ошибки: только нужные файлы и сообщения вместо сотни строк лога
+        files = sorted({d.file for d in diagnostics if d.file})
+        errors = [
+            "Errors (file:line code: message):",
+            *(d.format() for d in diagnostics),
+            "",
+            "Fix only these files unless the error requires otherwise:",
+            *(f"- {path}" for path in files),
+        ]
+    else:
+        errors = [
+            "Error snippet:",
+            (build.error_text or "(no error text)"),
+        ]
+
+    if build.conclusion == "preflight_failed":
+        header = "Local pre-flight check failed, nothing was pushed. Fix the files so the check passes."
+    else:
+        header = "GitHub Actions build failed. Fix the repository so the workflow succeeds."
+
     return "\n".join(
         [
-            "GitHub Actions build failed. Fix the repository so the workflow succeeds.",
+            header,
             "",
             f"Agent: {agent_name}",
             "",
-            "Specification:",
-            specification,
+            *(
+                ["Contract sections for these files:", contract_sections(specification, agent_name, paths)]
+                if paths
+                else ["Specification:", specification]
+            ),
             "",
             "Run info:",
             f"- conclusion: {build.conclusion}",
             f"- run_url: {build.run_url}",
             f"- workflow_name: {build.workflow_name}",
             "",
-            "Error snippet:",
-            (build.error_text or "(no error text)"),
+            *errors,
             "",
+            *(
+                [
+                    "Known fixes for the same errors in other projects (unified diff, adapt, do not copy blindly):",
+                    *known_fixes,
+                    "",
+                ]
+                if known_fixes
+                else []
+            ),
             "Return ONLY repo operations/commands in the same format as usual.",
         ]
     )
@@ -810,7 +908,7 @@ def _output_format_block(role: str) -> str:
         "СТРОГИЙ ФОРМАТ ВЫВОДА (ЕДИНЫЙ ДЛЯ ВСЕХ РОЛЕЙ):\n"
         "1) Первая строка: РОВНО один JSON-объект (без markdown/```), структура:\n"
         "   {\"create\":[{\"path\":\"...\",\"content\":\"...\"}],\"update\":[...],\"delete\":[{\"path\":\"...\"}]}\n"
-        "2) Вторая строка: РОВНО \"" + _done_line(role) + "\"\n"
+        "2) Вторая строка: РОВНО \"" + done_line(role) + "\"\n"
         "ЗАПРЕЩЕНО:\n"
         "- Любой текст до JSON\n"
         "- Любой текст между JSON и строкой ГОТОВО\n"
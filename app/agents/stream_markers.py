@@ -0,0 +1,40 @@
+from app.agents.prompts import TZ_DONE_MARKER, done_line
+
+
+class StreamMarkerDetector:
+    """
+    Ищет маркер в потоке токенов без склейки всего ответа на каждом шаге.
+    Хранит только хвост длиной len(marker) - 1, поэтому маркер,
+    разрезанный между токенами, тоже находится. Стоимость — O(длина токена).
+    """
+
+    def __init__(self, marker: str):
+        if not marker:
+            raise ValueError("marker is required")
+
+        self.marker = marker
+        self.found = False
+        self._keep = len(marker) - 1
+        self._window = ""
+
+    def feed(self, chunk: str) -> bool:
+        if self.found or not chunk:
+            return self.found
+
+        window = self._window + chunk
+        if self.marker in window:
+            self.found = True
+            self._window = ""
+        else:
+            self._window = window[-self._keep:] if self._keep else ""
+
+        return self.found
+
+
+def tz_done_detector() -> StreamMarkerDetector:
+    return StreamMarkerDetector(TZ_DONE_MARKER)
+
+
+def done_line_detector(role: str) -> StreamMarkerDetector:
+    """Детектор строки "ГОТОВО: <ROLE>" кодовых агентов."""
+    return StreamMarkerDetector(done_line(role))
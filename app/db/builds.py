@@ -0,0 +1,93 @@
+import json
+import uuid
+from typing import Any, Dict, List, Optional
+
+from .main import get_session
+
+
+# ================================================================
+# BUILD RESULTS (по SHA дерева)
+# ================================================================
+def get_build_result(tree_sha: str, workflow: str) -> Optional[Dict[str, Any]]:
+    session = get_session()
+
+    row = session.execute(
+        """
+        SELECT ok, conclusion, run_id, run_url, workflow_name, error_text, diagnostics
+        FROM build_results
+        WHERE tree_sha = %s AND workflow = %s
+        """,
+        [tree_sha, workflow],
+    ).one()
+
+    if not row:
+        return None
+
+    return {
+        "ok": row.ok,
+        "conclusion": row.conclusion,
+        "run_id": row.run_id,
+        "run_url": row.run_url,
+        "workflow_name": row.workflow_name,
+        "error_text": row.error_text,
+        "diagnostics": json.loads(row.diagnostics or "[]"),
+    }
+
+
+def set_build_result(tree_sha: str, workflow: str, result: Dict[str, Any], ttl_sec: int):
+    session = get_session()
+
+    session.execute(
+        """
+        INSERT INTO build_results
+        (tree_sha, workflow, ok, conclusion, run_id, run_url, workflow_name, error_text, diagnostics, updated_at)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, toTimestamp(now()))
+        USING TTL %s
+        """,
+        [
+            tree_sha,
+            workflow,
+            result["ok"],
+            result["conclusion"],
+            result.get("run_id"),
+            result.get("run_url"),
+            result.get("workflow_name"),
+            result.get("error_text"),
+            json.dumps(result.get("diagnostics") or []),
+            ttl_sec,
+        ],
+    )
+
+
+# ================================================================
+# BUILD FIXES (известные исправления по отпечатку ошибок)
+# ================================================================
+def get_build_fixes(fingerprint: str, limit: int = 3) -> List[Dict[str, Any]]:
+    session = get_session()
+
+    rows = session.execute(
+        """
+        SELECT project_id, diagnostics, fix_diff
+        FROM build_fixes
+        WHERE fingerprint = %s
+        LIMIT %s
+        """,
+        [fingerprint, limit],
+    )
+
+    return [
+        {"project_id": row.project_id, "diagnostics": row.diagnostics, "fix_diff": row.fix_diff}
+        for row in rows
+    ]
+
+
+def add_build_fix(fingerprint: str, project_id: uuid.UUID, diagnostics: str, fix_diff: str):
+    session = get_session()
+
+    session.execute(
+        """
+        INSERT INTO build_fixes (fingerprint, created_at, project_id, diagnostics, fix_diff)
+        VALUES (%s, now(), %s, %s, %s)
+        """,
+        [fingerprint, project_id, diagnostics, fix_diff],
+    )
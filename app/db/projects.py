@@ -96,6 +96,17 @@ def get_all_files(project_id: uuid.UUID):
     return {row.file_path: row.content for row in rows}
 
 
+def get_file_paths(project_id: uuid.UUID) -> list[str]:
+    session = get_session()
+
+    rows = session.execute(
+        "SELECT file_path FROM project_files WHERE project_id = %s",
+        [project_id],
+    )
+
+    return [row.file_path for row in rows]
+
+
 def upsert_file(project_id: uuid.UUID, file_path: str, content: str, agent: str):
     session = get_session()
 
@@ -255,6 +266,62 @@ def set_file_summary(project_id: uuid.UUID, file_path: str, summary: str):
     )
 
 
+# ================================================================
+# FILE SYMBOLS (exports / imports / deps)
+# ================================================================
+def get_file_symbols(project_id: uuid.UUID):
+    session = get_session()
+
+    rows = session.execute(
+        """
+        SELECT file_path, exports, imports, deps
+        FROM project_file_symbols
+        WHERE project_id = %s
+        """,
+        [project_id],
+    )
+
+    return {
+        row.file_path: {
+            "exports": list(row.exports or []),
+            "imports": list(row.imports or []),
+            "deps": list(row.deps or []),
+        }
+        for row in rows
+    }
+
+
+def set_file_symbols(
+    project_id: uuid.UUID,
+    file_path: str,
+    exports: list[str],
+    imports: list[str],
+    deps: list[str],
+):
+    session = get_session()
+
+    session.execute(
+        """
+        INSERT INTO project_file_symbols
+        (project_id, file_path, exports, imports, deps, updated_at)
+        VALUES (%s, %s, %s, %s, %s, toTimestamp(now()))
+        """,
+        [project_id, file_path, exports, imports, deps],
+    )
+
+
+def delete_file_symbols(project_id: uuid.UUID, file_path: str):
+    session = get_session()
+
+    session.execute(
+        """
+        DELETE FROM project_file_symbols
+        WHERE project_id = %s AND file_path = %s
+        """,
+        [project_id, file_path],
+    )
+
+
 # ================================================================
 # AGENT MEMORY
 # ================================================================
@@ -328,6 +395,11 @@ def delete_project_with_data(project_id: uuid.UUID):
         "DELETE FROM project_file_summaries WHERE project_id = %s", [project_id]
     )
 
+    # удалить индекс символов
+    session.execute(
+        "DELETE FROM project_file_symbols WHERE project_id = %s", [project_id]
+    )
+
     # удалить проект
     session.execute("DELETE FROM projects WHERE project_id = %s", [project_id])
 
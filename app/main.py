@@ -1,8 +1,12 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.logger.console_logger import error, success
-from app.routes import projects, messages, auth, agents
+from app.routes import projects, messages, auth, agents, metrics, webhooks
 from app.db.main import db
+from app.agents.manage_repo.async_github import close_github_clients
+from app.agents.manage_repo.github_deploy_service import get_deploy_service
+from app.agents.manage_repo.preflight import warn_if_no_ts_parser
+from app.agents.manage_repo.repo_pool import repo_pool
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -21,6 +25,8 @@ app.include_router(projects.router)
 app.include_router(messages.router)
 app.include_router(auth.router)
 app.include_router(agents.router)
+app.include_router(metrics.router)
+app.include_router(webhooks.router)
 
 
 @app.on_event("startup")
@@ -32,8 +38,14 @@ async def startup_event():
     except Exception as e:
         error(f"❌ DB status check failed on startup: {e}")
 
+    warn_if_no_ts_parser()
+    repo_pool.start()
+
 
 @app.on_event("shutdown")
 async def shutdown_event():
     error("🛑 Shutting down FastAPI application...")
+    await repo_pool.stop()
+    await get_deploy_service().stop()
+    await close_github_clients()
     db.close()
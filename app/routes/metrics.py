@@ -0,0 +1,28 @@
+from fastapi import APIRouter
+
+from app.agents.llm.dispatcher import llm_dispatcher
+from app.agents.manage_repo.async_github import github_stats
+from app.agents.manage_repo.github_deploy_service import get_deploy_service
+from app.agents.manage_repo.repo_pool import repo_pool
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+@router.get("/llm")
+def get_llm_metrics():
+    return llm_dispatcher.stats()
+
+
+@router.get("/github")
+def get_github_metrics():
+    return github_stats()
+
+
+@router.get("/repo-pool")
+def get_repo_pool_metrics():
+    return repo_pool.stats()
+
+
+@router.get("/builds")
+def get_build_metrics():
+    return get_deploy_service().stats()
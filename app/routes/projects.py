@@ -1,4 +1,5 @@
 from datetime import datetime
+import asyncio
 import json
 import uuid
 from fastapi import APIRouter, status
@@ -108,8 +109,18 @@ def get_project_by_short(short_id: str):
     }
 
 
+def _create_agent_states(project_id: uuid.UUID, agent_ids: list[str]) -> None:
+    for agent_id in agent_ids:
+        db_agents.create_agent_state(
+            project_id=project_id,
+            agent_id=agent_id,
+            status="idle",
+            current_task=None,
+        )
+
+
 @router.post("/project_create")
-def create_project(body: ProjectInfoRequest):
+async def create_project(body: ProjectInfoRequest):
     project_id = uuid.uuid4()
     now = datetime.utcnow()
     short_id = generate_short_id()
@@ -130,17 +141,12 @@ def create_project(body: ProjectInfoRequest):
     )
 
     try:
-        projects.create_project_with_defaults(new_project, new_metrics, short_id)
-        repo_service = RepositoryService(project_id)
-        repo_service.create_repo("project-" + str(project_id))
-
-        for agent_id in body.agent_ids:
-            db_agents.create_agent_state(
-                project_id=project_id,
-                agent_id=agent_id,
-                status="idle",
-                current_task=None,
-            )
+        # Cassandra-драйвер синхронный — запросы не должны блокировать event loop
+        await asyncio.to_thread(projects.create_project_with_defaults, new_project, new_metrics, short_id)
+        repo_service = await RepositoryService.load(project_id)
+        await repo_service.create_repo("project-" + str(project_id))
+
+        await asyncio.to_thread(_create_agent_states, project_id, body.agent_ids)
 
     except Exception as e:
         return JSONResponse(
@@ -210,8 +216,8 @@ def update_project(project_id: uuid.UUID, body: ProjectUpdateRequest):
 
 
 @router.delete("/projects/{project_id}")
-def delete_project(project_id: uuid.UUID):
-    project = projects.get_project_by_id(project_id)
+async def delete_project(project_id: uuid.UUID):
+    project = await asyncio.to_thread(projects.get_project_by_id, project_id)
 
     if not project:
         return JSONResponse(
@@ -225,9 +231,9 @@ def delete_project(project_id: uuid.UUID):
         )
 
     try:
-        projects.delete_project_with_data(project_id)
-        repo_service = RepositoryService(project_id)
-        repo_service.delete_repo()
+        await asyncio.to_thread(projects.delete_project_with_data, project_id)
+        repo_service = await RepositoryService.load(project_id)
+        await repo_service.delete_repo()
 
     except Exception as e:
         return JSONResponse(
@@ -0,0 +1,54 @@
+import json
+
+from fastapi import APIRouter, Header, Request, status
+from fastapi.responses import JSONResponse
+
+from app.agents.manage_repo.github_webhooks import (
+    GH_WEBHOOK_SECRET,
+    dispatch_event,
+    verify_signature,
+)
+
+router = APIRouter(prefix="/webhooks", tags=["webhooks"])
+
+
+@router.post("/github")
+async def github_webhook(
+    request: Request,
+    x_github_event: str = Header(""),
+    x_hub_signature_256: str = Header(""),
+):
+    if not GH_WEBHOOK_SECRET:
+        return JSONResponse(
+            status_code=status.HTTP_404_NOT_FOUND,
+            content={
+                "status": status.HTTP_404_NOT_FOUND,
+                "error": "not_found",
+                "message": "Вебхуки GitHub не настроены",
+            },
+        )
+
+    body = await request.body()
+    if not verify_signature(body, x_hub_signature_256):
+        return JSONResponse(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            content={
+                "status": status.HTTP_401_UNAUTHORIZED,
+                "error": "bad_signature",
+                "message": "Подпись X-Hub-Signature-256 не совпала",
+            },
+        )
+
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={
+                "status": status.HTTP_400_BAD_REQUEST,
+                "error": "bad_payload",
+                "message": "Тело вебхука — не JSON",
+            },
+        )
+
+    return {"event": x_github_event, "matched": dispatch_event(x_github_event, payload)}
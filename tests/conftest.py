@@ -0,0 +1,5 @@
+import os
+
+# repo_manager требует токен при импорте; в тестах запросы идут в github_stub_server
+os.environ.setdefault("GH_PAT", "test-token")
+os.environ.setdefault("GIT_TRANSPORT", "rest")
@@ -0,0 +1,82 @@
+import shutil
+import subprocess
+
+import pytest
+
+from app.agents.manage_repo.git_mirror import GitMirror
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git не установлен")
+
+
+def git(remote, *args):
+    return subprocess.run(
+        ["git", f"--git-dir={remote}", *args], capture_output=True, text=True, check=True
+    ).stdout.strip()
+
+
+@pytest.fixture
+def remote(tmp_path):
+    path = tmp_path / "remote.git"
+    subprocess.run(["git", "init", "--bare", "--quiet", "--initial-branch=main", str(path)], check=True)
+    return path
+
+
+def mirror(tmp_path, remote, name="mirror", token=None):
+    return GitMirror(f"file://{remote}", str(tmp_path / f"{name}.git"), token=token)
+
+
+def files(remote):
+    return set(git(remote, "ls-tree", "-r", "--name-only", "main").splitlines())
+
+
+def test_push_creates_commit_on_remote(tmp_path, remote):
+    sha = mirror(tmp_path, remote).push_commit(
+        [
+            {"op": "create", "path": "frontend/index.html", "content": "<h1>hi</h1>\n"},
+            {"op": "create", "path": "README.md", "content": "# app\n"},
+        ],
+        "Initial commit",
+    )
+
+    assert git(remote, "rev-parse", "main") == sha
+    assert files(remote) == {"frontend/index.html", "README.md"}
+    assert git(remote, "show", "main:frontend/index.html") == "<h1>hi</h1>"
+
+
+def test_unchanged_tree_is_not_pushed(tmp_path, remote):
+    ops = [{"op": "create", "path": "a.txt", "content": "a\n"}]
+    m = mirror(tmp_path, remote)
+    first = m.push_commit(ops, "first")
+
+    assert m.push_commit(ops, "same content") == first
+    assert git(remote, "rev-list", "--count", "main") == "1"
+
+
+def test_update_and_delete(tmp_path, remote):
+    m = mirror(tmp_path, remote)
+    m.push_commit(
+        [{"op": "create", "path": "a.txt", "content": "a\n"}, {"op": "create", "path": "b.txt", "content": "b\n"}],
+        "first",
+    )
+    m.push_commit([{"op": "update", "path": "a.txt", "content": "a2\n"}, {"op": "delete", "path": "b.txt"}], "second")
+
+    assert files(remote) == {"a.txt"}
+    assert git(remote, "show", "main:a.txt") == "a2"
+    assert git(remote, "rev-list", "--count", "main") == "2"
+
+
+def test_fresh_mirror_commits_on_top_of_remote(tmp_path, remote):
+    first = mirror(tmp_path, remote, "one").push_commit([{"op": "create", "path": "a.txt", "content": "a\n"}], "first")
+    second = mirror(tmp_path, remote, "two").push_commit([{"op": "create", "path": "b.txt", "content": "b\n"}], "second")
+
+    assert git(remote, "rev-parse", f"{second}^") == first
+    assert files(remote) == {"a.txt", "b.txt"}
+
+
+def test_token_is_not_written_to_mirror(tmp_path, remote):
+    m = mirror(tmp_path, remote, token="ghp_secret_token")
+    m.push_commit([{"op": "create", "path": "a.txt", "content": "a\n"}], "first")
+
+    config = (tmp_path / "mirror.git" / "config").read_text()
+    assert "ghp_secret_token" not in config
+    assert "remote" not in config
@@ -0,0 +1,54 @@
+import shutil
+
+import pytest
+
+from app.agents.manage_repo.preflight import check_syntax, preflight_check
+
+HAS_NODE = shutil.which("node") is not None
+HAS_ESBUILD = shutil.which("esbuild") is not None
+
+
+def _create(files):
+    return [{"op": "create", "path": path} for path in files]
+
+
+# валидный TS/TSX, на котором ошибался эвристический подсчёт скобок
+VALID_TS = {
+    "frontend/src/Smile.tsx": "export const Smile = () => <p>Smile :) today</p>;\n",
+    "frontend/src/Steps.tsx": "export const Steps = () => <p>Steps: 1) open 2) close</p>;\n",
+    "frontend/src/Quote.tsx": "export const s = '(';\nexport const Q = () => <p>Don't {s}</p>;\n",
+    "frontend/src/regex.ts": "export const paren = /[(]/;\nexport const close = /\\)+/g.test(')');\n",
+}
+
+
+@pytest.mark.parametrize("path", sorted(VALID_TS))
+def test_valid_jsx_text_and_regex_literals_pass(path):
+    assert check_syntax(path, VALID_TS[path]) == []
+
+
+def test_valid_ts_is_pushed():
+    assert preflight_check("test-valid", VALID_TS, _create(VALID_TS), build_cmd="") is None
+
+
+def test_unresolved_import_blocks_push():
+    files = {"frontend/src/main.tsx": "import App from './App'\n"}
+    result = preflight_check("test-import", files, _create(files), build_cmd="")
+
+    assert result is not None
+    assert result.conclusion == "preflight_failed"
+    assert [(d.file, d.line, d.code) for d in result.diagnostics] == [("frontend/src/main.tsx", 1, "import")]
+
+
+@pytest.mark.skipif(not HAS_NODE, reason="node не установлен")
+def test_node_checks_esm_and_commonjs():
+    assert check_syntax("a.js", "import x from './x.js'\nexport const y = /[(]/;\n") == []
+    assert check_syntax("b.js", "module.exports = { a: '(' };\n") == []
+
+    found = check_syntax("c.js", "export const x = ;\n")
+    assert [(d.file, d.line) for d in found] == [("c.js", 1)]
+
+
+@pytest.mark.skipif(not HAS_ESBUILD, reason="esbuild не установлен")
+def test_esbuild_reports_real_ts_errors():
+    found = check_syntax("frontend/src/App.tsx", "export const App = () => <div>;\n")
+    assert found and found[0].file == "frontend/src/App.tsx"
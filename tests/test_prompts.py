@@ -0,0 +1,43 @@
+import json
+
+import pytest
+
+from app.agents.prompts import contract_sections
+
+
+@pytest.mark.parametrize("spec", [
+    '{"core": {"acceptance": {"checks": ["a"]}}}',
+    '{"core": "goal"}',
+    '{"core": {"acceptance": ["a"]}}',
+    '{"modules": ["frontend"]}',
+    '{"modules": {"frontend": "module"}}',
+    '{"modules": {"frontend": {"required_outputs": ["src/App.tsx"]}}}',
+    "not json",
+])
+def test_malformed_contract_is_returned_as_is(spec):
+    assert contract_sections(spec, "frontend", ["src/App.tsx"]) == spec
+
+
+def test_sections_for_fixed_paths():
+    spec = json.dumps({
+        "core": {
+            "goal": "todo app",
+            "acceptance": {"checks": [{"path": "src/App.tsx"}, {"path": "src/api.ts"}]},
+        },
+        "modules": {
+            "frontend": {"required_outputs": [{"must_create_or_update_paths": ["src/main.tsx"]}]},
+            "backend": {"required_outputs": [
+                {"must_create_or_update_paths": ["src/App.tsx"]},
+                {"must_create_or_update_paths": ["server.py"]},
+            ]},
+        },
+    })
+
+    sections = json.loads(contract_sections(spec, "frontend", ["src/App.tsx"]))
+
+    assert sections["goal"] == "todo app"
+    assert sections["acceptance_checks"] == [{"path": "src/App.tsx"}]
+    assert sections["modules"] == {
+        "frontend": {"required_outputs": [{"must_create_or_update_paths": ["src/main.tsx"]}]},
+        "backend": {"required_outputs": [{"must_create_or_update_paths": ["src/App.tsx"]}]},
+    }
@@ -0,0 +1,120 @@
+import uuid
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+
+from app.agents.manage_repo.async_github import AsyncGitHub
+from app.agents.manage_repo.github_stub_server import StubState, create_stub_app
+from app.agents.manage_repo.repo_manager import RepoManager, _repo_heads, _tree_listings
+
+
+@pytest_asyncio.fixture
+async def stub():
+    state = StubState()
+    runner = web.AppRunner(create_stub_app(state))
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]  # type: ignore
+
+    github = AsyncGitHub("test-token", base_url=f"http://127.0.0.1:{port}")
+    try:
+        yield state, github
+    finally:
+        await github.close()
+        await runner.cleanup()
+
+
+async def new_manager(github: AsyncGitHub) -> RepoManager:
+    # кэши head и деревьев общие на процесс: у каждого теста свой репозиторий
+    repo = await github.create_repo(f"project-{uuid.uuid4().hex[:8]}", auto_init=True)
+    manager = RepoManager(uuid.uuid4(), repo["owner"]["login"], repo)
+    manager.github = github
+    return manager
+
+
+def files_on_main(state: StubState, manager: RepoManager) -> dict:
+    repo = state.repos[manager.repo_name]
+    return state.files_at(repo, repo.refs["heads/main"])
+
+
+@pytest.mark.asyncio
+async def test_create_update_delete_push(stub):
+    state, github = stub
+    manager = await new_manager(github)
+
+    await manager.push_commit(
+        [
+            {"op": "create", "path": "frontend/index.html", "content": "<h1>hi</h1>\n"},
+            {"op": "create", "path": "frontend/app.js", "content": "console.log(1)\n"},
+        ],
+        "first",
+    )
+    sha = await manager.push_commit(
+        [
+            {"op": "update", "path": "frontend/index.html", "content": "<h1>hello</h1>\n"},
+            {"op": "delete", "path": "frontend/app.js"},
+        ],
+        "second",
+    )
+
+    assert state.repos[manager.repo_name].refs["heads/main"] == sha
+    assert files_on_main(state, manager) == {
+        "README.md": f"# {manager.repo_name}\n",
+        "frontend/index.html": "<h1>hello</h1>\n",
+    }
+
+
+@pytest.mark.asyncio
+async def test_unchanged_files_do_not_create_commit(stub):
+    state, github = stub
+    manager = await new_manager(github)
+    ops = [{"op": "create", "path": "a.txt", "content": "a\n"}]
+    first = await manager.push_commit(ops, "first")
+    commits = len(state.repos[manager.repo_name].commits)
+
+    requests = state.requests
+    assert await manager.push_commit(ops + [{"op": "delete", "path": "missing.txt"}], "same") == first
+    assert len(state.repos[manager.repo_name].commits) == commits
+    # head и листинг дерева известны локально: ни одного запроса к API
+    assert state.requests == requests
+
+
+@pytest.mark.asyncio
+async def test_tree_listing_and_head_are_tracked_locally(stub):
+    state, github = stub
+    manager = await new_manager(github)
+    ops = [{"op": "create", "path": "src/main.ts", "content": "export {}\n"}]
+
+    expected_tree = await manager.tree_after(ops)
+    sha = await manager.push_commit(ops, "first")
+    repo = state.repos[manager.repo_name]
+    assert repo.commits[sha]["tree"]["sha"] == expected_tree
+
+    requests = state.requests
+    assert await manager.head() == (sha, expected_tree)
+    assert await manager._tree_listing(expected_tree) == repo.trees[expected_tree]
+    assert state.requests == requests
+
+    # без локальных кэшей листинг читается с GitHub и совпадает с посчитанным
+    _repo_heads.pop(manager.repo_name, None)
+    _tree_listings.pop(expected_tree, None)
+    assert await manager.head() == (sha, expected_tree)
+    assert await manager._tree_listing(expected_tree) == repo.trees[expected_tree]
+
+
+@pytest.mark.asyncio
+async def test_repeated_get_is_served_by_etag(stub):
+    state, github = stub
+    manager = await new_manager(github)
+
+    hits = github.etag_hits
+    first = await github.get_tree(manager.owner, manager.repo_name, (await manager.head(refresh=True))[1], recursive=True)
+    remaining = state.rate_remaining
+    second = await github.get_tree(manager.owner, manager.repo_name, first["sha"], recursive=True)
+
+    assert second == first
+    assert github.etag_hits == hits + 1
+    # 304 не расходует лимит
+    assert state.rate_remaining == remaining
@@ -0,0 +1,110 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+import uvicorn
+from fastapi import FastAPI
+
+from app.agents.manage_repo import github_deploy_service, github_webhooks
+from app.agents.manage_repo.github_deploy_service import GitHubDeployService
+from app.agents.manage_repo.github_webhook_simulator import deliver, workflow_run_event
+from app.routes import webhooks
+
+SECRET = "test-secret"
+OWNER, REPO = "stub-user", "project-1"
+SHA = "a" * 40
+
+
+class PollCounter:
+    """GitHub, в котором run ещё не появился: запоминает каждый опрос монитора."""
+
+    def __init__(self):
+        self.calls = []
+
+    async def list_workflow_runs(self, owner, repo, **params):
+        self.calls.append("list_workflow_runs")
+        return {"workflow_runs": []}
+
+    async def get_workflow_run(self, owner, repo, run_id):
+        self.calls.append("get_workflow_run")
+        raise AssertionError("завершённый run должен прийти вебхуком")
+
+
+def completed_run(conclusion="success"):
+    return {
+        "id": 7,
+        "name": "Deploy to GitHub Pages",
+        "head_sha": SHA,
+        "event": "push",
+        "status": "completed",
+        "conclusion": conclusion,
+        "html_url": f"https://github.com/{OWNER}/{REPO}/actions/runs/7",
+    }
+
+
+@asynccontextmanager
+async def webhook_server():
+    app = FastAPI()
+    app.include_router(webhooks.router)
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=0, lifespan="off", log_level="warning"))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    try:
+        yield f"http://127.0.0.1:{port}/webhooks/github"
+    finally:
+        server.should_exit = True
+        await task
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(github_webhooks, "GH_WEBHOOK_SECRET", SECRET)
+    monkeypatch.setattr(webhooks, "GH_WEBHOOK_SECRET", SECRET)
+    # первый опрос не раньше чем через минуту: резолвить сборку в тесте может только вебхук
+    monkeypatch.setattr(github_deploy_service, "BUILD_POLL_MIN_SEC", 60.0)
+
+    service = GitHubDeployService("test-token", concurrency=1)
+    service._github = PollCounter()
+    monkeypatch.setattr(github_deploy_service, "_deploy_service", service)
+    return service
+
+
+@pytest.mark.asyncio
+async def test_signed_workflow_run_resolves_build_without_polling(service):
+    try:
+        async with webhook_server() as url:
+            future = await service.submit_build("project-1", "frontend", SHA, owner=OWNER, repo=REPO)
+            # монитор один раз посмотрел runs и уснул до следующего опроса
+            while not service._github.calls:
+                await asyncio.sleep(0.01)
+
+            status = await deliver("workflow_run", workflow_run_event(f"{OWNER}/{REPO}", completed_run()), url=url, secret=SECRET)
+            result = await asyncio.wait_for(future, timeout=5)
+    finally:
+        await service.stop()
+
+    assert status == 200
+    assert result.ok and result.run_id == 7
+    assert service._github.calls == ["list_workflow_runs"]
+    assert service.stats()["webhook_repos"] == 1
+
+
+@pytest.mark.asyncio
+async def test_bad_signature_is_rejected(service):
+    try:
+        async with webhook_server() as url:
+            future = await service.submit_build("project-1", "frontend", SHA, owner=OWNER, repo=REPO)
+            while not service._github.calls:
+                await asyncio.sleep(0.01)
+
+            status = await deliver("workflow_run", workflow_run_event(f"{OWNER}/{REPO}", completed_run()), url=url, secret="wrong")
+            await asyncio.sleep(0.2)
+            resolved = future.done()
+    finally:
+        await service.stop()
+
+    assert status in (401, 403)
+    assert not resolved
+    assert service.stats()["webhook_repos"] == 0